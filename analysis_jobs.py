@@ -0,0 +1,123 @@
+"""
+Background jobs for the long analyses in app.py. A State of the Art or Custom
+Question run (Neo4j fetch, chunked extraction, synthesis) takes minutes; run
+inside the Streamlit script, any widget interaction reruns the script and
+kills or duplicates it. Here each run gets its own thread and a Job object
+the UI polls: stage, per-chunk progress, notes, streamed text, and a cancel
+flag that the map/reduce helpers in genai.py check between chunks.
+
+Nothing in a job may call st.* — the thread has no script context. Jobs
+report through their Job, and app.py renders it.
+"""
+
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Callable
+
+from custom_logging import logger
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    """A failure whose message is meant for the user as-is (e.g. "run again
+    to resume"), rather than an exception type and repr."""
+
+
+# The job whose thread is currently running, so genai's map/reduce helpers
+# can report progress and honor cancellation without every analysis
+# function growing progress/cancel parameters.
+_current_job = ContextVar("current_job", default=None)
+
+
+def current_job():
+    return _current_job.get()
+
+
+class Job:
+    def __init__(self, kind: str, label: str):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.label = label
+        self.status = "running"  # running | done | failed | cancelled
+        self.stage = "Starting"
+        self.done = 0
+        self.total = 0
+        self.notes: list[str] = []
+        self.data: dict = {}
+        self.text = ""
+        self.result = None
+        self.error: str | None = None
+        self.started_at = time.time()
+        self.finished_at: float | None = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.status == "running"
+
+    @property
+    def progress(self) -> float:
+        return self.done / self.total if self.total else 0.0
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check(self) -> None:
+        """Raises JobCancelled once cancel() has been called. Long-running
+        job code calls this at safe points."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def set_stage(self, stage: str, total: int = 0, done: int = 0) -> None:
+        with self._lock:
+            self.stage, self.total, self.done = stage, total, done
+
+    def advance(self, n: int = 1) -> None:
+        with self._lock:
+            self.done += n
+
+    def note(self, message: str) -> None:
+        with self._lock:
+            self.notes.append(message)
+
+    def append_text(self, piece: str) -> None:
+        with self._lock:
+            self.text += piece
+
+
+def start_job(kind: str, label: str, fn: Callable[[Job], object]) -> Job:
+    """Runs fn(job) on a daemon thread and returns the job immediately.
+    fn's return value becomes job.result."""
+    job = Job(kind, label)
+
+    def run():
+        _current_job.set(job)
+        try:
+            job.result = fn(job)
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+            logger.info(f"Job {job.id} ({job.label}) cancelled at stage '{job.stage}'.")
+        except JobFailed as e:
+            logger.error(f"Job {job.id} ({job.label}) failed: {e} (caused by {e.__cause__!r})")
+            job.error = str(e)
+            job.status = "failed"
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.label}) failed")
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    threading.Thread(target=run, name=f"analysis-job-{job.id}", daemon=True).start()
+    return job
@@ -1,7 +1,7 @@
 import re
+import time
 import streamlit as st
 import pandas as pd
-import altair as alt
 from genai import (
     summarize_topic_evolution,
     extract_key_points_state_of_art,
@@ -9,11 +9,18 @@ from genai import (
     extract_relevant_info_for_question,
     synthesize_answer_from_extracts,
     run_chunked_extraction,
-    CHUNK_SIZE,
-    SLEEP_SECONDS,
+    plan_run,
+    estimate_paper_tokens,
+    compact_abstracts,
 )
 from custom_logging import logger
-from neo4j_operations import create_topic_subgraph, check_top_papers_from_last_3_years, get_year_wise_distribution, get_state_of_the_art_analysis, load_data_if_missing
+from analysis_jobs import start_job, JobFailed
+from run_planner import format_duration
+from relevance import filter_relevant, DEFAULT_TOP_K
+from paper_datasets import DatasetRegistry
+from paged_table import paged_table, dataframe_pages
+from google.api_core.exceptions import GoogleAPIError
+from neo4j_operations import create_topic_subgraph, check_top_papers_from_last_3_years, get_year_wise_distribution, get_state_of_the_art_analysis, load_data_if_missing, topic_version, get_top_papers_page, count_top_papers
 
 st.set_page_config(layout="wide")
 
@@ -29,16 +36,27 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-if "data_loaded" not in st.session_state:
-    logger.info("DONT HAVE muultiple streamlit windows loaded in browser!!!\n\n")
-    load_data_if_missing()
-    st.session_state.data_loaded = True
+# Cached process-wide (st.cache_resource): only the first session after a
+# server start runs the presence check, so new sessions and extra browser
+# windows start without any Neo4j round trip.
+load_data_if_missing()
 
 if "graph_name" not in st.session_state:
     st.session_state.graph_name = None
     st.session_state.topic = None
     st.session_state.topic_name = None
 
+if "jobs" not in st.session_state:
+    # job id -> analysis_jobs.Job; "<section>_job_id" keys point at each
+    # section's latest job.
+    st.session_state.jobs = {}
+
+if "datasets" not in st.session_state:
+    # The papers State of the Art and Custom Question analyze, fetched once
+    # per (topic, cutoff, size) and shared by both flows — see
+    # paper_datasets.py.
+    st.session_state.datasets = DatasetRegistry(get_state_of_the_art_analysis, topic_version)
+
 
 def _slugify_topic_name(text: str) -> str:
     """Derives a safe internal identifier from free-typed topic text. This is
@@ -63,6 +81,7 @@ with st.expander("🧭 Subgraph Generation Setup", expanded=not st.session_state
     if st.button("Build Subgraph & Compute PageRank"):
         graph_name = f"subgraph_{topic_name}"
         create_topic_subgraph(topic_input, topic_name, graph_name, True)
+        st.session_state.datasets.invalidate(topic_name)
         st.session_state.graph_name = graph_name
         st.session_state.topic = topic_input
         st.session_state.topic_name = topic_name
@@ -86,15 +105,121 @@ if st.session_state.graph_name:
     st.divider()
     st.markdown(f'<div class="section-header">📊 Exploring: {topic}</div>', unsafe_allow_html=True)
 
-    def _papers_to_analyze_selectbox(key: str) -> int:
+    # Telemetry-calibrated planner (run_planner.py); re-read at most once a
+    # minute rather than on every rerun.
+    @st.cache_data(ttl=60, show_spinner=False)
+    def _planner(flow: str, topic_name: str):
+        return plan_run(flow, topic_name)
+
+    def _papers_to_analyze_input(key: str, planner) -> int:
+        """Either a fixed size with its ETA, or the largest size whose ETA
+        fits a time budget."""
+        if st.toggle("Fit to a time budget", key=f"{key}_fit"):
+            minutes = st.slider("Time budget (minutes)", 1, 60, 10, key=f"{key}_budget_minutes")
+            return planner.recommend(minutes * 60)
         return st.selectbox(
             "How many top papers to analyze?",
             options=[500, 1000, 2000, 3500, 5000],
             index=2,
-            format_func=lambda n: f"{n} papers (~{max(0, n // CHUNK_SIZE - 1) * SLEEP_SECONDS}s+)",
+            format_func=lambda n: f"{n} papers (ETA ~{format_duration(planner.estimate(n).total_seconds)})",
             key=key,
         )
 
+    def _eta_caption(planner, n_papers: int, label: str = "papers") -> None:
+        estimate = planner.estimate(n_papers)
+        basis = (
+            f"calibrated from {planner.profile.samples} past extraction calls"
+            if planner.profile.samples else "default timings until there's telemetry for this flow"
+        )
+        bound = "rate-limit quota" if estimate.quota_bound else "model latency"
+        st.caption(
+            f"{n_papers} {label}: ETA ~{format_duration(estimate.total_seconds)} uncached "
+            f"({estimate.calls} extraction calls, bound by {bound}; {basis})."
+        )
+
+    datasets = st.session_state.datasets
+
+    def _fetch_papers(year_cutoff: int, size: int):
+        """The session's shared dataset for this topic, cutoff and size.
+        Fetched here on the script thread, before the job starts: the Neo4j
+        reads go through st.secrets and st.cache_resource, which need the
+        script context a job thread doesn't have."""
+        with st.spinner("Fetching papers from Neo4j..."):
+            return datasets.get(topic_name, year_cutoff, size)
+
+    def _dedupe_papers(dataset, job) -> pd.DataFrame:
+        """dataset's papers with near duplicates dropped (keeping the
+        higher-PageRank copy) before anything is sent to the LLM. Reports
+        what that saved."""
+        job.set_stage("Collapsing near-duplicate papers")
+        kept, dropped = dataset.deduped()
+        if len(dropped):
+            saved_tokens = int(estimate_paper_tokens(dropped).sum())
+            logger.info(f"Near-duplicate collapse saved {len(dropped)} rows, ~{saved_tokens} prompt tokens.")
+            job.note(f"Skipped {len(dropped)} near-duplicate papers (~{saved_tokens:,} prompt tokens saved).")
+        return kept
+
+    # Long analyses run as background jobs (analysis_jobs.py), so reruns from
+    # other widgets — including switching sections — neither kill nor repeat
+    # them. Job functions run off the script thread and must not call st.*
+    # (neo4j_operations included — fetch on the script thread and pass the
+    # data in); they report through the job, which the panels below render.
+    def _section_job(section_key: str):
+        return st.session_state.jobs.get(st.session_state.get(f"{section_key}_job_id"))
+
+    def _start_section_job(section_key: str, label: str, fn):
+        previous = _section_job(section_key)
+        if previous is not None:
+            previous.cancel()
+            del st.session_state.jobs[previous.id]
+        job = start_job(section_key, label, fn)
+        st.session_state.jobs[job.id] = job
+        st.session_state[f"{section_key}_job_id"] = job.id
+
+    def _render_job(job):
+        elapsed = (job.finished_at or time.time()) - job.started_at
+        st.caption(f"{job.label} · {job.status} · {elapsed:.0f}s")
+        for message in job.notes:
+            st.caption(message)
+        if "table" in job.data:
+            table = job.data["table"]
+            paged_table(
+                f"table_{job.id}", dataframe_pages(table),
+                sort_columns=[c for c in ("subgraphPageRank", "CitationCount", "year", "title") if c in table],
+                years=sorted(table["year"].dropna().unique().tolist()), hide_columns=("ID",),
+            )
+        if job.running:
+            progress_text = f"{job.stage} ({job.done}/{job.total})" if job.total else job.stage
+            st.progress(job.progress, text=progress_text)
+            st.button(
+                "Cancelling…" if job.cancelled else "Cancel", key=f"cancel_{job.id}",
+                on_click=job.cancel, disabled=job.cancelled,
+            )
+        if job.text:
+            st.markdown(job.data.get("heading", ""))
+            st.markdown(job.text)
+        if job.status == "failed":
+            st.error(job.error)
+        elif job.status == "cancelled":
+            st.warning("Cancelled. Chunks that finished are saved — run again to resume.")
+
+    @st.fragment(run_every=1)
+    def _live_job_panel(job_id: str):
+        job = st.session_state.jobs.get(job_id)
+        if job is None or not job.running:
+            # Full rerun: the panel is then drawn statically and stops polling.
+            st.rerun()
+        _render_job(job)
+
+    def _job_panel(section_key: str):
+        job = _section_job(section_key)
+        if job is None:
+            return
+        if job.running:
+            _live_job_panel(job.id)
+        else:
+            _render_job(job)
+
     # st.tabs() has no `key` param — it's a pure layout container with no
     # session_state binding, so which tab is "active" is tracked only by the
     # browser's local component state, not Python. That state can reset to
@@ -117,50 +242,116 @@ if st.session_state.graph_name:
         key="active_section",
         label_visibility="collapsed",
     )
+    running = [job.label for job in st.session_state.jobs.values() if job.running]
+    if running:
+        st.caption("Running in the background: " + "; ".join(running))
 
     # --- Section: State of the Art ---
     if active_section == "State of the Art":
         st.subheader("State of the Art")
         year_cutoff = st.number_input("After Year", 1900, 2100, 2022, key="sota_year_cutoff")
-        papers_to_analyze = _papers_to_analyze_selectbox("sota_papers_to_analyze")
+        sota_planner = _planner("state_of_the_art", topic_name)
+        papers_to_analyze = _papers_to_analyze_input("sota_papers_to_analyze", sota_planner)
+        _eta_caption(sota_planner, papers_to_analyze)
+        use_cache = not st.checkbox("Bypass cached LLM responses", key="sota_bypass_cache")
+        compact = st.checkbox(
+            "Compact mode (send TLDRs instead of full abstracts)", key="sota_compact",
+            help="Fits several times more papers per LLM call, at the cost of detail.",
+        )
 
-        if st.button("Generate State of the Art Summary"):
-            main_df = pd.DataFrame(
-                get_state_of_the_art_analysis(year_cutoff, topic_name, top_papers_each_year=papers_to_analyze)
-            )
-            st.dataframe(main_df.iloc[0:100].drop(columns=["ID", "Abstract"]), use_container_width=True)
+        sota_job = _section_job("sota")
+        if st.button("Generate State of the Art Summary", disabled=sota_job is not None and sota_job.running):
+            sota_papers = _fetch_papers(year_cutoff, papers_to_analyze)
 
-            results = run_chunked_extraction(
-                main_df,
-                lambda chunk: extract_key_points_state_of_art(chunk, year_cutoff, topic_name),
-            )
-            final_output = synthesize_state_of_art(results, topic_name, year_cutoff)
-            st.markdown("### Final Summary")
-            st.markdown(final_output, unsafe_allow_html=True)
+            def run_sota(job):
+                main_df = _dedupe_papers(sota_papers, job)
+                job.data["table"] = main_df.drop(columns=["Abstract", "TLDR"])
+
+                job.check()
+                job.set_stage("Extracting key points")
+                try:
+                    results = extract_key_points_state_of_art(main_df, year_cutoff, topic_name, use_cache=use_cache, compact=compact)
+                    job.set_stage("Synthesizing summary")
+                    job.data["heading"] = "### Final Summary"
+                    # Streamed, so the summary starts rendering with the
+                    # model's first tokens instead of after the whole call.
+                    for piece in synthesize_state_of_art(results, topic_name, year_cutoff, use_cache=use_cache, stream=True):
+                        job.check()
+                        job.append_text(piece)
+                except GoogleAPIError as e:
+                    raise JobFailed(
+                        f"The model API kept failing ({type(e).__name__}). Papers already extracted are saved — run again to resume."
+                    ) from e
+                return job.text
+
+            _start_section_job("sota", f"State of the Art for {topic} after {year_cutoff}", run_sota)
+        _job_panel("sota")
 
     # --- Section: Custom Question ---
     elif active_section == "Custom Question":
         st.subheader("Custom Question")
         year_cutoff_q = st.number_input("After Year", 1900, 2100, 2022, key="question_year_cutoff")
         user_question = st.text_input("Ask a question about this topic:")
-        papers_to_analyze_q = _papers_to_analyze_selectbox("question_papers_to_analyze")
+        question_planner = _planner("custom_question", topic_name)
+        papers_to_analyze_q = _papers_to_analyze_input("question_papers_to_analyze", question_planner)
+        relevant_top_k = st.number_input(
+            "Of those, send at most this many question-relevant papers to the LLM",
+            min_value=10, max_value=5000, value=DEFAULT_TOP_K, step=50, key="question_relevant_top_k",
+        )
+        _eta_caption(question_planner, min(papers_to_analyze_q, relevant_top_k), "papers sent to the LLM")
+        use_cache_q = not st.checkbox("Bypass cached LLM responses", key="question_bypass_cache")
+        compact_q = st.checkbox(
+            "Compact mode (send TLDRs instead of full abstracts)", key="question_compact",
+            help="Fits several times more papers per LLM call, at the cost of detail.",
+        )
 
-        if st.button("Answer Question"):
+        question_job = _section_job("question")
+        if st.button("Answer Question", disabled=question_job is not None and question_job.running):
             if not user_question.strip():
                 st.warning("Type a question above first.")
             else:
-                main_df = pd.DataFrame(
-                    get_state_of_the_art_analysis(year_cutoff_q, topic_name, top_papers_each_year=papers_to_analyze_q)
-                )
-                st.dataframe(main_df.iloc[0:100].drop(columns=["ID", "Abstract"]), use_container_width=True)
+                question_papers = _fetch_papers(year_cutoff_q, papers_to_analyze_q)
 
-                results = run_chunked_extraction(
-                    main_df,
-                    lambda chunk: extract_relevant_info_for_question(user_question, chunk, year_cutoff_q, topic_name),
-                )
-                final_output = synthesize_answer_from_extracts(results, user_question, topic_name, year_cutoff_q)
-                st.markdown("### Final Answer")
-                st.markdown(final_output, unsafe_allow_html=True)
+                def run_question(job):
+                    main_df = _dedupe_papers(question_papers, job)
+                    # Keyword pre-filter (BM25 blended with PageRank) so
+                    # extraction only pays for papers that plausibly bear on
+                    # the question.
+                    n_fetched = len(main_df)
+                    main_df = filter_relevant(main_df, user_question, top_k=relevant_top_k)
+                    job.note(f"{len(main_df)} of {n_fetched} papers kept as relevant to the question.")
+                    job.data["table"] = main_df.drop(columns=["Abstract", "TLDR"])
+                    if compact_q:
+                        main_df = compact_abstracts(main_df)
+
+                    job.check()
+                    job.set_stage("Extracting relevant information")
+                    try:
+                        results = run_chunked_extraction(
+                            main_df,
+                            lambda chunk: extract_relevant_info_for_question(user_question, chunk, year_cutoff_q, topic_name, use_cache=use_cache_q),
+                            # Bypass runs checkpoint separately, so they never
+                            # resume from chunks a cached run extracted.
+                            checkpoint=(
+                                f"question/{topic_name}/{year_cutoff_q}/{'compact' if compact_q else 'full'}/"
+                                f"{'cached' if use_cache_q else 'bypass'}/{user_question}"
+                            ),
+                        )
+                        job.set_stage("Synthesizing answer")
+                        job.data["heading"] = "### Final Answer"
+                        for piece in synthesize_answer_from_extracts(
+                            results, user_question, topic_name, year_cutoff_q, use_cache=use_cache_q, stream=True
+                        ):
+                            job.check()
+                            job.append_text(piece)
+                    except GoogleAPIError as e:
+                        raise JobFailed(
+                            f"The model API kept failing ({type(e).__name__}). Completed chunks are saved — run again to resume."
+                        ) from e
+                    return job.text
+
+                _start_section_job("question", f"Question \"{user_question.strip()}\"", run_question)
+        _job_panel("question")
 
     # --- Section: Top Papers from Last N Years ---
     elif active_section == "Top Papers":
@@ -175,17 +366,54 @@ if st.session_state.graph_name:
             ) == "Yes"
 
         if st.button("Show Top Papers"):
-            df = pd.DataFrame(check_top_papers_from_last_3_years(topic_name, no_of_papers=papers_per_year, from_year=from_year))
-            df_modified = df.drop(columns=["ID", "Abstract"])
-            st.dataframe(df_modified, use_container_width=True)
-            if show_evolution:
+            st.session_state.top_papers = {
+                "topic_name": topic_name, "papers_per_year": papers_per_year, "from_year": from_year,
+                "want_summary": show_evolution, "summary": None,
+            }
+
+        # Rendered from session state rather than inside the button branch,
+        # so paging the table keeps both it and the summary. Pages are
+        # sorted, filtered and cut in Cypher — only the visible rows are
+        # fetched.
+        shown = st.session_state.get("top_papers")
+        if shown and shown["topic_name"] == topic_name:
+            # Papers with no year come back as a None bucket (on topics built
+            # before stats existed); they're never in a top-per-year table.
+            years = [y for y in get_year_wise_distribution(topic_name)["year"] if y is not None and y >= shown["from_year"]]
+
+            def top_papers_page(sort_by, descending, year, skip, limit):
+                rows = pd.DataFrame(get_top_papers_page(
+                    topic_name, no_of_papers=shown["papers_per_year"], from_year=shown["from_year"],
+                    sort_by=sort_by, descending=descending, year=year, skip=skip, limit=limit,
+                ))
+                total = count_top_papers(topic_name, no_of_papers=shown["papers_per_year"], from_year=shown["from_year"], year=year)
+                return rows, total
+
+            st.markdown(f"#### Top {shown['papers_per_year']} papers per year since {shown['from_year']}")
+            paged_table(
+                "top_papers_table", top_papers_page,
+                sort_columns=["pageRank", "CitationCount", "year", "title"], years=years, hide_columns=("ID",),
+            )
+
+            if shown["want_summary"]:
                 st.markdown("#### Topic Evolution Summary")
-                st.markdown(summarize_topic_evolution(df, topic_name), unsafe_allow_html=True)
+                if shown["summary"] is None:
+                    # The summary needs every top paper's abstract, not just
+                    # the visible page, so it fetches the full set with
+                    # abstracts in one query.
+                    df = pd.DataFrame(check_top_papers_from_last_3_years(
+                        topic_name, no_of_papers=shown["papers_per_year"], from_year=shown["from_year"], fields="abstract"
+                    ))
+                    shown["summary"] = st.write_stream(summarize_topic_evolution(df, topic_name, stream=True))
+                else:
+                    st.markdown(shown["summary"])
 
     # --- Section: Year-wise Distribution ---
     elif active_section == "Year Distribution":
         st.subheader("Year-wise Distribution")
         if st.button("Show Year-wise Distribution"):
+            import altair as alt  # ~0.25s, and only this section uses it
+
             df = pd.DataFrame(get_year_wise_distribution(topic_name))
             # st.bar_chart's default axis config left label rotation up to
             # Vega-Lite's automatic overlap resolution — explicit Altair
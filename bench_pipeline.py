@@ -0,0 +1,95 @@
+"""
+End-to-end throughput benchmark of the Custom Question pipeline — chunked
+extraction, tree reduce and final synthesis — against the offline
+FakeBackend, so changes to chunking, concurrency or retry behaviour can be
+measured without a Gemini key or quota.
+
+    python bench_pipeline.py --papers 2000 --latency 0.5 --throttle-rate 0.05
+
+Quota and concurrency come from the usual LLM_* settings unless overridden
+by flags. The response cache is disabled so every run does the full work.
+"""
+
+import argparse
+import os
+import random
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=2000)
+    parser.add_argument("--abstract-words", type=int, default=180, help="mean abstract length")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake per-call latency in seconds")
+    parser.add_argument("--output-tokens", type=int, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of calls answered with a 429")
+    parser.add_argument("--concurrency", type=int, help="overrides LLM_MAX_CONCURRENT_REQUESTS")
+    parser.add_argument("--rpm", type=float, default=1000, help="overrides LLM_REQUESTS_PER_MINUTE")
+    parser.add_argument("--chunk-budget", type=int, help="overrides LLM_CHUNK_TOKEN_BUDGET")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def synthetic_papers(n, abstract_words, seed):
+    import pandas as pd
+
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    rows = []
+    for i in range(n):
+        words = max(20, int(rng.gauss(abstract_words, abstract_words / 3)))
+        rows.append({
+            "ID": f"bench-{i}",
+            "title": " ".join(rng.choices(vocab, k=8)),
+            "Abstract": " ".join(rng.choices(vocab, k=words)),
+            "year": rng.randint(2022, 2025),
+            "subgraphPageRank": 1.0 / (i + 1),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    args = parse_args()
+    # Configure before genai is imported — it reads these at import time.
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    os.environ["LLM_FAKE_LATENCY_SECONDS"] = str(args.latency)
+    os.environ["LLM_FAKE_OUTPUT_TOKENS"] = str(args.output_tokens)
+    os.environ["LLM_FAKE_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["LLM_FAKE_429_RATE"] = str(args.throttle_rate)
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.rpm)
+    if args.concurrency:
+        os.environ["LLM_MAX_CONCURRENT_REQUESTS"] = str(args.concurrency)
+    if args.chunk_budget:
+        os.environ["LLM_CHUNK_TOKEN_BUDGET"] = str(args.chunk_budget)
+
+    import genai
+
+    df = synthetic_papers(args.papers, args.abstract_words, args.seed)
+    question = "How do these methods compare?"
+
+    start = time.perf_counter()
+    extracts = genai.run_chunked_extraction(
+        df, lambda chunk: genai.extract_relevant_info_for_question(question, chunk, 2021, "bench", use_cache=False)
+    )
+    extracted_at = time.perf_counter()
+    genai.synthesize_answer_from_extracts(extracts, question, "bench", 2021, use_cache=False)
+    done_at = time.perf_counter()
+
+    backend = genai.backend
+    total = done_at - start
+    print(f"papers:            {len(df)}")
+    print(f"chunks:            {len(extracts)}")
+    print(f"model calls:       {backend.calls}")
+    print(f"input tokens:      {backend.usage.prompt_tokens}")
+    print(f"output tokens:     {backend.usage.output_tokens}")
+    print(f"extraction time:   {extracted_at - start:.2f}s")
+    print(f"synthesis time:    {done_at - extracted_at:.2f}s")
+    print(f"total time:        {total:.2f}s")
+    print(f"throughput:        {len(df) / total:.1f} papers/s, {backend.usage.prompt_tokens / total:.0f} input tokens/s")
+    print(f"final concurrency: {genai.llm_client.concurrency.limit:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark: prompt assembly with prompt_assembly.py vs the iterrows()
+loops it replaced, over synthetic frames shaped like a State of the Art
+fetch. Also checks both produce identical text.
+
+    python bench_prompt_assembly.py --rows 5000
+"""
+
+import argparse
+import random
+import timeit
+
+import pandas as pd
+
+from prompt_assembly import join_papers, yearly_sections
+
+
+def synthetic_papers(n, seed=0):
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(5000)]
+    return pd.DataFrame({
+        "ID": [f"paper-{i}" for i in range(n)],
+        "title": [" ".join(rng.choices(vocab, k=8)) for _ in range(n)],
+        "Abstract": [" ".join(rng.choices(vocab, k=rng.randint(80, 300))) for _ in range(n)],
+        "year": [rng.randint(2018, 2025) for _ in range(n)],
+    })
+
+
+def join_papers_iterrows(df, with_id=False):
+    if with_id:
+        return "\n\n".join(
+            f"ID: {row['ID']}\nTitle: {row['title']}\nAbstract: {row['Abstract']}" for _, row in df.iterrows()
+        )
+    return "\n\n".join(f"Title: {row['title']}\nAbstract: {row['Abstract']}" for _, row in df.iterrows())
+
+
+def yearly_sections_iterrows(df):
+    yearly_chunks = []
+    for year in sorted(df["year"].unique()):
+        papers = df[df["year"] == year]
+        abstracts = "\n\n".join(f"Title: {row['title']}\nAbstract: {row['Abstract']}" for _, row in papers.iterrows())
+        yearly_chunks.append(f"--- Year: {year} ---\n{abstracts}")
+    return "\n".join(yearly_chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = synthetic_papers(args.rows)
+    cases = [
+        ("papers", lambda: join_papers_iterrows(df), lambda: join_papers(df)),
+        ("papers with ids", lambda: join_papers_iterrows(df, True), lambda: join_papers(df, True)),
+        ("yearly sections", lambda: yearly_sections_iterrows(df), lambda: yearly_sections(df)),
+    ]
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, old, new in cases:
+        assert old() == new(), f"{name}: outputs differ"
+        old_s = min(timeit.repeat(old, number=1, repeat=args.repeat))
+        new_s = min(timeit.repeat(new, number=1, repeat=args.repeat))
+        print(f"{name:<16} iterrows {old_s * 1000:8.1f} ms   vectorized {new_s * 1000:8.1f} ms   {old_s / new_s:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Cold-start benchmark for both entry points. Every measurement runs in a fresh
+interpreter, so module caches and .pyc warmness are as for a new process —
+which is what an MCP client pays, since it spawns the server per session.
+
+- app: import time of the modules app.py pulls in, and first-request cost
+  of what's initialized lazily (the Gemini SDK/model, the Neo4j driver
+  object) plus a first model call through the fake backend;
+- mcp: import time of mcp_server, and time from spawning `python
+  mcp_server.py` to its initialize and tools/list responses over stdio.
+
+No Neo4j or Gemini connection is made: driver objects connect lazily, and
+the model call goes to the fake backend. Nor is any setup needed — each
+subprocess gets placeholder Gemini/Neo4j settings in its environment (real
+ones already set take precedence), and st.secrets is stubbed where the
+Neo4j driver reads it.
+
+    python bench_startup.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Only read, never used to connect — see the module docstring.
+PLACEHOLDER_ENV = {
+    "GOOGLE_API_KEY": "unused",
+    "GOOGLE_API_MODEL": "gemini-2.5-pro",
+    "NEO4J_URI": "bolt://localhost:7687",
+    "NEO4J_USER": "neo4j",
+    "NEO4J_PASSWORD": "unused",
+}
+BENCH_ENV = {**PLACEHOLDER_ENV, **os.environ}
+
+# Each snippet prints the seconds it measured.
+SNIPPETS = {
+    "app: import app modules": """
+import time; start = time.perf_counter()
+import streamlit, pandas, genai, neo4j_operations, relevance, dedup, analysis_jobs, run_planner
+print(time.perf_counter() - start)
+""",
+    "app: first Gemini request setup (SDK import + configure)": """
+import os, time
+os.environ.update(LLM_BACKEND="gemini")
+import genai
+start = time.perf_counter()
+genai.backend.model
+print(time.perf_counter() - start)
+""",
+    "app: Neo4j driver creation": """
+import os, time
+import streamlit as st
+import neo4j_operations
+# Stands in for .streamlit/secrets.toml; neo4j_operations reads st.secrets
+# when the driver is created.
+st.secrets = {"neo4j": {"uri": os.environ["NEO4J_URI"], "user": os.environ["NEO4J_USER"],
+                        "password": os.environ["NEO4J_PASSWORD"]}}
+start = time.perf_counter()
+neo4j_operations._driver()
+print(time.perf_counter() - start)
+""",
+    "app: first model call (fake backend, no latency)": """
+import os, time
+os.environ.update(LLM_BACKEND="fake", LLM_FAKE_LATENCY_SECONDS="0", LLM_FAKE_TOKENS_PER_SECOND="1e9",
+                  LLM_CACHE_ENABLED="false", LLM_TELEMETRY_ENABLED="false")
+start = time.perf_counter()
+import genai
+genai._generate("Say hello.", "for the startup benchmark", use_cache=False)
+print(time.perf_counter() - start)
+""",
+    "mcp: import mcp_server": """
+import time; start = time.perf_counter()
+import mcp_server
+print(time.perf_counter() - start)
+""",
+}
+
+
+def run_snippet(code: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code], cwd=HERE, env=BENCH_ENV, capture_output=True, text=True, check=True
+    ).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def mcp_handshake() -> tuple[float, float]:
+    """Seconds from spawn to the initialize response, and to the tools/list
+    response, speaking newline-delimited JSON-RPC like an MCP client."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "mcp_server.py"], cwd=HERE, env=BENCH_ENV,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+
+    def send(message):
+        proc.stdin.write(json.dumps(message) + "\n")
+        proc.stdin.flush()
+
+    def response(request_id):
+        for line in proc.stdout:
+            if json.loads(line).get("id") == request_id:
+                return time.perf_counter() - start
+        raise RuntimeError("mcp_server exited before responding")
+
+    try:
+        send({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2024-11-05", "capabilities": {},
+            "clientInfo": {"name": "bench_startup", "version": "0"},
+        }})
+        initialized = response(1)
+        send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        tools_listed = response(2)
+    finally:
+        proc.kill()
+        proc.wait()
+    return initialized, tools_listed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-mcp", action="store_true", help="skip the MCP server measurements")
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SNIPPETS.items():
+        if args.skip_mcp and name.startswith("mcp"):
+            continue
+        results[name] = [run_snippet(code) for _ in range(args.repeat)]
+    if not args.skip_mcp:
+        handshakes = [mcp_handshake() for _ in range(args.repeat)]
+        results["mcp: spawn -> initialize response"] = [h[0] for h in handshakes]
+        results["mcp: spawn -> tools/list response"] = [h[1] for h in handshakes]
+
+    print(f"median of {args.repeat} cold runs")
+    width = max(map(len, results))
+    for name, seconds in results.items():
+        print(f"{name:<{width}}  {statistics.median(seconds) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,7 @@ struct VertexProperties {
     int centrality;
     int year;
     string abstract;
+    string tldr; // Semantic Scholar TLDR, empty when unavailable
 };
 
 // Define the graph type
@@ -48,6 +49,7 @@ struct PaperInfo {
     int year;
     int citationCount;
     string abstract; // Added abstract field
+    string tldr;
 };
 
 // Global variables
@@ -135,11 +137,13 @@ void load_paper_info(const string& csv_filename) {
         string citationCount = fields[4];
         string abstract_old = fields[5];
         string abstract = ReplaceAll(abstract_old, std::string("\n"), std::string(" "));
+        // tldr is an optional trailing column; older CSVs don't have it
+        string tldr = fields.size() > 6 ? ReplaceAll(fields[6], std::string("\n"), std::string(" ")) : "";
 
         try {
             int yearInt = stoi(year);
             int citationCountInt = stoi(citationCount);
-            PaperInfo info = {title, url, paperId, yearInt, citationCountInt, abstract};
+            PaperInfo info = {title, url, paperId, yearInt, citationCountInt, abstract, tldr};
             paper_info_map[paperId] = info;
 
             // Add node to graph
@@ -151,6 +155,7 @@ void load_paper_info(const string& csv_filename) {
             g[v].centrality = citationCountInt;
             g[v].year = yearInt;
             g[v].abstract = abstract; // Store abstract in vertex properties
+            g[v].tldr = tldr;
             csv_lines_processed++;
         } catch (const std::invalid_argument& e) {
             cerr << "Invalid argument: " << e.what() << " in line: " << line << endl;
@@ -225,6 +230,7 @@ void parse_jsonl_file(const string& filename) {
             g[v].centrality = cited_paper_citations;
             g[v].year = cited_paper_year;
             g[v].abstract = cited_paper_abstract; 
+            g[v].tldr = ""; // references aren't fetched with tldr
             g[v].id = cited_paper_id; 
         }
         if (node_map.find(citing_paper_id) == node_map.end()) {
@@ -236,6 +242,7 @@ void parse_jsonl_file(const string& filename) {
             g[v].centrality = 0;
             g[v].year = 0;
             g[v].abstract = "";
+            g[v].tldr = "";
             g[v].id = citing_paper_id;
             citing_nodes_created++;
         }
@@ -414,7 +421,8 @@ void store_all_data(const Graph& g, sqlite3* db, const std::unordered_map<string
             citationCount INTEGER,
             url TEXT,
             pageRank REAL,
-            abstract TEXT
+            abstract TEXT,
+            tldr TEXT
         );
         CREATE TABLE IF NOT EXISTS PaperEdges (
             source_id TEXT,
@@ -439,8 +447,8 @@ void store_all_data(const Graph& g, sqlite3* db, const std::unordered_map<string
     // Store nodes with PageRank and abstract
     sqlite3_stmt* node_stmt;
     const char* insert_node_sql = 
-        "INSERT OR REPLACE INTO Nodes (id, label, year, citationCount, url, pageRank, abstract) "
-        "VALUES (?, ?, ?, ?, ?, ?, ?);";
+        "INSERT OR REPLACE INTO Nodes (id, label, year, citationCount, url, pageRank, abstract, tldr) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?);";
     sqlite3_prepare_v2(db, insert_node_sql, -1, &node_stmt, 0);
 
     graph_traits<Graph>::vertex_iterator vi, vi_end;
@@ -457,6 +465,7 @@ void store_all_data(const Graph& g, sqlite3* db, const std::unordered_map<string
         sqlite3_bind_double(node_stmt, 6, pageRankValue);
 
         sqlite3_bind_text(node_stmt, 7, g[*vi].abstract.c_str(), -1, SQLITE_STATIC);
+        sqlite3_bind_text(node_stmt, 8, g[*vi].tldr.c_str(), -1, SQLITE_STATIC);
         
         sqlite3_step(node_stmt);
         sqlite3_reset(node_stmt);
@@ -493,7 +502,7 @@ void export_graph_to_csv(const Graph& g, const std::unordered_map<string, double
                         const string& edges_csv_path = "data/citation_edges.csv") {
     // Write Nodes CSV
     ofstream nodes_csv(nodes_csv_path);
-    nodes_csv << "id,label,year,citationCount,url,pageRank,abstract\n";
+    nodes_csv << "id,label,year,citationCount,url,pageRank,abstract,tldr\n";
     graph_traits<Graph>::vertex_iterator vi, vi_end;
     for (tie(vi, vi_end) = vertices(g); vi != vi_end; ++vi) {
         string id = g[*vi].id;
@@ -505,13 +514,16 @@ void export_graph_to_csv(const Graph& g, const std::unordered_map<string, double
         auto pageRankIt = pageRanks.find(to_string(*vi));
         if (pageRankIt != pageRanks.end()) pageRankValue = pageRankIt->second;
         string abstract_str = g[*vi].abstract;
+        string tldr_str = g[*vi].tldr;
         // Escape quotes for CSV
         std::replace(label.begin(), label.end(), '"', '\'');
         std::replace(abstract_str.begin(), abstract_str.end(), '"', '\'');
+        std::replace(tldr_str.begin(), tldr_str.end(), '"', '\'');
 
         std::replace(label.begin(), label.end(), '\\', '/');
         std::replace(abstract_str.begin(), abstract_str.end(), '\\', '/');
-        nodes_csv << '"' << id << "\",\"" << label << "\"," << year << "," << citationCount << ",\"" << url << "\"," << pageRankValue << ",\"" << abstract_str << "\"\n";
+        std::replace(tldr_str.begin(), tldr_str.end(), '\\', '/');
+        nodes_csv << '"' << id << "\",\"" << label << "\"," << year << "," << citationCount << ",\"" << url << "\"," << pageRankValue << ",\"" << abstract_str << "\",\"" << tldr_str << "\"\n";
     }
     nodes_csv.close();
 
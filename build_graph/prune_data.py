@@ -124,7 +124,10 @@ arxiv_df = arxiv_df[arxiv_df['paperId'].astype(str).isin(shortlisted_ids)]
 arxiv_df.to_csv(output_csv, index=False)
 print(f"Saved shortlisted CSV to {output_csv}")
 
-df_for_c_code = arxiv_df[['paperId', 'url', 'title', 'year', 'citationCount', 'abstract']]
+df_for_c_code = arxiv_df[['paperId', 'url', 'title', 'year', 'citationCount', 'abstract', 'tldr']].copy()
+# The fetch step writes a placeholder when Semantic Scholar has no tldr; carry
+# those through as empty so they never end up as a Paper property.
+df_for_c_code['tldr'] = df_for_c_code['tldr'].fillna('').replace('No TLDR available', '')
 # df_for_c_code['title'] = df_for_c_code['title'].str.replace('\n', '')
 df_for_c_code.to_csv(output_csv_for_c_code, index=False)
 
@@ -0,0 +1,70 @@
+"""
+Checkpoints for chunked map steps. Each chunk's result is saved as soon as
+it completes, under a caller-chosen run key and a fingerprint of the chunk's
+paper ids, so a run that dies partway (a 429 that outlasted its retries, a
+closed tab) resumes from the chunks already done instead of starting over.
+A run's checkpoints are cleared once it completes.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Leftovers from runs that were never retried are dropped after this long.
+CHECKPOINT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def chunk_fingerprint(paper_ids) -> str:
+    return hashlib.sha256("\0".join(str(pid) for pid in paper_ids).encode("utf-8")).hexdigest()
+
+
+class ChunkCheckpoints:
+    """SQLite-backed; each public call opens its own connection, so one
+    instance can be shared across the extraction threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunk_checkpoints (
+                    run_key TEXT NOT NULL,
+                    chunk_key TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (run_key, chunk_key)
+                )
+            """)
+            conn.execute("DELETE FROM chunk_checkpoints WHERE created_at < ?", (time.time() - CHECKPOINT_TTL_SECONDS,))
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection per operation, committed on success."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, run_key: str) -> dict:
+        """Returns {chunk_key: result} for the run's completed chunks."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT chunk_key, result FROM chunk_checkpoints WHERE run_key = ?", (run_key,)
+            ).fetchall()
+        return {chunk_key: json.loads(result) for chunk_key, result in rows}
+
+    def put(self, run_key: str, chunk_key: str, result) -> None:
+        """result must be JSON-serializable."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chunk_checkpoints VALUES (?, ?, ?, ?)",
+                (run_key, chunk_key, json.dumps(result), time.time()),
+            )
+
+    def clear(self, run_key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM chunk_checkpoints WHERE run_key = ?", (run_key,))
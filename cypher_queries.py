@@ -0,0 +1,602 @@
+"""
+Cypher text and pure helpers for the MCP server's neo4j_operations_async.py,
+kept apart from the driver calls so they can be tested without a database.
+The Streamlit app's neo4j_operations.py uses the topic stats queries and the
+abstract projection from here too. Nothing here touches a driver.
+"""
+
+
+# Projections accepted by the paper read functions' `fields` argument.
+# Abstracts are by far the largest property moved over Bolt, so views that
+# only display metadata shouldn't fetch them. The MCP server only ever prints
+# the first ABSTRACT_PREVIEW_CHARS of an abstract, so it asks for "truncated".
+PAPER_FIELDS = ("metadata", "abstract", "truncated")
+ABSTRACT_PREVIEW_CHARS = 300
+
+
+def abstract_projection(var, fields, alias="abstract"):
+    """RETURN-clause fragment for the abstract under the given projection.
+    "truncated" cuts server-side to one char past ABSTRACT_PREVIEW_CHARS, so
+    callers can still tell a cut abstract from one exactly that long."""
+    if fields == "metadata":
+        return ""
+    if fields == "abstract":
+        return f", {var}.abstract AS {alias}"
+    if fields == "truncated":
+        return f", left({var}.abstract, {ABSTRACT_PREVIEW_CHARS + 1}) AS {alias}"
+    raise ValueError(f"Unknown fields projection '{fields}', expected one of {PAPER_FIELDS}")
+
+
+# --- Data loading ---
+
+# Existence checks (LIMIT 1), not full counts — see neo4j_operations.py's
+# check_data_presence for why (~2.3s -> ~0.3s measured on the real VM).
+HAS_NODE_QUERY = "MATCH (n:Paper) RETURN n LIMIT 1"
+HAS_EDGE_QUERY = "MATCH (:Paper)-[r:CITES]->(:Paper) RETURN r LIMIT 1"
+
+LOAD_NODES_QUERY = """
+UNWIND $rows AS row
+CREATE (:Paper {
+    id: row.id,
+    label: row.label,
+    year: toInteger(row.year),
+    citationCount: toInteger(row.citationCount),
+    url: row.url,
+    pageRank: toFloat(row.pageRank),
+    abstract: row.abstract,
+    // Empty (or, in older CSVs, missing) tldr leaves the property unset
+    tldr: CASE WHEN row.tldr <> '' THEN row.tldr END
+})
+"""
+
+LOAD_EDGES_QUERY = """
+UNWIND $rows AS row
+MATCH (source:Paper {id: row.source_id})
+MATCH (target:Paper {id: row.target_id})
+CREATE (source)-[:CITES]->(target)
+"""
+
+CREATE_PAPER_ID_INDEX_QUERY = "CREATE INDEX paper_id_index IF NOT EXISTS FOR (p:Paper) ON (p.id);"
+
+REMOVE_DUPLICATE_NODES_QUERY = """
+MATCH (p:Paper)
+WITH p.id AS pid, p
+ORDER BY id(p)
+WITH pid, collect(p) AS nodes
+WHERE size(nodes) > 1
+UNWIND nodes[1..] AS toDelete
+CALL { WITH toDelete DETACH DELETE toDelete } IN TRANSACTIONS OF 100 ROWS
+"""
+
+REMOVE_DUPLICATE_EDGES_QUERY = """
+MATCH (a:Paper)-[r:CITES]->(b:Paper)
+WITH a, b, collect(r) AS rels
+WHERE size(rels) > 1
+UNWIND rels[1..] AS redundant
+CALL { WITH redundant DELETE redundant } IN TRANSACTIONS OF 100 ROWS
+"""
+
+
+# --- Topic subgraphs ---
+
+FULLTEXT_INDEX_CHECK_QUERY = 'SHOW FULLTEXT INDEXES WHERE name = "paperAbstractIndex"'
+CREATE_FULLTEXT_INDEX_QUERY = "CREATE FULLTEXT INDEX paperAbstractIndex FOR (p:Paper) ON EACH [p.label, p.abstract];"
+# CREATE FULLTEXT INDEX only kicks off background population — querying it
+# immediately (gds.graph.project.cypher does, via db.index.fulltext.queryNodes)
+# can fail with "Expected index to come online within a reasonable time" over
+# ~1.1M nodes. Block until ready.
+AWAIT_FULLTEXT_INDEX_QUERY = "CALL db.awaitIndex('paperAbstractIndex', 300)"
+
+
+def graph_exists_query(graph_name):
+    return f'CALL gds.graph.exists("{graph_name}") YIELD exists RETURN exists'
+
+
+def graph_drop_query(graph_name):
+    return f"CALL gds.graph.drop('{graph_name}');"
+
+
+def remove_topic_properties_query(topic_name):
+    return f"MATCH (n) REMOVE n.{topic_name}, n.pageRank_{topic_name};"
+
+
+def lucene_topic_query(topic):
+    """Comma-separated topic phrases -> quoted, OR'd Lucene query (plus
+    lowercase variants), escaped for embedding in the projection string."""
+    topic_terms = [i.strip() for i in topic.split(",")]
+    topic_terms.extend([i.lower() for i in topic_terms])
+    lucene_query = '" OR "'.join(topic_terms)
+    lucene_query = f'"{lucene_query}"'
+    return lucene_query.replace('"', '\\"')
+
+
+def project_subgraph_query(graph_name, topic, validate_relationships):
+    lucene_query = lucene_topic_query(topic)
+    return f'''
+    CALL gds.graph.project.cypher(
+      "{graph_name}",
+      "
+        CALL db.index.fulltext.queryNodes('paperAbstractIndex', \\'{lucene_query}\\')
+        YIELD node RETURN id(node) AS id
+      ",
+      "
+        CALL db.index.fulltext.queryNodes('paperAbstractIndex', \\'{lucene_query}\\')
+        YIELD node AS a
+        WITH collect(id(a)) AS ids
+        MATCH (x:Paper)-[:CITES]->(y:Paper)
+        WHERE id(x) IN ids AND id(y) IN ids
+        RETURN id(x) AS source, id(y) AS target
+      ",
+      {{ validateRelationships: {str(validate_relationships).lower()} }}
+    )
+    '''
+
+
+def pagerank_write_query(graph_name, topic_name):
+    return f'CALL gds.pageRank.write("{graph_name}", {{ writeProperty: "pageRank_{topic_name}" }});'
+
+
+def topic_paper_count_query(topic_name):
+    return f"MATCH (p:Paper) WHERE p.pageRank_{topic_name} IS NOT NULL RETURN count(p) AS count"
+
+
+# --- Materialized topic stats ---
+#
+# create_topic_subgraph aggregates each topic once, right after writing its
+# PageRank, onto a (:TopicStats {topic}) node: paper and edge counts, the
+# year histogram, PageRank quantiles, and the ids of the top TOPIC_STATS_TOP_K
+# papers per year. Reads that used to scan every Paper for
+# pageRank_<topic> IS NOT NULL on each call are served from it with one
+# indexed lookup, falling back to the live query for topics built before
+# stats existed. Properties can't nest, so the per-year top ids are stored
+# flattened: topIds in (year, rank) order, with topIdYears alongside.
+
+TOPIC_STATS_TOP_K = 50
+
+TOPIC_STATS_CONSTRAINT_QUERY = (
+    "CREATE CONSTRAINT topic_stats_topic IF NOT EXISTS FOR (s:TopicStats) REQUIRE s.topic IS UNIQUE"
+)
+
+# Run at the start of every build, so the previous build's stats never
+# outlive it — even when the build fails before writing new ones.
+DELETE_TOPIC_STATS_QUERY = "MATCH (s:TopicStats {topic: $topic}) DETACH DELETE s"
+
+
+def write_topic_stats_query(topic_name):
+    """One pass over the topic's papers: ordered by PageRank and grouped by
+    year, giving the histogram and each year's top ids at once. The
+    PageRank quantiles aren't recomputed — they're the centralityDistribution
+    gds.pageRank.write already returned. Papers without a year count towards
+    paperCount but not the per-year lists. Parameters: $topic, $edge_count
+    (the projection's relationshipCount), $centrality (the
+    centralityDistribution map) and $top_k."""
+    return f"""
+    MATCH (p:Paper)
+    WHERE p.pageRank_{topic_name} IS NOT NULL
+    WITH p
+    ORDER BY p.pageRank_{topic_name} DESC
+    WITH p.year AS year, count(p) AS yearCount, collect(p.id)[0..$top_k] AS topIds
+    ORDER BY year ASC
+    WITH sum(yearCount) AS paperCount,
+         [row IN collect({{year: year, count: yearCount, ids: topIds}}) WHERE row.year IS NOT NULL] AS perYear
+    MERGE (s:TopicStats {{topic: $topic}})
+    SET s.paperCount = paperCount,
+        s.edgeCount = $edge_count,
+        s.years = [row IN perYear | row.year],
+        s.yearCounts = [row IN perYear | row.count],
+        s.pageRankP50 = $centrality.p50,
+        s.pageRankP90 = $centrality.p90,
+        s.pageRankP99 = $centrality.p99,
+        s.pageRankMax = $centrality.max,
+        s.topK = $top_k,
+        s.topIds = reduce(acc = [], row IN perYear | acc + row.ids),
+        s.topIdYears = reduce(acc = [], row IN perYear | acc + [id IN row.ids | row.year]),
+        s.builtAt = datetime()
+    RETURN s.paperCount AS paperCount
+    """
+
+
+TOPIC_STATS_QUERY = """
+    MATCH (s:TopicStats {topic: $topic})
+    RETURN s.paperCount AS paperCount, s.edgeCount AS edgeCount, s.years AS years, s.yearCounts AS yearCounts,
+           s.pageRankP50 AS pageRankP50, s.pageRankP90 AS pageRankP90, s.pageRankP99 AS pageRankP99,
+           s.pageRankMax AS pageRankMax, s.topK AS topK
+"""
+
+
+
+def year_distribution_rows(stats: dict) -> list[dict]:
+    """A TOPIC_STATS_QUERY row's histogram as year_distribution_query's rows."""
+    return [{"year": year, "paperCount": count} for year, count in zip(stats["years"], stats["yearCounts"])]
+
+
+# Drop-in for the live `MATCH ... collect(p)[0..n] ... UNWIND` prefix of the
+# top-papers-per-year reads, binding the same `year` and `p` from the stored
+# top ids (looked up through paper_id_index). Only covers $no_of_papers <= the
+# stats' topK, and returns nothing otherwise. Parameters: $topic, $from_year,
+# $no_of_papers, and $year (None for all years).
+STATS_TOP_PAPERS_PREFIX = """
+    MATCH (s:TopicStats {topic: $topic})
+    WHERE $no_of_papers <= s.topK
+    UNWIND range(0, size(s.topIds) - 1) AS i
+    WITH s.topIds[i] AS pid, s.topIdYears[i] AS year
+    WHERE year >= $from_year AND ($year IS NULL OR year = $year)
+    WITH year, collect(pid)[0..$no_of_papers] AS ids
+    UNWIND ids AS pid
+    MATCH (p:Paper {id: pid})
+"""
+
+
+# --- Paper reads ---
+
+def stats_top_papers_per_year_query(topic_name, fields):
+    """top_papers_per_year_query served from TopicStats; parameters as for
+    STATS_TOP_PAPERS_PREFIX."""
+    return STATS_TOP_PAPERS_PREFIX + f"""
+    RETURN year, p.label AS title, p.pageRank_{topic_name} AS pageRank,
+           p.citationCount AS citationCount, p.url AS url, p.id AS id{abstract_projection("p", fields)}
+    ORDER BY year ASC, pageRank DESC;
+    """
+
+
+def top_papers_per_year_query(topic_name, from_year, papers_per_year, fields):
+    return f"""
+    MATCH (p:Paper)
+    WHERE p.pageRank_{topic_name} IS NOT NULL AND p.year >= {from_year}
+    WITH p.year AS year, p
+    ORDER BY p.pageRank_{topic_name} DESC
+    WITH year, collect(p)[0..{papers_per_year}] AS topPapers
+    UNWIND topPapers AS p
+    RETURN year, p.label AS title, p.pageRank_{topic_name} AS pageRank,
+           p.citationCount AS citationCount, p.url AS url, p.id AS id{abstract_projection("p", fields)}
+    ORDER BY year ASC, pageRank DESC;
+    """
+
+
+def year_distribution_query(topic_name):
+    return f"""
+    MATCH (p:Paper)
+    WHERE p.pageRank_{topic_name} IS NOT NULL
+    RETURN p.year AS year, count(*) AS paperCount
+    ORDER BY year ASC;
+    """
+
+
+def top_papers_overall_query(topic_name, year_cutoff, limit, offset, fields):
+    return f"""
+    MATCH (p:Paper)
+    WHERE p.year > {year_cutoff} AND p.pageRank_{topic_name} IS NOT NULL
+    RETURN p.label AS title, p.year AS year, p.citationCount AS citationCount,
+           p.pageRank_{topic_name} AS pageRank, p.url AS url, p.id AS id{abstract_projection("p", fields)}
+    ORDER BY pageRank DESC
+    SKIP {offset} LIMIT {limit};
+    """
+
+
+def search_papers_query(fields):
+    return f"""
+    CALL db.index.fulltext.queryNodes('paperAbstractIndex', $query)
+    YIELD node, score
+    RETURN node.label AS title, node.year AS year, node.citationCount AS citationCount,
+           node.pageRank AS pageRank, node.url AS url,
+           node.id AS id, score{abstract_projection("node", fields)}
+    ORDER BY score DESC
+    SKIP $offset LIMIT $limit;
+    """
+
+
+def search_papers_in_topic_query(topic_name, fields):
+    return f"""
+    CALL db.index.fulltext.queryNodes('paperAbstractIndex', $keyword)
+    YIELD node, score
+    WHERE node.pageRank_{topic_name} IS NOT NULL
+    RETURN node.label AS title, node.year AS year, node.citationCount AS citationCount,
+           node.pageRank_{topic_name} AS pageRank, node.url AS url,
+           node.id AS id, score{abstract_projection("node", fields)}
+    ORDER BY score DESC
+    SKIP $offset LIMIT $limit;
+    """
+
+
+def cited_by_query(limit, sort_by, topic_name, fields):
+    """
+    sort_by: 'pagerank' (most influential successors) or 'year' (most recent successors)
+    topic_name: if provided, restricts results to papers within that topic subgraph
+    """
+    if topic_name:
+        order_clause = f"p.pageRank_{topic_name} DESC" if sort_by == "pagerank" else f"p.year DESC, p.pageRank_{topic_name} DESC"
+        where_clause = f"AND p.pageRank_{topic_name} IS NOT NULL"
+        pagerank_field = f"p.pageRank_{topic_name} AS pageRank"
+    else:
+        order_clause = "p.pageRank DESC" if sort_by == "pagerank" else "p.year DESC, p.pageRank DESC"
+        where_clause = ""
+        pagerank_field = "p.pageRank AS pageRank"
+
+    return f"""
+    MATCH (p:Paper)-[:CITES]->(target:Paper {{id: $paper_id}})
+    WHERE true {where_clause}
+    RETURN p.label AS title, p.year AS year, p.citationCount AS citationCount,
+           {pagerank_field}, p.url AS url, p.id AS id{abstract_projection("p", fields)}
+    ORDER BY {order_clause}
+    LIMIT {limit};
+    """
+
+
+def cites_query(fields):
+    return f"""
+    MATCH (source:Paper {{id: $paper_id}})-[:CITES]->(p:Paper)
+    RETURN p.label AS title, p.year AS year, p.citationCount AS citationCount,
+           p.pageRank AS pageRank, p.url AS url, p.id AS id{abstract_projection("p", fields)}
+    ORDER BY p.pageRank DESC;
+    """
+
+
+ABSTRACTS_QUERY = """
+UNWIND $ids AS pid
+MATCH (p:Paper {id: pid})
+RETURN p.id AS id, p.abstract AS abstract
+"""
+
+
+def id_batches(paper_ids, batch_size):
+    """Splits ids into lists of at most batch_size, for UNWIND lookups."""
+    paper_ids = list(paper_ids)
+    return [paper_ids[i:i + batch_size] for i in range(0, len(paper_ids), batch_size)]
+
+
+# --- Schema / introspection ---
+
+TOPIC_NAMES_QUERY = """
+    MATCH (p:Paper)
+    WITH keys(p) AS props
+    UNWIND props AS prop
+    WITH prop WHERE prop STARTS WITH 'pageRank_'
+    RETURN DISTINCT replace(prop, 'pageRank_', '') AS topic_name
+"""
+
+SCHEMA_NODE_PROPERTIES_QUERY = """
+    CALL db.schema.nodeTypeProperties()
+    YIELD nodeLabels, propertyName, propertyTypes
+    RETURN nodeLabels, propertyName, propertyTypes
+    ORDER BY nodeLabels, propertyName
+"""
+
+SCHEMA_REL_PROPERTIES_QUERY = """
+    CALL db.schema.relTypeProperties()
+    YIELD relType, propertyName, propertyTypes
+    RETURN relType, propertyName, propertyTypes
+    ORDER BY relType
+"""
+
+SCHEMA_INDEXES_QUERY = """
+    SHOW INDEXES
+    YIELD name, type, labelsOrTypes, properties, state
+    WHERE state = 'ONLINE'
+    RETURN name, type, labelsOrTypes, properties
+    ORDER BY name
+"""
+
+TOPIC_PROPERTIES_QUERY = """
+    MATCH (p:Paper)
+    WITH keys(p) AS props
+    UNWIND props AS prop
+    WITH prop WHERE prop STARTS WITH 'pageRank_'
+    RETURN DISTINCT prop AS property
+    ORDER BY prop
+"""
+
+
+# --- Agent-written Cypher ---
+
+READ_ONLY_PREFIXES = ("match", "call", "return", "with", "unwind", "show", "yield", "where", "optional")
+WRITE_KEYWORDS = ("create", "merge", "set", "delete", "detach", "remove", "drop", "load csv")
+
+
+def write_keywords_in(query: str) -> list[str]:
+    lowered = query.lower()
+    return [kw for kw in WRITE_KEYWORDS if kw in lowered]
+
+
+def is_read_only(query: str) -> bool:
+    """Reject queries containing write clauses."""
+    return not write_keywords_in(query)
+
+
+def read_only_error(query: str) -> ValueError:
+    return ValueError(
+        "Write operations are not allowed. Query contains a write clause "
+        f"({', '.join(write_keywords_in(query))}). "
+        "Use read-only MATCH/CALL/RETURN queries only."
+    )
+
+
+# Guards for run_cypher. The query is EXPLAINed first and rejected when the
+# planner expects more than CYPHER_MAX_ESTIMATED_ROWS at any operator (the
+# signature of an accidental cartesian product or unbounded variable-length
+# path); above CYPHER_WARN_ESTIMATED_ROWS it runs but the response says so.
+# Execution is then bounded server-side by CYPHER_TIMEOUT_SECONDS, and by a
+# LIMIT of max_rows + 1 wrapped around the query (see row_capped_query) —
+# max_rows is capped at CYPHER_ROW_LIMIT however many the caller asks for.
+# PROFILE (db hits per operator) is opt-in, as it slows execution down.
+CYPHER_WARN_ESTIMATED_ROWS = 100_000
+CYPHER_MAX_ESTIMATED_ROWS = 10_000_000
+CYPHER_TIMEOUT_SECONDS = 30
+CYPHER_DEFAULT_MAX_ROWS = 500
+CYPHER_ROW_LIMIT = 5000
+
+
+ROW_CAP_PARAM = "run_cypher_row_cap"
+
+
+def check_cypher_prefix(query: str) -> None:
+    """run_cypher adds its own EXPLAIN/PROFILE, so callers mustn't."""
+    first_word = query.lstrip().split(None, 1)[0].lower() if query.strip() else ""
+    if first_word in ("explain", "profile"):
+        raise ValueError(
+            f"Don't prefix the query with {first_word.upper()} — run_cypher already "
+            "explains every query, and profiles it when asked to."
+        )
+
+
+def row_capped_query(query: str) -> str | None:
+    """query inside a CALL subquery limited to $run_cypher_row_cap rows, so
+    the server stops producing rows at the cap instead of running the query
+    to completion while the client discards the rest. None for SHOW
+    commands, which can't be nested. RETURN * lists columns alphabetically;
+    run_cypher restores the query's own order from its EXPLAIN."""
+    body = query.strip().rstrip(";").rstrip()
+    if body.split(None, 1)[0].lower() == "show":
+        return None
+    return f"CALL {{\n{body}\n}}\nRETURN * LIMIT ${ROW_CAP_PARAM}"
+
+
+def is_syntax_error(error: Exception) -> bool:
+    return "SyntaxError" in (getattr(error, "code", None) or "")
+
+
+def max_estimated_rows(plan: dict | None) -> float:
+    """Largest EstimatedRows of any operator in an EXPLAIN plan tree."""
+    if not plan:
+        return 0
+    args = plan.get("args") or plan.get("arguments") or {}
+    own = args.get("EstimatedRows", 0) or 0
+    return max([own] + [max_estimated_rows(child) for child in plan.get("children", [])])
+
+
+def total_db_hits(profile: dict | None) -> int:
+    """Sum of db hits over every operator in a PROFILE plan tree."""
+    if not profile:
+        return 0
+    args = profile.get("args") or profile.get("arguments") or {}
+    own = profile.get("dbHits", args.get("DbHits", 0)) or 0
+    return own + sum(total_db_hits(child) for child in profile.get("children", []))
+
+
+def plan_warnings(estimated_rows: float, max_estimated: float = CYPHER_MAX_ESTIMATED_ROWS) -> list[str]:
+    """Raises ValueError for plans over max_estimated; returns warnings for
+    plans over CYPHER_WARN_ESTIMATED_ROWS."""
+    if estimated_rows > max_estimated:
+        raise ValueError(
+            f"The query plan estimates ~{estimated_rows:,.0f} rows at its widest step, over the "
+            f"{max_estimated:,.0f} limit. This usually means a cartesian product or an unbounded "
+            "variable-length path — add a tighter MATCH, an index-backed filter, or a LIMIT."
+        )
+    if estimated_rows > CYPHER_WARN_ESTIMATED_ROWS:
+        return [f"Planner estimates ~{estimated_rows:,.0f} rows at its widest step; this query may be slow."]
+    return []
+
+
+def clamp_max_rows(max_rows: int | None) -> int:
+    if max_rows is None:
+        return CYPHER_DEFAULT_MAX_ROWS
+    return max(1, min(int(max_rows), CYPHER_ROW_LIMIT))
+
+
+def is_timeout_error(error: Exception) -> bool:
+    return "TransactionTimedOut" in (getattr(error, "code", None) or "")
+
+
+class CypherGuard:
+    """
+    The driver-independent steps of run_cypher, so the sync or async caller
+    only does the I/O: validate the query (read-only, no EXPLAIN/PROFILE
+    prefix, clamped max_rows), check its EXPLAIN plan, list the statements to
+    try (row-capped first, then uncapped if the server can't nest it), decide
+    how a failed attempt is handled, and build the result dict.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        params: dict | None = None,
+        max_rows: int | None = None,
+        timeout: float = CYPHER_TIMEOUT_SECONDS,
+        max_estimated_rows: float = CYPHER_MAX_ESTIMATED_ROWS,
+        profile: bool = False,
+    ):
+        if not is_read_only(query):
+            raise read_only_error(query)
+        check_cypher_prefix(query)
+        self.query = query
+        self.params = params or {}
+        self.max_rows = clamp_max_rows(max_rows)
+        self.timeout = timeout
+        self.max_estimated_rows = max_estimated_rows
+        self.profile = profile
+        self.columns = None
+        self.estimated_rows = None
+        self.warnings = []
+
+    @property
+    def explain_statement(self) -> str:
+        return f"EXPLAIN {self.query}"
+
+    def check_plan(self, columns, plan: dict | None) -> None:
+        """Records the EXPLAIN's columns and estimate; raises ValueError for
+        plans over max_estimated_rows."""
+        self.columns = list(columns)
+        self.estimated_rows = max_estimated_rows(plan)
+        self.warnings = plan_warnings(self.estimated_rows, self.max_estimated_rows)
+
+    def attempts(self) -> list[tuple[str, dict]]:
+        """(statement, params) to run in order until one doesn't fail with a
+        syntax error (see retry_after)."""
+        prefix = "PROFILE " if self.profile else ""
+        capped = row_capped_query(self.query)
+        attempts = [(prefix + self.query, self.params)]
+        if capped:
+            attempts.insert(0, (prefix + capped, {**self.params, ROW_CAP_PARAM: self.max_rows + 1}))
+        return attempts
+
+    def retry_after(self, error: Exception, attempt: int) -> bool:
+        """Whether to go on to the next attempt after attempt failed with
+        error. Some valid queries can't be nested in CALL { } (e.g. a bare
+        procedure call without YIELD), so a syntax error on the capped
+        statement falls back to running it uncapped server-side. Raises
+        ValueError for a server-side timeout."""
+        if is_timeout_error(error):
+            raise ValueError(
+                f"Query exceeded the {self.timeout}s timeout and was terminated by the server."
+            ) from error
+        return attempt + 1 < len(self.attempts()) and is_syntax_error(error)
+
+    def full(self, rows: list) -> bool:
+        """Whether rows already holds one past max_rows — enough to know the
+        result is truncated."""
+        return len(rows) > self.max_rows
+
+    def row(self, data: dict) -> dict:
+        """A record's data in the query's own column order (RETURN * from
+        the capped wrapper lists them alphabetically)."""
+        return {column: data.get(column) for column in self.columns}
+
+    def result(self, rows: list[dict], plan_profile: dict | None, elapsed_s: float) -> dict:
+        return {
+            "rows": rows[:self.max_rows],
+            "truncated": len(rows) > self.max_rows,
+            "elapsed_ms": round(elapsed_s * 1000),
+            "db_hits": total_db_hits(plan_profile) if self.profile else None,
+            "estimated_rows": self.estimated_rows,
+            "warnings": self.warnings,
+        }
+
+
+def match_similar_topic(existing: list[str], candidate_name: str, search_terms: list[str]) -> str | None:
+    """
+    Matches on word overlap between existing topic names and the candidate +
+    search terms. Returns the matching topic_name or None.
+    """
+    if not existing:
+        return None
+
+    # Build a set of significant words from candidate + search terms
+    all_words = set()
+    for term in [candidate_name] + search_terms:
+        all_words.update(w.lower() for w in term.replace("_", " ").split() if len(w) > 2)
+
+    for topic in existing:
+        topic_words = set(w.lower() for w in topic.replace("_", " ").split() if len(w) > 2)
+        if topic_words & all_words:  # any word overlap
+            return topic
+
+    return None
@@ -0,0 +1,118 @@
+"""
+Near-duplicate collapse for fetched paper sets. arXiv topic sets carry many
+near-identical abstracts — version bumps, workshop/conference twins, survey
+clones — and every copy would otherwise be sent to the model. MinHash
+signatures over word shingles estimate Jaccard similarity, LSH banding
+narrows the comparisons to likely pairs, and each cluster of near-duplicates
+keeps only its highest-PageRank paper.
+"""
+
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from custom_logging import logger
+
+SHINGLE_WORDS = 3
+NUM_PERM = 128
+# 16 bands x 8 rows puts the LSH candidate threshold around Jaccard 0.7, a
+# bit below SIMILARITY_THRESHOLD, so true near-duplicates are rarely missed;
+# candidates are then checked against the threshold on the full signature.
+LSH_BANDS = 16
+SIMILARITY_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(1, _MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> np.ndarray:
+    """Hashes of the text's k-word shingles (lowercased, punctuation
+    stripped) as uint64. crc32 rather than hash(), which is salted per
+    process."""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) < k:
+        words = words + [""] * (k - len(words))
+    grams = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash_signatures(texts) -> np.ndarray:
+    """(len(texts), NUM_PERM) MinHash signatures; all permutations of one
+    text are computed at once. Products stay below 2**62, so uint64 never
+    overflows."""
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = shingles(text) % _MERSENNE_PRIME
+        signatures[i] = ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+    return signatures
+
+
+def near_duplicate_pairs(signatures: np.ndarray, threshold: float = SIMILARITY_THRESHOLD, bands: int = LSH_BANDS):
+    """Index pairs (i < j) whose estimated Jaccard similarity is at least
+    threshold. Only pairs sharing an LSH band bucket are compared."""
+    rows_per_band = signatures.shape[1] // bands
+    candidates = set()
+    for band in range(bands):
+        buckets = {}
+        block = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        for i, key in enumerate(map(bytes, block)):
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                candidates.update((a, b) for idx, a in enumerate(members) for b in members[idx + 1:])
+
+    return [
+        (i, j) for i, j in sorted(candidates)
+        if np.mean(signatures[i] == signatures[j]) >= threshold
+    ]
+
+
+def collapse_near_duplicates(
+    df: pd.DataFrame,
+    threshold: float = SIMILARITY_THRESHOLD,
+    pagerank_col: str = "subgraphPageRank",
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Groups near-duplicate papers (title + abstract) and keeps the
+    highest-PageRank paper of each group. Returns (kept, dropped), with kept
+    in df's original order.
+    """
+    if len(df) < 2:
+        return df, df.iloc[0:0]
+
+    texts = (df["title"].fillna("") + " " + df["Abstract"].fillna("")).tolist()
+    # Papers with no words at all would all get the same signature and
+    # collapse into one cluster; they're never treated as duplicates.
+    with_text = [i for i, text in enumerate(texts) if re.search(r"[a-z0-9]", text.lower())]
+    pairs = [
+        (with_text[i], with_text[j])
+        for i, j in near_duplicate_pairs(minhash_signatures([texts[i] for i in with_text]), threshold)
+    ]
+
+    # Union-find over positions, each root being the group's best paper.
+    pagerank = df[pagerank_col].fillna(0).to_numpy()
+    parent = list(range(len(df)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri == rj:
+            continue
+        if pagerank[rj] > pagerank[ri] or (pagerank[rj] == pagerank[ri] and rj < ri):
+            ri, rj = rj, ri
+        parent[rj] = ri
+
+    keep = np.array([find(i) == i for i in range(len(df))])
+    kept, dropped = df.iloc[keep], df.iloc[~keep]
+    if len(dropped):
+        logger.info(f"Collapsed {len(dropped)} near-duplicate papers of {len(df)} ({len(pairs)} similar pairs).")
+    return kept, dropped
@@ -1,56 +1,536 @@
-import google.generativeai as genai
 import streamlit as st
 from dotenv import load_dotenv
-from typing import List, Callable
+from typing import List, Callable, Iterator, TypeVar
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+import functools
 import pandas as pd
 import os
-import time
 from custom_logging import logger
-
-# Papers are analyzed in batches of this size per LLM call (token-limit
-# workaround), sleeping between calls to respect API rate limits.
-CHUNK_SIZE = 500
-SLEEP_SECONDS = 30
+from rate_limiting import RateLimiter
+from llm_client import LLMClient
+from llm_backends import GeminiBackend, FakeBackend, Generation
+from chunk_checkpoints import ChunkCheckpoints, chunk_fingerprint
+from llm_cache import LLMCache
+from paper_extractions import PaperExtractionStore, parse_records, format_record
+from prompt_assembly import join_papers, yearly_sections
+from analysis_jobs import current_job, JobCancelled, JobFailed
+from run_planner import RunPlanner, load_profile
+import telemetry
 
 # Load environment variables from .env file
 load_dotenv()
 
+_MISSING = object()
+T = TypeVar("T")
+
 
-def _get_config(key: str) -> str:
+def _get_config(key: str, default=_MISSING) -> str:
     """Local dev reads from .env via os.environ; Streamlit Cloud has no .env
     file and injects secrets via st.secrets instead — fall back to that."""
     if key in os.environ:
         return os.environ[key]
-    if key in st.secrets:
-        return st.secrets[key]
+    try:
+        if key in st.secrets:
+            return st.secrets[key]
+    except FileNotFoundError:
+        # No secrets.toml at all, e.g. running bench_pipeline.py outside
+        # Streamlit — defaults still apply.
+        pass
+    if default is not _MISSING:
+        return default
     raise KeyError(f"'{key}' not found in environment variables or Streamlit secrets")
 
 
-genai.configure(api_key=_get_config("GOOGLE_API_KEY"))
-model = genai.GenerativeModel(_get_config("GOOGLE_API_MODEL"))
+# "gemini" calls the live API; "fake" is the offline simulator in
+# llm_backends.py (latency, token counts and 429 rate set via LLM_FAKE_*).
+LLM_BACKEND = _get_config("LLM_BACKEND", "gemini").lower()
+if LLM_BACKEND == "fake":
+    backend = FakeBackend(
+        latency_seconds=float(_get_config("LLM_FAKE_LATENCY_SECONDS", 0.5)),
+        output_tokens=int(_get_config("LLM_FAKE_OUTPUT_TOKENS", 300)),
+        tokens_per_second=float(_get_config("LLM_FAKE_TOKENS_PER_SECOND", 200)),
+        throttle_rate=float(_get_config("LLM_FAKE_429_RATE", 0)),
+    )
+elif LLM_BACKEND == "gemini":
+    backend = GeminiBackend(_get_config("GOOGLE_API_MODEL"), _get_config("GOOGLE_API_KEY"))
+else:
+    raise ValueError(f"Unknown LLM_BACKEND '{LLM_BACKEND}'; expected 'gemini' or 'fake'")
+MODEL_NAME = backend.name
+
+# API quota for the configured model. Every model call acquires
+# from one shared limiter, so chunk extraction can run concurrently (up to
+# MAX_CONCURRENT_REQUESTS in flight) and only ever waits as long as the quota
+# actually requires — there's no fixed sleep between calls.
+REQUESTS_PER_MINUTE = float(_get_config("LLM_REQUESTS_PER_MINUTE", 10))
+TOKENS_PER_MINUTE = float(_get_config("LLM_TOKENS_PER_MINUTE", 1_000_000))
+MAX_CONCURRENT_REQUESTS = int(_get_config("LLM_MAX_CONCURRENT_REQUESTS", 4))
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+
+# 429s and transient errors are retried with jittered backoff, and the number
+# of calls in flight adapts (AIMD) between 1 and MAX_CONCURRENT_REQUESTS —
+# see llm_client.py.
+MAX_RETRIES = int(_get_config("LLM_MAX_RETRIES", 6))
+llm_client = LLMClient(rate_limiter, MAX_CONCURRENT_REQUESTS, max_retries=MAX_RETRIES)
+
+# The SQLite stores below (under data/) are opened on first use rather than
+# at import, so importing genai — app startup, the tests, the bench scripts —
+# creates no files.
+
+# Completed map-step chunks are checkpointed per run so a failed run resumes
+# where it stopped (State of the Art's per-paper store already does this).
+@functools.cache
+def _chunk_checkpoints() -> ChunkCheckpoints:
+    return ChunkCheckpoints("data/llm_checkpoints.sqlite")
+
+
+# Responses are cached on disk keyed by model + prompt hash, so repeat runs
+# over the same topic/cutoff/paper set skip the model entirely. Least
+# recently used entries are evicted past LLM_CACHE_MAX_MB.
+LLM_CACHE_ENABLED = str(_get_config("LLM_CACHE_ENABLED", "true")).lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_MB = float(_get_config("LLM_CACHE_MAX_MB", 256))
+
+
+@functools.cache
+def _llm_cache() -> LLMCache:
+    return LLMCache("data/llm_cache.sqlite", max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024))
+
+
+# One structured row per LLM call (flow, topic, chunk, tokens, latency, cache
+# hit, retries) in data/llm_telemetry.sqlite; `python telemetry.py report`
+# summarizes it.
+LLM_TELEMETRY_ENABLED = str(_get_config("LLM_TELEMETRY_ENABLED", "true")).lower() in ("1", "true", "yes")
+
+
+@functools.cache
+def _telemetry_store() -> telemetry.TelemetryStore | None:
+    return telemetry.TelemetryStore() if LLM_TELEMETRY_ENABLED else None
+
+
+# Per-paper State of the Art records. The version string keys the store, so
+# bump EXTRACTION_SCHEMA_VERSION whenever the record prompt/fields change, or
+# stale records will keep being reused.
+EXTRACTION_SCHEMA_VERSION = 1
+EXTRACTION_MODEL_VERSION = f"{MODEL_NAME}/v{EXTRACTION_SCHEMA_VERSION}"
+
+
+@functools.cache
+def _paper_store() -> PaperExtractionStore:
+    return PaperExtractionStore("data/paper_extractions.sqlite")
+
+
+# Papers whose record failed to extract are left out of the synthesis; below
+# this fraction of papers with a record, State of the Art fails instead of
+# presenting an analysis of whatever little came back.
+MIN_RECORD_COVERAGE = float(_get_config("LLM_MIN_RECORD_COVERAGE", 0.8))
+
+# Rough sizing for token estimates before a prompt exists: ~4 characters per
+# token of English text. _generate_content logs each estimate next to the
+# model's actual count, so CHARS_PER_TOKEN can be recalibrated from the usage
+# log.
+CHARS_PER_TOKEN = 4
+PAPER_PROMPT_OVERHEAD_CHARS = len("Title: \nAbstract: \n\n")
+
+# Papers are packed into map-step chunks up to this many estimated prompt
+# tokens, rather than a fixed row count — abstract lengths vary too much for
+# a row count to track either the context limit or wasted capacity. Keyed by
+# model; LLM_CHUNK_TOKEN_BUDGET overrides.
+CHUNK_TOKEN_BUDGETS = {
+    "gemini-2.5-pro": 200_000,
+    "gemini-2.5-flash": 200_000,
+    "gemini-2.0-flash": 150_000,
+}
+DEFAULT_CHUNK_TOKEN_BUDGET = 150_000
+CHUNK_TOKEN_BUDGET = int(_get_config(
+    "LLM_CHUNK_TOKEN_BUDGET", CHUNK_TOKEN_BUDGETS.get(MODEL_NAME, DEFAULT_CHUNK_TOKEN_BUDGET)
+))
+
+# Record extraction answers with one JSON object per paper, so unlike the
+# other map steps its output grows with the chunk, and a 200k-token chunk's
+# records would run past the model's output limit (which on 2.5 models also
+# covers thinking). Its chunks are also capped at RECORDS_PER_CHUNK papers:
+# EXTRACTION_OUTPUT_TOKEN_BUDGET at RECORD_OUTPUT_TOKENS per record (3 short
+# phrases in each of 4 lists, at the high end). Keyed by model;
+# LLM_EXTRACTION_OUTPUT_TOKEN_BUDGET overrides.
+RECORD_OUTPUT_TOKENS = 200
+EXTRACTION_OUTPUT_TOKEN_BUDGETS = {
+    "gemini-2.5-pro": 32_000,
+    "gemini-2.5-flash": 32_000,
+    "gemini-2.0-flash": 6_000,
+}
+DEFAULT_EXTRACTION_OUTPUT_TOKEN_BUDGET = 6_000
+EXTRACTION_OUTPUT_TOKEN_BUDGET = int(_get_config(
+    "LLM_EXTRACTION_OUTPUT_TOKEN_BUDGET",
+    EXTRACTION_OUTPUT_TOKEN_BUDGETS.get(MODEL_NAME, DEFAULT_EXTRACTION_OUTPUT_TOKEN_BUDGET),
+))
+RECORDS_PER_CHUNK = max(1, EXTRACTION_OUTPUT_TOKEN_BUDGET // RECORD_OUTPUT_TOKENS)
+
+
+# Synthesis is a tree reduce: once the extracts no longer fit in one prompt of
+# REDUCE_TOKEN_BUDGET estimated tokens, they're merged in parallel groups into
+# partial syntheses, and those partials are merged REDUCE_FAN_IN at a time
+# until a single final synthesis call remains. Every reduce call is bounded,
+# so reduce latency stays flat as papers_to_analyze grows.
+REDUCE_TOKEN_BUDGET = int(_get_config("LLM_REDUCE_TOKEN_BUDGET", 60_000))
+REDUCE_FAN_IN = int(_get_config("LLM_REDUCE_FAN_IN", 8))
+
+
+# Compact mode sends each paper's Semantic Scholar TLDR (~30 tokens) instead
+# of its abstract (~250), or the abstract cut to this many characters when
+# there's no TLDR — several times more papers per chunk for the same budget.
+COMPACT_ABSTRACT_CHARS = 400
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_paper_tokens(df: pd.DataFrame) -> pd.Series:
+    """Estimated prompt tokens per row (title + abstract as rendered into
+    the extraction prompts), computed column-wise."""
+    chars = (
+        df["title"].fillna("").str.len()
+        + df["Abstract"].fillna("").str.len()
+        + PAPER_PROMPT_OVERHEAD_CHARS
+    )
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def compact_abstracts(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of df whose Abstract column holds the TLDR where there is one,
+    else the abstract truncated to COMPACT_ABSTRACT_CHARS. Everything
+    downstream (prompts, token estimates, chunking) just reads Abstract."""
+    abstracts = df["Abstract"].fillna("")
+    truncated = abstracts.where(
+        abstracts.str.len() <= COMPACT_ABSTRACT_CHARS,
+        abstracts.str.slice(0, COMPACT_ABSTRACT_CHARS) + "...",
+    )
+    tldr = df["TLDR"].fillna("").str.strip() if "TLDR" in df else pd.Series("", index=df.index)
+    compact = df.copy()
+    compact["Abstract"] = tldr.where(tldr != "", truncated)
+    logger.info(f"Compact mode: {int((tldr != '').sum())} of {len(df)} papers have a TLDR.")
+    return compact
+
+
+def chunk_by_token_budget(df: pd.DataFrame, token_budget: int = CHUNK_TOKEN_BUDGET, max_rows: int | None = None) -> list[pd.DataFrame]:
+    """Greedily packs consecutive rows (keeping PageRank order) into chunks
+    of at most token_budget estimated tokens and (if given) max_rows rows.
+    A single paper over budget still gets a chunk of its own rather than
+    being dropped."""
+    estimates = estimate_paper_tokens(df).tolist()
+    chunks, chunk_tokens = [], []
+    start, used = 0, 0
+    for i, tokens in enumerate(estimates):
+        full = used + tokens > token_budget or (max_rows is not None and i - start >= max_rows)
+        if full and i > start:
+            chunks.append(df.iloc[start:i])
+            chunk_tokens.append(used)
+            start, used = i, 0
+        used += tokens
+    if start < len(df):
+        chunks.append(df.iloc[start:])
+        chunk_tokens.append(used)
+
+    if chunks:
+        logger.info(
+            f"Packed {len(df)} papers into {len(chunks)} chunks under a {token_budget}-token budget; "
+            f"estimated tokens per chunk: {chunk_tokens}"
+        )
+    return chunks
+
+
+def _log_estimate(estimated: int, actual: int) -> None:
+    logger.info(f"Prompt token estimate {estimated} vs actual {actual} ({actual / estimated:.2f}x).")
+
+
+def _record_call(flow: str, topic: str | None, **fields) -> None:
+    if LLM_TELEMETRY_ENABLED:
+        _telemetry_store().record(flow, topic, MODEL_NAME, **fields)
+
+
+def _generate_content(prompt: str, description: str, stats: dict | None = None) -> Generation:
+    """Every model call goes through llm_client, so all of them draw on the
+    shared rate limiter and concurrency window and get retried on 429s —
+    including synthesis calls that follow a concurrent burst of chunk
+    extractions."""
+    estimated = estimate_tokens(prompt)
+    generation = llm_client.call(lambda: backend.generate(prompt), estimated, description, stats)
+    _log_estimate(estimated, generation.usage.prompt_tokens)
+    return generation
+
+
+def _generate(prompt: str, description: str, use_cache: bool = True, flow: str = "other", topic: str | None = None,
+              papers: int | None = None, parse: Callable[[str], T] | None = None) -> str | T:
+    """Returns the model's text for prompt, from the response cache when
+    possible. `description` finishes the usage log line ("Used N input and
+    M output tokens <description>."); `flow`, `topic` and `papers` (how many
+    papers the prompt carries) label the call's telemetry row.
+    use_cache=False skips the lookup but still refreshes the cached entry;
+    LLM_CACHE_ENABLED off disables both.
+
+    With parse, returns parse(text) instead, and a response is only cached
+    once it parses: a ValueError from parse propagates with nothing cached,
+    so the next run asks the model again rather than replaying the bad
+    response. A cached entry that no longer parses is treated as a miss.
+    Responses the model cut short aren't cached either."""
+    if use_cache and LLM_CACHE_ENABLED:
+        cached = _llm_cache().get(MODEL_NAME, prompt)
+        if cached is not None:
+            try:
+                result = parse(cached["text"]) if parse else cached["text"]
+            except ValueError as e:
+                logger.warning(f"Ignoring cached response that no longer parses {description}: {e}")
+            else:
+                logger.info(
+                    f"Cache hit: reused {cached['prompt_tokens']} input and {cached['output_tokens']} "
+                    f"output tokens {description}."
+                )
+                _record_call(flow, topic, prompt_tokens=cached["prompt_tokens"], output_tokens=cached["output_tokens"],
+                             latency_s=None, cache_hit=True, papers=papers)
+                return result
+        else:
+            logger.info(f"Cache miss {description}.")
+
+    stats = {"retries": 0}
+    start = time.perf_counter()
+    try:
+        generation = _generate_content(prompt, description, stats)
+    except Exception as e:
+        _record_call(flow, topic, prompt_tokens=None, output_tokens=None, latency_s=time.perf_counter() - start,
+                     cache_hit=False, retries=stats["retries"], error=type(e).__name__, papers=papers)
+        raise
+    _record_call(flow, topic, prompt_tokens=generation.usage.prompt_tokens, output_tokens=generation.usage.output_tokens,
+                 latency_s=time.perf_counter() - start, cache_hit=False, retries=stats["retries"], papers=papers)
+    tokens_in = generation.usage.prompt_tokens
+    tokens_out = generation.usage.output_tokens
+
+    logger.info(f"Used {tokens_in} input and {tokens_out} output tokens {description}.")
+
+    result = parse(generation.text) if parse else generation.text
+    if not generation.complete:
+        # Cut short (output limit, safety): usable this once, e.g. for the
+        # records that came through, but not worth replaying.
+        logger.warning(f"Response ended early ({generation.finish_reason}) {description}; not caching it.")
+    elif LLM_CACHE_ENABLED:
+        _llm_cache().put(MODEL_NAME, prompt, generation.text, tokens_in, tokens_out)
+    return result
+
+
+def _generate_stream(prompt: str, description: str, use_cache: bool = True, flow: str = "other", topic: str | None = None) -> Iterator[str]:
+    """Streaming counterpart of _generate: yields the response text as the
+    model produces it, so the UI can render the first tokens long before the
+    whole synthesis is done. Time to first token is logged with the usage
+    line; a cache hit yields the stored text in one piece. Only a stream
+    that ran to its natural end is cached — not one the consumer stopped
+    reading, nor one the model cut short (output limit, safety) — but every
+    stream gets its telemetry row, abandoned ones included."""
+    if use_cache and LLM_CACHE_ENABLED:
+        cached = _llm_cache().get(MODEL_NAME, prompt)
+        if cached is not None:
+            logger.info(
+                f"Cache hit: reused {cached['prompt_tokens']} input and {cached['output_tokens']} "
+                f"output tokens {description}."
+            )
+            _record_call(flow, topic, prompt_tokens=cached["prompt_tokens"], output_tokens=cached["output_tokens"],
+                         latency_s=None, cache_hit=True)
+            yield cached["text"]
+            return
+        logger.info(f"Cache miss {description}.")
+
+    estimated = estimate_tokens(prompt)
+    stats = {"retries": 0}
+    start = time.perf_counter()
+    first_token_at = None
+    parts = []
+    stream, error = None, None
+    try:
+        # The request (and its first chunk) is retried like any other call;
+        # an error after text has been yielded can't be, and propagates. The
+        # request stays in flight until the stream is read, so it keeps its
+        # concurrency slot until then.
+        stream = llm_client.call(lambda: backend.stream(prompt), estimated, description, stats, keep_slot=True)
+        for piece in stream:
+            if first_token_at is None:
+                first_token_at = time.perf_counter() - start
+            parts.append(piece)
+            yield piece
+    except BaseException as e:
+        # GeneratorExit included: the consumer stopped reading, e.g. a rerun
+        # or cancel abandoning st.write_stream.
+        error = type(e).__name__
+        raise
+    finally:
+        if stream is not None:
+            llm_client.concurrency.release()
+        elapsed = time.perf_counter() - start
+        usage = stream.usage if stream is not None else None
+        _record_call(flow, topic, prompt_tokens=usage.prompt_tokens if usage else None,
+                     output_tokens=usage.output_tokens if usage else None, latency_s=elapsed, cache_hit=False,
+                     retries=stats["retries"], ttft_s=first_token_at, error=error)
+        ttft = f"{first_token_at:.2f}s" if first_token_at is not None else "n/a"
+        if error is not None:
+            logger.warning(
+                f"Stream stopped ({error}) {description} after {len(parts)} pieces "
+                f"(first token after {ttft}, stopped after {elapsed:.2f}s); not caching it."
+            )
+        else:
+            _log_estimate(estimated, usage.prompt_tokens)
+            logger.info(
+                f"Used {usage.prompt_tokens} input and {usage.output_tokens} output tokens {description} "
+                f"(streamed; first token after {ttft}, done after {elapsed:.2f}s)."
+            )
+            if not stream.complete:
+                logger.warning(f"Stream ended early ({stream.finish_reason}) {description}; not caching it.")
+            elif LLM_CACHE_ENABLED:
+                _llm_cache().put(MODEL_NAME, prompt, "".join(parts), usage.prompt_tokens, usage.output_tokens)
+
+
+def plan_run(flow: str, topic: str | None = None) -> RunPlanner:
+    """ETA / sample-size planner for flow ("state_of_the_art" or
+    "custom_question") under the configured quota, concurrency and chunk
+    budgets, calibrated from the flow's telemetry — see run_planner.py."""
+    return RunPlanner(
+        load_profile(_telemetry_store(), flow, topic),
+        chunk_token_budget=CHUNK_TOKEN_BUDGET,
+        max_papers_per_chunk=RECORDS_PER_CHUNK if flow == "state_of_the_art" else None,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        tokens_per_minute=TOKENS_PER_MINUTE,
+        max_concurrency=MAX_CONCURRENT_REQUESTS,
+        reduce_token_budget=REDUCE_TOKEN_BUDGET,
+        reduce_fan_in=REDUCE_FAN_IN,
+    )
+
+
+def _run_chunk(fn: Callable[[T], object], chunk, index: int, job=None):
+    """Runs fn(chunk) with its chunk index set for telemetry — inside the
+    pool thread, since workers don't inherit the submitter's context. With a
+    background job, chunks still queued when it's cancelled are skipped and
+    finished ones count towards its progress."""
+    if job is not None:
+        job.check()
+    with telemetry.chunk(index):
+        result = fn(chunk)
+    if job is not None:
+        job.advance()
+    return result
 
 
 def run_chunked_extraction(
     df: pd.DataFrame,
-    extract_fn: Callable[[pd.DataFrame], str],
-    chunk_size: int = CHUNK_SIZE,
-    sleep_seconds: int = SLEEP_SECONDS,
-) -> list[str]:
-    """Splits df into row-chunks and calls extract_fn(chunk) once per chunk,
-    sleeping between calls (never after the last one) to respect API rate
-    limits. Shared by the State of the Art and Custom Question flows, which
-    only differ in which extract_fn they pass in."""
-    chunks = [df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size)]
-    chunks = [c for c in chunks if not c.empty]
-    results = []
-    for i, chunk in enumerate(chunks):
-        results.append(extract_fn(chunk))
-        if i < len(chunks) - 1:
-            time.sleep(sleep_seconds)
+    extract_fn: Callable[[pd.DataFrame], T],
+    token_budget: int = CHUNK_TOKEN_BUDGET,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+    checkpoint: str | None = None,
+    max_papers: int | None = None,
+) -> list[T]:
+    """Packs df into chunks of at most token_budget estimated tokens (and
+    max_papers papers, if given) and calls extract_fn(chunk) once per chunk, up to max_workers chunks at a
+    time; each call waits on the shared rate limiter rather than a fixed
+    sleep. Results come back in chunk order, so the synthesis step sees the
+    same ordering as a serial run. Shared by the State of the Art and Custom
+    Question flows, which only differ in which extract_fn they pass in.
+
+    With a checkpoint run key, each chunk's (JSON-serializable) result is
+    saved as it completes and reused on the next run with the same key. A
+    failing chunk doesn't cancel the others: every chunk gets its chance
+    to finish and checkpoint before the first error is re-raised.
+
+    Inside a background job (see analysis_jobs.py), reports per-chunk
+    progress; cancelling skips the queued chunks, lets in-flight ones
+    finish and checkpoint, then raises JobCancelled."""
+    chunks = chunk_by_token_budget(df, token_budget, max_papers)
+    if not chunks:
+        return []
+
+    keys = [chunk_fingerprint(chunk["ID"]) for chunk in chunks]
+    done = _chunk_checkpoints().get(checkpoint) if checkpoint else {}
+    results = [done.get(key) for key in keys]
+    pending = [i for i, key in enumerate(keys) if key not in done]
+    if len(pending) < len(chunks):
+        logger.info(f"Resuming {checkpoint}: {len(chunks) - len(pending)} of {len(chunks)} chunks already done.")
+    job = current_job()
+    if job is not None:
+        job.set_stage(job.stage, total=len(chunks), done=len(chunks) - len(pending))
+
+    errors = []
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            futures = {pool.submit(_run_chunk, extract_fn, chunks[i], i, job): i for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except JobCancelled:
+                    continue
+                except Exception as e:
+                    logger.error(f"Chunk {i + 1}/{len(chunks)} failed: {e}")
+                    errors.append(e)
+                    continue
+                if checkpoint:
+                    _chunk_checkpoints().put(checkpoint, keys[i], results[i])
+
+    if job is not None and job.cancelled:
+        raise JobCancelled()
+    if errors:
+        if checkpoint:
+            logger.error(
+                f"{len(errors)} of {len(chunks)} chunks failed; the rest are checkpointed under {checkpoint} "
+                "and will be reused when the run is retried."
+            )
+        raise errors[0]
+    if checkpoint:
+        _chunk_checkpoints().clear(checkpoint)
     return results
 
 
-def summarize_topic_evolution(df: pd.DataFrame, topic_name) -> str:
+def group_by_token_budget(texts: list[str], token_budget: int, fan_in: int | None = None) -> list[list[str]]:
+    """Greedily packs consecutive texts into groups of at most token_budget
+    estimated tokens and (if given) fan_in texts. A group always takes at
+    least two texts when more remain, so every reduce level shrinks the list
+    even when single texts run over budget."""
+    groups, group, used = [], [], 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        full = used + tokens > token_budget or (fan_in is not None and len(group) >= fan_in)
+        if full and len(group) >= 2:
+            groups.append(group)
+            group, used = [], 0
+        group.append(text)
+        used += tokens
+    if group:
+        groups.append(group)
+    return groups
+
+
+def tree_reduce(
+    texts: list[str],
+    merge_fn: Callable[[list[str]], str],
+    token_budget: int = REDUCE_TOKEN_BUDGET,
+    fan_in: int = REDUCE_FAN_IN,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+) -> list[str]:
+    """Merges texts level by level until what's left fits one final
+    synthesis prompt, and returns that. The first level packs the raw
+    extracts by token budget only (they're many and small); later levels
+    also cap each merge at fan_in partials. Groups within a level run
+    concurrently, in order. Inside a background job, each level is a
+    progress stage and cancellation stops between merges."""
+    job = current_job()
+    level = 0
+    while True:
+        groups = group_by_token_budget(texts, token_budget, fan_in if level else None)
+        if len(groups) <= 1:
+            return texts
+        level += 1
+        logger.info(f"Reduce level {level}: merging {len(texts)} texts in {len(groups)} groups.")
+        if job is not None:
+            job.check()
+            job.set_stage(f"Merging notes (level {level})", total=len(groups))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups)))) as pool:
+            texts = list(pool.map(_run_chunk, [merge_fn] * len(groups), groups, range(len(groups)), [job] * len(groups)))
+
+
+def summarize_topic_evolution(df: pd.DataFrame, topic_name, use_cache: bool = True, stream: bool = False) -> str | Iterator[str]:
     """
     Summarize how the topic evolved over time using top 3 papers per year.
     Assumes df contains: title, abstract, year
@@ -61,6 +541,9 @@ def summarize_topic_evolution(df: pd.DataFrame, topic_name) -> str:
     window at typical abstract lengths — and chunking would break the
     by-year narrative that's the point of this summary (a flat row-chunker
     would split individual years across calls).
+
+    stream=True returns an iterator of text pieces (see _generate_stream)
+    instead of the finished string.
     """
     if len(df) > 200:
         logger.warning(
@@ -69,15 +552,6 @@ def summarize_topic_evolution(df: pd.DataFrame, topic_name) -> str:
             "may be less detailed than usual."
         )
 
-    yearly_chunks = []
-    for year in sorted(df["year"].unique()):
-        papers = df[df["year"] == year]
-        abstracts = "\n\n".join(
-            f"Title: {row['title']}\nAbstract: {row['Abstract']}"
-            for _, row in papers.iterrows()
-        )
-        yearly_chunks.append(f"--- Year: {year} ---\n{abstracts}")
-
     prompt = f"""
     You are a machine learning expert. Analyze the following abstracts of research papers organized by year.
 
@@ -87,62 +561,118 @@ def summarize_topic_evolution(df: pd.DataFrame, topic_name) -> str:
 
     Don't create a detailed summary but rather a high-level overview of how the topic has evolved over time.
 
-    {chr(10).join(yearly_chunks)}
+    {yearly_sections(df)}
     """
 
-    response = model.generate_content(prompt)
-    tokens_in = response.usage_metadata.prompt_token_count
-    tokens_out = response.usage_metadata.candidates_token_count
-
-    logger.info(f"Used {tokens_in} input and {tokens_out} output tokens while generating topic evaluation summary for {topic_name}.")
+    generate = _generate_stream if stream else _generate
+    return generate(prompt, f"while generating topic evaluation summary for {topic_name}", use_cache=use_cache,
+                    flow="topic_evolution", topic=topic_name)
 
-    return response.text
 
-
-def extract_key_points_state_of_art(df: pd.DataFrame, cutoff_year: int, topic_name: str) -> str:
+def extract_paper_records(df: pd.DataFrame, topic_name: str, model_version: str = EXTRACTION_MODEL_VERSION, use_cache: bool = True) -> dict[str, dict]:
     """
-    Extract key points from papers for state of the art analysis.
-    Lightweight extraction to stay under token limits.
+    Extract a compact structured record (key claims, techniques, benchmarks,
+    limitations) for every paper in df with one LLM call, and store them in
+    the per-paper store. Returns the records that parsed; papers the model
+    skipped or mangled stay unextracted and are retried on the next run (a
+    response that doesn't parse at all is never cached, see _generate).
     """
-    papers_text = "\n\n".join(
-        f"Title: {row['title']}\nAbstract: {row['Abstract']}"
-        for _, row in df.iterrows()
-    )
+    papers_text = join_papers(df, with_id=True)
 
     prompt = f"""
-    Extract key research points from these papers (after year {cutoff_year}) in concise bullet format:
+    For each paper below, extract a compact structured record of what its abstract says.
 
-    - Core hypotheses and ideas
-    - Novel techniques or discoveries
-    - Limitations and open questions
-    - Trade-offs in approaches
-    - Shared assumptions or constraints
-    - Convergence, redundancy, or saturation signs
-    - Competing directions or disagreements
-    - Benchmarks used
-    - Under-explored angles
+    Respond with only a JSON array containing one object per paper, in this exact shape:
+    {{"id": "<the paper's ID exactly as given>", "key_claims": [], "techniques": [], "benchmarks": [], "limitations": []}}
 
-    Be concise. Output only organized bullet points.
+    - key_claims: core hypotheses, findings or ideas
+    - techniques: novel methods, models or discoveries
+    - benchmarks: datasets, benchmarks or evaluation setups used
+    - limitations: stated limitations, trade-offs or open questions
+
+    Use at most 3 short phrases per list, each under 15 words. Use [] when the abstract doesn't say.
 
     {papers_text}
     """
 
-    response = model.generate_content(prompt)
-    tokens_in = response.usage_metadata.prompt_token_count
-    tokens_out = response.usage_metadata.candidates_token_count
+    try:
+        records = _generate(prompt, f"while extracting {len(df)} paper records for {topic_name}", use_cache=use_cache,
+                            flow="state_of_the_art.extract", topic=topic_name, papers=len(df),
+                            parse=lambda text: parse_records(text, df["ID"]))
+    except ValueError as e:
+        logger.warning(f"Discarding paper-record extraction for {topic_name}: {e}")
+        return {}
+    if len(records) < len(df):
+        logger.warning(f"Model returned records for {len(records)} of {len(df)} papers for {topic_name}.")
+    _paper_store().put_many(records, model_version)
+    return records
 
-    logger.info(f"Extracted key points using {tokens_in} input and {tokens_out} output tokens for {topic_name} after {cutoff_year}.")
 
-    return response.text
+def extract_key_points_state_of_art(df: pd.DataFrame, cutoff_year: int, topic_name: str, use_cache: bool = True, compact: bool = False) -> list[str]:
+    """
+    Map step for State of the Art: one structured record per paper, reused
+    from the per-paper store across topics and cutoffs. Only papers without
+    a stored record for this model are sent to the LLM (chunked by token
+    budget as usual); use_cache=False re-extracts everything. compact=True
+    extracts from TLDRs (see compact_abstracts); those records are stored
+    separately from full-abstract ones.
+
+    Returns the rendered records in df order, ready for
+    synthesize_state_of_art. Papers still without a record are left out and
+    reported (as a job note when running as a job); if fewer than
+    MIN_RECORD_COVERAGE of the papers have one, raises JobFailed instead.
+    """
+    if compact:
+        df = compact_abstracts(df)
+    model_version = f"{EXTRACTION_MODEL_VERSION}/compact" if compact else EXTRACTION_MODEL_VERSION
+    ids = df["ID"].astype(str)
+    stored = _paper_store().get_many(ids, model_version) if use_cache else {}
+    missing = df[~ids.isin(stored.keys())]
+    logger.info(
+        f"Paper records for {topic_name} after {cutoff_year}: {len(stored)} reused, "
+        f"{len(missing)} to extract."
+    )
 
+    for records in run_chunked_extraction(
+        missing, lambda chunk: extract_paper_records(chunk, topic_name, model_version, use_cache=use_cache),
+        max_papers=RECORDS_PER_CHUNK,
+    ):
+        stored.update(records)
 
-def synthesize_state_of_art(extracted_points: list, topic_name: str, cutoff_year: int) -> str:
+    covered = int(ids.isin(stored.keys()).sum())
+    if covered < len(df):
+        message = (
+            f"{len(df) - covered} of {len(df)} papers have no extracted record and are left out of the summary."
+        )
+        logger.warning(f"{message} (topic {topic_name}, after {cutoff_year})")
+        if covered < MIN_RECORD_COVERAGE * len(df):
+            raise JobFailed(
+                f"Only {covered} of {len(df)} papers got an extracted record, too few to summarize. "
+                "Run again to retry the missing papers."
+            )
+        job = current_job()
+        if job is not None:
+            job.note(message)
+
+    return [
+        format_record(title, year, stored[pid])
+        for pid, title, year in zip(ids, df["title"], df["year"])
+        if pid in stored
+    ]
+
+
+def synthesize_state_of_art(extracted_points: list, topic_name: str, cutoff_year: int, use_cache: bool = True, stream: bool = False) -> str | Iterator[str]:
     """
-    Synthesize extracted key points into a single, comprehensive state-of-the-art summary.
+    Synthesize per-paper records into a single, comprehensive state-of-the-art summary.
+    Records that don't fit one prompt are first merged into partial notes
+    (see tree_reduce). stream=True streams only the final synthesis call.
     """
+    extracted_points = tree_reduce(
+        extracted_points, lambda group: merge_state_of_art_notes(group, topic_name, cutoff_year, use_cache=use_cache)
+    )
     joined = "\n\n---\n\n".join(extracted_points)
     prompt = f"""
-        You are an expert research analyst. Below are extracted key points from research papers released after the year {cutoff_year}.
+        You are an expert research analyst. Below are structured records (key claims, techniques, benchmarks, limitations) extracted from individual research papers released after the year {cutoff_year}.
 
         Your task is to synthesize these into a single, comprehensive summary for a researcher new to the field.
         Remove redundancy, integrate evidence and insights, and ensure your summary is well-structured and critical.
@@ -160,28 +690,46 @@ def synthesize_state_of_art(extracted_points: list, topic_name: str, cutoff_year
 
         Based on this, provide a critical synthesis: where is the field at right now? How mature is it? Is there evidence of overhype or real transformation and future directions?
 
-        Here are the extracted key points:
+        Each record describes one paper, or a merged set of papers, so cross-record patterns (convergence, disagreements, shared assumptions) are yours to find.
+
+        Here are the paper records:
         {joined}
     """
 
-    response = model.generate_content(prompt)
-    tokens_in = response.usage_metadata.prompt_token_count
-    tokens_out = response.usage_metadata.candidates_token_count
+    generate = _generate_stream if stream else _generate
+    return generate(prompt, f"while synthesizing state of the art summary for {topic_name} after {cutoff_year}", use_cache=use_cache,
+                    flow="state_of_the_art.synthesize", topic=topic_name)
 
-    logger.info(f"Used {tokens_in} input and {tokens_out} output tokens while synthesizing state of the art summary for {topic_name} after {cutoff_year}.")
 
-    return response.text
+def merge_state_of_art_notes(notes: list[str], topic_name: str, cutoff_year: int, use_cache: bool = True) -> str:
+    """
+    Intermediate reduce step: condense a group of paper records (or earlier
+    merged notes) into one set of notes for synthesize_state_of_art.
+    """
+    joined = "\n\n---\n\n".join(notes)
+    prompt = f"""
+    Below are notes on research papers released after the year {cutoff_year}: per-paper records, or notes already merged from them.
+
+    Merge them into one consolidated set of notes. These will be merged again with other notes before a final critical synthesis, so:
+    - Keep specifics: paper titles and years behind each point, named techniques, benchmarks and limitations
+    - Group related claims and techniques, and note where papers agree, overlap or contradict each other
+    - Drop only true duplicates; do not write conclusions or an overview
+
+    Output only the merged notes as bullet points.
+
+    {joined}
+    """
+
+    return _generate(prompt, f"while merging {len(notes)} state of the art notes for {topic_name} after {cutoff_year}", use_cache=use_cache,
+                     flow="state_of_the_art.merge", topic=topic_name)
 
 
-def extract_relevant_info_for_question(question: str, df: pd.DataFrame, cutoff_year: int, topic_name: str) -> str:
+def extract_relevant_info_for_question(question: str, df: pd.DataFrame, cutoff_year: int, topic_name: str, use_cache: bool = True) -> str:
     """
     Extract information relevant to answering a custom question.
     Lightweight extraction to stay under token limits.
     """
-    papers_text = "\n\n".join(
-        f"Title: {row['title']}\nAbstract: {row['Abstract']}"
-        for _, row in df.iterrows()
-    )
+    papers_text = join_papers(df)
 
     prompt = f"""
     Extract information from these papers (after year {cutoff_year}) that is relevant to answering this question: "{question}"
@@ -198,19 +746,19 @@ def extract_relevant_info_for_question(question: str, df: pd.DataFrame, cutoff_y
     {papers_text}
     """
 
-    response = model.generate_content(prompt)
-    tokens_in = response.usage_metadata.prompt_token_count
-    tokens_out = response.usage_metadata.candidates_token_count
-
-    logger.info(f"Extracted relevant info using {tokens_in} input and {tokens_out} output tokens for question '{question}' in {topic_name} after {cutoff_year}.")
-
-    return response.text
+    return _generate(prompt, f"while extracting relevant info for question '{question}' in {topic_name} after {cutoff_year}", use_cache=use_cache,
+                     flow="custom_question.extract", topic=topic_name, papers=len(df))
 
 
-def synthesize_answer_from_extracts(extracted_info: list, question: str, topic_name: str, cutoff_year: int) -> str:
+def synthesize_answer_from_extracts(extracted_info: list, question: str, topic_name: str, cutoff_year: int, use_cache: bool = True, stream: bool = False) -> str | Iterator[str]:
     """
     Synthesize extracted information into a single, comprehensive answer to the custom question.
+    Extracts that don't fit one prompt are first merged (see tree_reduce).
+    stream=True streams only the final synthesis call.
     """
+    extracted_info = tree_reduce(
+        extracted_info, lambda group: merge_question_extracts(group, question, topic_name, cutoff_year, use_cache=use_cache)
+    )
     joined = "\n\n---\n\n".join(extracted_info)
     prompt = f"""
     You are an expert research analyst. Below is extracted information from research papers released after the year {cutoff_year}.
@@ -234,11 +782,29 @@ def synthesize_answer_from_extracts(extracted_info: list, question: str, topic_n
     {joined}
     """
 
-    response = model.generate_content(prompt)
-    tokens_in = response.usage_metadata.prompt_token_count
-    tokens_out = response.usage_metadata.candidates_token_count
+    generate = _generate_stream if stream else _generate
+    return generate(prompt, f"while synthesizing answer for question '{question}' in {topic_name} after {cutoff_year}", use_cache=use_cache,
+                    flow="custom_question.synthesize", topic=topic_name)
+
+
+def merge_question_extracts(extracts: list[str], question: str, topic_name: str, cutoff_year: int, use_cache: bool = True) -> str:
+    """
+    Intermediate reduce step: condense a group of question extracts (or
+    earlier merged extracts) into one for synthesize_answer_from_extracts.
+    """
+    joined = "\n\n---\n\n".join(extracts)
+    prompt = f"""
+    Below is information extracted from research papers (after year {cutoff_year}) that is relevant to answering this question: "{question}"
+
+    Merge it into one consolidated set of bullet points. It will be merged again with other extracts before the final answer is written, so:
+    - Keep specific evidence, findings, techniques, limitations and competing perspectives, with the papers they come from
+    - Drop duplicates and anything not relevant to the question
+    - Do not answer the question yet
 
-    logger.info(f"Used {tokens_in} input and {tokens_out} output tokens while synthesizing answer for question '{question}' in {topic_name} after {cutoff_year}.")
+    Output only the merged bullet points.
 
-    return response.text
+    {joined}
+    """
 
+    return _generate(prompt, f"while merging {len(extracts)} extracts for question '{question}' in {topic_name} after {cutoff_year}", use_cache=use_cache,
+                     flow="custom_question.merge", topic=topic_name)
@@ -0,0 +1,243 @@
+"""
+LLM backends behind genai.py. Every analysis path talks to a backend through
+the same four calls — generate, stream, count_tokens and the running usage
+totals — so the live Gemini API can be swapped for FakeBackend, which
+simulates latency, token counts and 429s locally. That makes the chunked
+extraction and synthesis pipeline benchmarkable end to end on an offline
+machine without spending quota (see bench_pipeline.py).
+
+LLM_BACKEND picks the backend: "gemini" (default) or "fake".
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+
+@dataclass
+class Usage:
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+
+
+# A response that ran to its natural end. Anything else (MAX_TOKENS, SAFETY,
+# RECITATION, ...) means the text was cut short and shouldn't be reused.
+COMPLETE_FINISH_REASONS = ("STOP",)
+
+
+@dataclass
+class Generation:
+    text: str
+    usage: Usage
+    finish_reason: str | None = None
+
+    @property
+    def complete(self) -> bool:
+        return self.finish_reason in COMPLETE_FINISH_REASONS
+
+
+class TextStream:
+    """Iterates the text pieces of one streamed generation. `usage` and
+    `finish_reason` are set once iteration finishes."""
+
+    def __init__(self, pieces: Iterator[str], finish):
+        self._pieces = pieces
+        self._finish = finish
+        self.usage = None
+        self.finish_reason = None
+
+    def __iter__(self):
+        yield from self._pieces
+        self.usage, self.finish_reason = self._finish()
+
+    @property
+    def complete(self) -> bool:
+        return self.finish_reason in COMPLETE_FINISH_REASONS
+
+
+class LLMBackend:
+    """Base class: subclasses implement _generate, _stream and count_tokens.
+    Requests must be sent eagerly, so errors (429s in particular) surface
+    from generate()/stream() themselves where llm_client can retry them."""
+
+    name = "base"
+
+    def __init__(self):
+        self.usage = Usage()
+        self.calls = 0
+        self._usage_lock = threading.Lock()
+
+    def _record(self, usage: Usage) -> Usage:
+        """Adds one completed call to the running totals."""
+        with self._usage_lock:
+            self.calls += 1
+            self.usage.prompt_tokens += usage.prompt_tokens
+            self.usage.output_tokens += usage.output_tokens
+        return usage
+
+    def generate(self, prompt: str) -> Generation:
+        generation = self._generate(prompt)
+        self._record(generation.usage)
+        return generation
+
+    def stream(self, prompt: str) -> TextStream:
+        pieces, finish = self._stream(prompt)
+
+        def finish_and_record():
+            usage, finish_reason = finish()
+            return self._record(usage), finish_reason
+
+        return TextStream(pieces, finish_and_record)
+
+    def count_tokens(self, text: str) -> int:
+        raise NotImplementedError
+
+    def _generate(self, prompt: str) -> Generation:
+        raise NotImplementedError
+
+    def _stream(self, prompt: str):
+        """Returns (iterator of text pieces, fn returning (Usage, finish
+        reason) once the iterator is exhausted)."""
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai takes ~1s to import, so it's imported and the
+    model configured on the first request, not when genai.py is imported."""
+
+    def __init__(self, model_name: str, api_key: str):
+        super().__init__()
+        self.name = model_name
+        self._api_key = api_key
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self._api_key)
+                self._model = genai.GenerativeModel(self.name)
+            return self._model
+
+    @staticmethod
+    def _usage(response) -> Usage:
+        return Usage(response.usage_metadata.prompt_token_count, response.usage_metadata.candidates_token_count)
+
+    @staticmethod
+    def _finish_reason(response) -> str | None:
+        if not response.candidates:
+            return None
+        reason = response.candidates[0].finish_reason
+        return getattr(reason, "name", str(reason))
+
+    def count_tokens(self, text: str) -> int:
+        return self.model.count_tokens(text).total_tokens
+
+    def _generate(self, prompt: str) -> Generation:
+        response = self.model.generate_content(prompt)
+        return Generation(response.text, self._usage(response), self._finish_reason(response))
+
+    def _stream(self, prompt: str):
+        # stream=True already fetches the first chunk, so request errors
+        # raise here rather than mid-iteration.
+        response = self.model.generate_content(prompt, stream=True)
+
+        def pieces():
+            for chunk in response:
+                # A chunk can carry no text (e.g. only a finish reason or
+                # safety ratings); chunk.text raises on those.
+                if chunk.parts:
+                    yield chunk.text
+
+        return pieces(), lambda: (self._usage(response), self._finish_reason(response))
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline stand-in for Gemini. Each call sleeps
+    latency_seconds plus output_tokens / tokens_per_second, and fails with
+    ResourceExhausted (carrying a retry hint, like Gemini's) with
+    probability throttle_rate. Output is derived from a hash of the prompt,
+    so reruns are reproducible. Prompts asking for paper records get
+    well-formed JSON for every "ID: ..." line, so the State of the Art path
+    runs end to end too.
+    """
+
+    def __init__(
+        self,
+        name: str = "fake",
+        latency_seconds: float = 0.5,
+        output_tokens: int = 300,
+        tokens_per_second: float = 200.0,
+        throttle_rate: float = 0.0,
+        retry_after_seconds: float = 1.0,
+        chars_per_token: int = 4,
+        seed: int = 0,
+    ):
+        super().__init__()
+        self.name = name
+        self.latency_seconds = latency_seconds
+        self.output_tokens = output_tokens
+        self.tokens_per_second = tokens_per_second
+        self.throttle_rate = throttle_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.chars_per_token = chars_per_token
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def count_tokens(self, text: str) -> int:
+        return len(text) // self.chars_per_token + 1
+
+    def _maybe_throttle(self) -> None:
+        with self._rng_lock:
+            throttled = self._rng.random() < self.throttle_rate
+        if throttled:
+            from google.api_core import exceptions as google_exceptions
+
+            time.sleep(self.latency_seconds / 2)
+            raise google_exceptions.ResourceExhausted(
+                f"Fake quota exceeded. Please retry in {self.retry_after_seconds}s."
+            )
+
+    def _response_text(self, prompt: str) -> str:
+        ids = re.findall(r"^\s*ID: (.+)$", prompt, re.MULTILINE)
+        if ids and "JSON array" in prompt:
+            records = ",".join(
+                f'{{"id": "{pid}", "key_claims": ["claim {i}"], "techniques": ["technique {i}"], '
+                f'"benchmarks": [], "limitations": ["limitation {i}"]}}'
+                for i, pid in enumerate(ids)
+            )
+            return f"[{records}]"
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        words = [digest[i:i + 6] for i in range(0, len(digest), 6)]
+        return " ".join(words[i % len(words)] for i in range(self.output_tokens))
+
+    def _usage(self, prompt: str, text: str) -> Usage:
+        return Usage(self.count_tokens(prompt), self.count_tokens(text))
+
+    def _generate(self, prompt: str) -> Generation:
+        self._maybe_throttle()
+        text = self._response_text(prompt)
+        time.sleep(self.latency_seconds + self.output_tokens / self.tokens_per_second)
+        return Generation(text, self._usage(prompt, text), "STOP")
+
+    def _stream(self, prompt: str):
+        self._maybe_throttle()
+        text = self._response_text(prompt)
+        time.sleep(self.latency_seconds)
+        words = text.split(" ")
+
+        def pieces():
+            # ~10 tokens per streamed chunk, paced at tokens_per_second.
+            for i in range(0, len(words), 10):
+                time.sleep(min(10, len(words) - i) / self.tokens_per_second)
+                yield " ".join(words[i:i + 10]) + " "
+
+        return pieces(), lambda: (self._usage(prompt, text), "STOP")
@@ -0,0 +1,93 @@
+"""
+Disk-backed cache of LLM responses, keyed by model name + a hash of the full
+prompt. Re-running State of the Art or a Custom Question over the same topic,
+cutoff and paper set sends byte-identical prompts, so those runs are served
+from here instead of paying Gemini's latency and token cost again.
+
+SQLite rather than a directory of files: one file, atomic writes from the
+concurrent extraction threads, and LRU eviction is a single ORDER BY.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LLMCache:
+    """Size-bounded LRU cache. Each public call opens its own connection, so
+    one instance can be shared across threads."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    prompt_tokens INTEGER,
+                    output_tokens INTEGER,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at)")
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection per operation, committed on success."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, prompt: str) -> dict | None:
+        """Returns {"text", "prompt_tokens", "output_tokens"} or None, and
+        marks the entry as recently used."""
+        key = self.key(model, prompt)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text, prompt_tokens, output_tokens FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (time.time(), key))
+        return {"text": row[0], "prompt_tokens": row[1], "output_tokens": row[2]}
+
+    def put(self, model: str, prompt: str, text: str, prompt_tokens: int, output_tokens: int) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(model, prompt), model, text, prompt_tokens, output_tokens,
+                 len(text.encode("utf-8")), now, now),
+            )
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drops least-recently-used entries until the stored text fits in
+        max_bytes."""
+        with self._evict_lock, self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = conn.execute("SELECT key, size_bytes FROM responses ORDER BY last_used_at ASC").fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
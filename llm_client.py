@@ -0,0 +1,173 @@
+"""
+Retrying, self-throttling wrapper around model calls. A single 429 or
+transient 5xx used to abort a whole State of the Art run; now every call
+goes through LLMClient.call, which:
+
+- retries retryable errors with exponential backoff and full jitter,
+  sleeping at least as long as the server's retry hint when it gives one;
+- holds a slot in an AIMD concurrency window while the call is in flight —
+  the window halves on a 429 and grows back by ~1 slot per window's worth
+  of successes, so concurrent chunk extraction settles just under whatever
+  the API will actually take;
+- draws on the shared RateLimiter on every attempt, since a retry spends
+  quota like any other request.
+"""
+
+import random
+import re
+import threading
+import time
+
+from custom_logging import logger
+
+
+def gemini_errors() -> tuple[tuple, tuple]:
+    """(retryable, throttled) exception types for Gemini calls.
+    google.api_core is imported here, on the first model call, rather than
+    when this module is — the same as GeminiBackend.model does for the SDK."""
+    from google.api_core import exceptions as google_exceptions
+
+    throttled = (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted)
+    retryable = throttled + (
+        google_exceptions.InternalServerError,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.DeadlineExceeded,
+        ConnectionError,
+    )
+    return retryable, throttled
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """The server's suggested wait, if the error carries one: an HTTP
+    Retry-After header, a gRPC RetryInfo detail, or Gemini's "retry in Ns"
+    / "retry_delay { seconds: N }" text."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if "Retry-After" in headers:
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+    for detail in getattr(exc, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    match = re.search(r"retry in ([\d.]+)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", str(exc), re.IGNORECASE)
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+
+class AdaptiveConcurrency:
+    """Counting semaphore whose limit moves AIMD-style between min_limit and
+    max_limit. Consecutive 429s from one burst of in-flight calls only halve
+    the limit once (per decrease_cooldown seconds)."""
+
+    def __init__(self, max_limit: int, min_limit: int = 1, decrease_cooldown: float = 5.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.decrease_cooldown = decrease_cooldown
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_cooldown:
+                return
+            self._last_decrease = now
+            previous = self.limit
+            self.limit = max(self.min_limit, self.limit / 2)
+            logger.warning(f"Throttled by the model API: concurrency {previous:.1f} -> {self.limit:.1f}.")
+
+
+class LLMClient:
+    def __init__(
+        self,
+        rate_limiter,
+        max_concurrency: int,
+        max_retries: int = 6,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        retryable: tuple | None = None,
+        throttled: tuple | None = None,
+    ):
+        """retryable/throttled default to gemini_errors(), resolved on the
+        first call."""
+        self.rate_limiter = rate_limiter
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+        self.throttled = throttled
+
+    def backoff_seconds(self, attempt: int, exc: Exception) -> float:
+        """Full-jitter exponential backoff, but never shorter than the
+        server's retry hint."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hint = retry_after_seconds(exc)
+        return max(delay, hint) if hint is not None else delay
+
+    def call(self, fn, tokens: int, description: str = "", stats: dict | None = None, keep_slot: bool = False):
+        """Runs fn() (one model request of ~tokens prompt tokens) under the
+        rate limiter and concurrency window, retrying retryable errors up to
+        max_retries times. Non-retryable errors, and the last retryable one,
+        propagate. If given, stats["retries"] is kept up to date for the
+        caller's telemetry.
+
+        With keep_slot, a successful call keeps its concurrency slot and the
+        caller releases it (concurrency.release()) once it's done with the
+        result — for a stream, once it has been read, since the request is
+        in flight until then."""
+        if self.retryable is None or self.throttled is None:
+            retryable, throttled = gemini_errors()
+            self.retryable = retryable if self.retryable is None else self.retryable
+            self.throttled = throttled if self.throttled is None else self.throttled
+        for attempt in range(self.max_retries + 1):
+            if stats is not None:
+                stats["retries"] = attempt
+            self.concurrency.acquire()
+            keep = False
+            try:
+                waited = self.rate_limiter.acquire(tokens)
+                if waited > 1:
+                    logger.info(f"Waited {waited:.1f}s for rate-limit quota before calling the model.")
+                result = fn()
+            except self.retryable as e:
+                if isinstance(e, self.throttled):
+                    self.concurrency.on_throttle()
+                if attempt == self.max_retries:
+                    logger.error(f"Giving up after {attempt + 1} attempts {description}: {e}")
+                    raise
+                delay = self.backoff_seconds(attempt, e)
+                logger.warning(
+                    f"{type(e).__name__} {description}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s."
+                )
+            else:
+                self.concurrency.on_success()
+                keep = keep_slot
+                return result
+            finally:
+                if not keep:
+                    self.concurrency.release()
+            time.sleep(delay)
@@ -11,10 +11,12 @@ import mcp.server.stdio
 import mcp.types as types
 from dotenv import load_dotenv
 
-from neo4j_operations_mcp import (
+from neo4j_operations_async import (
     load_data_if_missing,
-    run_query,
+    close_driver,
     create_topic_subgraph,
+    get_topic_paper_count,
+    get_all_topic_names,
     get_top_papers_per_year,
     get_year_wise_distribution,
     get_top_papers_overall,
@@ -22,10 +24,17 @@ from neo4j_operations_mcp import (
     search_papers_in_topic,
     get_cited_by,
     get_cites,
-    find_similar_topic,
+    get_abstracts,
     get_schema,
     run_cypher,
 )
+from cypher_queries import (
+    ABSTRACT_PREVIEW_CHARS,
+    CYPHER_DEFAULT_MAX_ROWS,
+    CYPHER_MAX_ESTIMATED_ROWS,
+    CYPHER_ROW_LIMIT,
+    CYPHER_TIMEOUT_SECONDS,
+)
 
 load_dotenv()
 
@@ -33,7 +42,10 @@ server = Server("researchquest")
 
 
 def _format_papers(papers: list[dict]) -> str:
-    """Format a list of paper dicts into readable markdown."""
+    """Format a list of paper dicts into readable markdown. Shows at most
+    ABSTRACT_PREVIEW_CHARS of each abstract, so tools fetch papers with
+    fields="truncated" and the cut happens in Neo4j instead of after the
+    full text has crossed Bolt (get_abstracts returns the full text)."""
     if not papers:
         return "No papers found."
     lines = []
@@ -43,7 +55,10 @@ def _format_papers(papers: list[dict]) -> str:
         lines.append(f"   - ID: {p.get('id', '')}")
         lines.append(f"   - URL: {p.get('url', '')}")
         abstract = p.get('abstract', '') or ''
-        lines.append(f"   - Abstract: {abstract[:300]}{'...' if len(abstract) > 300 else ''}")
+        lines.append(
+            f"   - Abstract: {abstract[:ABSTRACT_PREVIEW_CHARS]}"
+            f"{'...' if len(abstract) > ABSTRACT_PREVIEW_CHARS else ''}"
+        )
         lines.append("")
     return "\n".join(lines)
 
@@ -199,6 +214,25 @@ async def handle_list_tools() -> list[types.Tool]:
                 "required": ["paper_id"]
             }
         ),
+        types.Tool(
+            name="get_abstracts",
+            description=(
+                "Get the full, untruncated abstracts for specific papers. "
+                f"Other tools only show the first {ABSTRACT_PREVIEW_CHARS} characters of each abstract — "
+                "call this for the papers you actually need to read closely."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "paper_ids": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Paper IDs (from id field in other tool results)"
+                    }
+                },
+                "required": ["paper_ids"]
+            }
+        ),
         types.Tool(
             name="research_topic",
             description=(
@@ -263,7 +297,11 @@ async def handle_list_tools() -> list[types.Tool]:
                 "Use this for ad-hoc questions not covered by other tools: "
                 "aggregate stats, cross-property filters, custom ranking, graph metrics. "
                 "ALWAYS call get_schema first to know node labels, properties, and indexes. "
-                "Only MATCH/CALL/RETURN/WITH/UNWIND/SHOW are allowed — write clauses will be rejected."
+                "Only MATCH/CALL/RETURN/WITH/UNWIND/SHOW are allowed — write clauses will be rejected. "
+                f"Every query is EXPLAINed first: plans estimated above {CYPHER_MAX_ESTIMATED_ROWS:,} rows "
+                f"(cartesian products, unbounded variable-length paths) are rejected. Queries time out after "
+                f"{CYPHER_TIMEOUT_SECONDS}s and stop at max_rows rows server-side; elapsed time is reported, and db hits "
+                "too when profile is true."
             ),
             inputSchema={
                 "type": "object",
@@ -276,6 +314,16 @@ async def handle_list_tools() -> list[types.Tool]:
                         "type": "object",
                         "description": "Optional query parameters as key-value pairs",
                         "default": {}
+                    },
+                    "max_rows": {
+                        "type": "integer",
+                        "description": f"Maximum rows to return (capped at {CYPHER_ROW_LIMIT}); extra rows are cut off and the result is marked truncated",
+                        "default": CYPHER_DEFAULT_MAX_ROWS
+                    },
+                    "profile": {
+                        "type": "boolean",
+                        "description": "Run with PROFILE and report db hits (slower; use when tuning a query)",
+                        "default": False
                     }
                 },
                 "required": ["query"]
@@ -295,13 +343,11 @@ async def handle_call_tool(
         topic_name = args["topic_name"]
         strict_mode = args.get("strict_mode", True)
 
-        load_data_if_missing()
+        await load_data_if_missing()
         graph_name = f"subgraph_{topic_name.replace(' ', '_')}"
-        create_topic_subgraph(topic_query, topic_name, graph_name, strict_mode)
+        await create_topic_subgraph(topic_query, topic_name, graph_name, strict_mode)
 
-        count = run_query(
-            f"MATCH (p:Paper) WHERE p.pageRank_{topic_name} IS NOT NULL RETURN count(p) AS count"
-        )[0]["count"]
+        count = await get_topic_paper_count(topic_name)
 
         return [types.TextContent(type="text", text=(
             f"Subgraph '{graph_name}' created for topic '{topic_name}'.\n"
@@ -312,23 +358,14 @@ async def handle_call_tool(
         ))]
 
     elif name == "list_active_topics":
-        results = run_query("""
-            MATCH (p:Paper)
-            WITH keys(p) AS props
-            UNWIND props AS prop
-            WITH prop WHERE prop STARTS WITH 'pageRank_'
-            RETURN DISTINCT prop AS property
-        """)
+        topic_names = await get_all_topic_names()
 
-        if not results:
+        if not topic_names:
             return [types.TextContent(type="text", text="No topics built yet. Use create_research_subgraph first.")]
 
+        counts = await asyncio.gather(*(get_topic_paper_count(t) for t in topic_names))
         lines = ["# Active Topics\n"]
-        for row in results:
-            topic_name = row["property"].replace("pageRank_", "")
-            count = run_query(
-                f"MATCH (p:Paper) WHERE p.{row['property']} IS NOT NULL RETURN count(p) AS count"
-            )[0]["count"]
+        for topic_name, count in zip(topic_names, counts):
             lines.append(f"- **{topic_name}** ({count} papers) — use as topic_name in other tools")
 
         return [types.TextContent(type="text", text="\n".join(lines))]
@@ -338,7 +375,7 @@ async def handle_call_tool(
         from_year = args.get("from_year", 2020)
         papers_per_year = args.get("papers_per_year", 10)
 
-        papers = get_top_papers_per_year(topic_name, from_year, papers_per_year)
+        papers = await get_top_papers_per_year(topic_name, from_year, papers_per_year, fields="truncated")
         if not papers:
             return [types.TextContent(type="text", text=f"No papers found for topic '{topic_name}' from {from_year}. Does this topic exist? Try list_active_topics.")]
 
@@ -357,7 +394,7 @@ async def handle_call_tool(
 
     elif name == "get_year_distribution":
         topic_name = args["topic_name"]
-        data = get_year_wise_distribution(topic_name)
+        data = await get_year_wise_distribution(topic_name)
 
         if not data:
             return [types.TextContent(type="text", text=f"No data for topic '{topic_name}'.")]
@@ -376,7 +413,7 @@ async def handle_call_tool(
         limit = args.get("limit", 100)
         offset = args.get("offset", 0)
 
-        papers = get_top_papers_overall(topic_name, year_cutoff, limit, offset)
+        papers = await get_top_papers_overall(topic_name, year_cutoff, limit, offset, fields="truncated")
         if not papers:
             return [types.TextContent(type="text", text=f"No papers found for topic '{topic_name}' after {year_cutoff} at offset {offset}.")]
 
@@ -392,7 +429,7 @@ async def handle_call_tool(
         limit = args.get("limit", 50)
         offset = args.get("offset", 0)
 
-        papers = search_papers(query, limit, offset)
+        papers = await search_papers(query, limit, offset, fields="truncated")
         if not papers:
             return [types.TextContent(type="text", text=f"No results for query '{query}'.")]
 
@@ -405,7 +442,7 @@ async def handle_call_tool(
         limit = args.get("limit", 50)
         offset = args.get("offset", 0)
 
-        papers = search_papers_in_topic(topic_name, keyword, limit, offset)
+        papers = await search_papers_in_topic(topic_name, keyword, limit, offset, fields="truncated")
         if not papers:
             return [types.TextContent(type="text", text=f"No results for '{keyword}' within topic '{topic_name}'.")]
 
@@ -418,7 +455,7 @@ async def handle_call_tool(
         sort_by = args.get("sort_by", "pagerank")
         topic_name = args.get("topic_name")
 
-        papers = get_cited_by(paper_id, limit, sort_by, topic_name)
+        papers = await get_cited_by(paper_id, limit, sort_by, topic_name, fields="truncated")
         if not papers:
             return [types.TextContent(type="text", text=f"No citing papers found for ID '{paper_id}'.")]
 
@@ -431,7 +468,7 @@ async def handle_call_tool(
 
     elif name == "get_cites":
         paper_id = args["paper_id"]
-        papers = get_cites(paper_id)
+        papers = await get_cites(paper_id, fields="truncated")
 
         if not papers:
             return [types.TextContent(type="text", text=f"No references found for paper ID '{paper_id}'.")]
@@ -439,6 +476,22 @@ async def handle_call_tool(
         header = f"# References of '{paper_id}' ({len(papers)} papers)\n"
         return [types.TextContent(type="text", text=header + "\n" + _format_papers(papers))]
 
+    elif name == "get_abstracts":
+        paper_ids = args["paper_ids"]
+        abstracts = await get_abstracts(paper_ids)
+
+        if not abstracts:
+            return [types.TextContent(type="text", text="No papers found for the given IDs.")]
+
+        lines = [f"# Abstracts ({len(abstracts)} of {len(paper_ids)} papers found)\n"]
+        for paper_id in paper_ids:
+            if paper_id in abstracts:
+                lines.append(f"## {paper_id}")
+                lines.append(abstracts[paper_id] or "(no abstract)")
+                lines.append("")
+
+        return [types.TextContent(type="text", text="\n".join(lines))]
+
     elif name == "research_topic":
         topic_name = args["topic_name"]
         search_terms = args["search_terms"]
@@ -447,12 +500,12 @@ async def handle_call_tool(
         offset = args.get("offset", 0)
         strict_mode = args.get("strict_mode", False)
 
-        load_data_if_missing()
+        await load_data_if_missing()
 
         # Check if a similar topic already exists
         # TODO fix matched topic
         matched_topic = None
-        # matched_topic = find_similar_topic(topic_name, search_terms)
+        # matched_topic = await find_similar_topic(topic_name, search_terms)
 
         if matched_topic:
             used_topic = matched_topic
@@ -461,18 +514,16 @@ async def handle_call_tool(
             # Build Lucene OR query from all search terms
             lucene_query = " OR ".join(f'"{t}"' for t in search_terms)
             graph_name = f"subgraph_{topic_name}"
-            create_topic_subgraph(lucene_query, topic_name, graph_name, strict_mode)
+            await create_topic_subgraph(lucene_query, topic_name, graph_name, strict_mode)
             used_topic = topic_name
             provenance = (
                 f"Created new subgraph **'{topic_name}'** using query: `{lucene_query}`\n"
                 f"Mode: {'Strict' if strict_mode else 'Relaxed'}"
             )
 
-        papers = get_top_papers_overall(used_topic, year_cutoff, limit, offset)
+        papers = await get_top_papers_overall(used_topic, year_cutoff, limit, offset, fields="truncated")
 
-        count = run_query(
-            f"MATCH (p:Paper) WHERE p.pageRank_{used_topic} IS NOT NULL RETURN count(p) AS count"
-        )[0]["count"]
+        count = await get_topic_paper_count(used_topic)
 
         if not papers:
             return [types.TextContent(type="text", text=(
@@ -490,7 +541,7 @@ async def handle_call_tool(
         return [types.TextContent(type="text", text=header + "\n" + _format_papers(papers))]
 
     elif name == "get_schema":
-        schema = get_schema()
+        schema = await get_schema()
 
         lines = ["# Graph Schema\n"]
 
@@ -532,16 +583,26 @@ async def handle_call_tool(
     elif name == "run_cypher":
         query = args["query"]
         params = args.get("params", {})
+        max_rows = args.get("max_rows", CYPHER_DEFAULT_MAX_ROWS)
+        profile = bool(args.get("profile", False))
 
         try:
-            results = run_cypher(query, params)
+            outcome = await run_cypher(query, params, max_rows=max_rows, profile=profile)
         except ValueError as e:
             return [types.TextContent(type="text", text=f"Query rejected: {e}")]
         except Exception as e:
             return [types.TextContent(type="text", text=f"Query error: {e}")]
 
+        results = outcome["rows"]
+        db_hits = f" | DB hits: {outcome['db_hits']:,}" if outcome["db_hits"] is not None else ""
+        stats = (
+            f"Elapsed: {outcome['elapsed_ms']} ms{db_hits} | "
+            f"Planner estimate: ~{outcome['estimated_rows']:,.0f} rows"
+        )
+        notes = "".join(f"\n⚠️ {w}" for w in outcome["warnings"])
+
         if not results:
-            return [types.TextContent(type="text", text="Query returned no results.")]
+            return [types.TextContent(type="text", text=f"Query returned no results.\n{stats}{notes}")]
 
         # Render as a markdown table
         headers = list(results[0].keys())
@@ -556,7 +617,15 @@ async def handle_call_tool(
         )
 
         table = f"```\n{header_row}\n{sep_row}\n{data_rows}\n```"
-        return [types.TextContent(type="text", text=f"# Query Results ({len(results)} rows)\n\n{table}")]
+        if outcome["truncated"]:
+            notes += (
+                f"\n⚠️ Truncated: showing the first {len(results)} rows only. "
+                "Add a LIMIT/aggregation or raise max_rows if you need more."
+            )
+        return [types.TextContent(type="text", text=(
+            f"# Query Results ({len(results)}{'+' if outcome['truncated'] else ''} rows)\n\n"
+            f"{table}\n{stats}{notes}"
+        ))]
 
     else:
         raise ValueError(f"Unknown tool: {name}")
@@ -685,19 +754,22 @@ async def handle_get_prompt(name: str, arguments: dict | None) -> types.GetPromp
 
 
 async def main():
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="researchquest",
-                server_version="0.2.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="researchquest",
+                    server_version="0.2.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        await close_driver()
 
 
 if __name__ == "__main__":
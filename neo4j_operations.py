@@ -5,26 +5,90 @@ from pprint import pformat
 import csv
 import time
 import re
-from tqdm import tqdm
 import json
+import functools
+import inspect
+
+from cypher_queries import (
+    DELETE_TOPIC_STATS_QUERY,
+    STATS_TOP_PAPERS_PREFIX,
+    TOPIC_STATS_CONSTRAINT_QUERY,
+    TOPIC_STATS_QUERY,
+    TOPIC_STATS_TOP_K,
+    abstract_projection,
+    write_topic_stats_query,
+)
+
+# One driver (and connection pool) per process, shared by every browser
+# session and rerun instead of being re-created per import or per session.
+# execute_read/execute_write retry transient failures (leader switches,
+# dropped connections) for up to max_transaction_retry_time seconds before
+# giving up.
+#
+# The bookmark manager is shared by every session so reads see earlier writes
+# (causal consistency): with a neo4j:// URI, read sessions are routed to
+# replicas, and without this a read right after create_topic_subgraph could
+# hit a replica that hasn't applied the new pageRank property yet.
+@st.cache_resource(show_spinner=False)
+def _driver():
+    secrets = st.secrets["neo4j"]
+    driver = GraphDatabase.driver(
+        secrets["uri"], auth=(secrets["user"], secrets["password"]),
+        connection_timeout=300, max_transaction_retry_time=30,
+    )
+    return driver, GraphDatabase.bookmark_manager()
 
-# Load Neo4j credentials from Streamlit secrets
-uri = st.secrets["neo4j"]["uri"]
-user = st.secrets["neo4j"]["user"]
-password = st.secrets["neo4j"]["password"]
 
+# Records are pulled off the wire in batches of this many as a result is
+# iterated, so the driver never buffers a whole 5000-paper result up front.
+FETCH_SIZE = 1000
+
+
+def _session(**config):
+    driver, bookmark_manager = _driver()
+    return driver.session(bookmark_manager=bookmark_manager, **config)
+
+
+def run_read_query(query, params=None):
+    """Runs a read in a managed read transaction: routable to a read replica
+    and retried automatically on transient failures."""
+    with _session() as session:
+        return session.execute_read(lambda tx: [record.data() for record in tx.run(query, params or {})])
+
+
+def run_write_query(query, params=None):
+    """Runs a write (index creation, GDS projection/PageRank writes) in a
+    managed write transaction, retried automatically on transient failures."""
+    with _session() as session:
+        return session.execute_write(lambda tx: [record.data() for record in tx.run(query, params or {})])
+
+
+def run_query_columns(query, params=None, fetch_size=FETCH_SIZE):
+    """Streams a result straight into {column: [values]} — the shape
+    pd.DataFrame builds from without an intermediate dict per row. The
+    row-of-dicts path (run_read_query + DataFrame) held several full copies of
+    every abstract at once on large State of the Art fetches.
+
+    Column keys come from the result header, so an empty result still
+    yields a frame with the expected columns. Runs as a managed read
+    transaction — a retry just rebuilds the columns from scratch."""
+    def collect(tx):
+        result = tx.run(query, params or {})
+        keys = result.keys()
+        columns = {key: [] for key in keys}
+        appends = [columns[key].append for key in keys]
+        for record in result:
+            for append, value in zip(appends, record.values()):
+                append(value)
+        return columns
+
+    with _session(fetch_size=fetch_size) as session:
+        return session.execute_read(collect)
 
-# Initialize Neo4j Driver
-driver = GraphDatabase.driver(uri, auth=(user, password), connection_timeout=300)
 
-def run_query(query, params=None):
-    with driver.session() as session:
-        result = session.run(query, params or {})
-        return [record.data() for record in result]
-    
 # Helper to execute a query in batch
 def run_batch_query(query, rows):
-    with driver.session() as session:
+    with _session() as session:
         session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
     
 
@@ -35,8 +99,8 @@ def check_data_presence():
     # every one of the ~4.5M relationships (~2.3s measured). LIMIT 1 stops at
     # the first match instead (~0.3s measured) — this function only needs to
     # know presence/absence, not the exact number.
-    has_node = len(run_query("MATCH (n:Paper) RETURN n LIMIT 1")) > 0
-    has_edge = len(run_query("MATCH (:Paper)-[r:CITES]->(:Paper) RETURN r LIMIT 1")) > 0
+    has_node = len(run_read_query("MATCH (n:Paper) RETURN n LIMIT 1")) > 0
+    has_edge = len(run_read_query("MATCH (:Paper)-[r:CITES]->(:Paper) RETURN r LIMIT 1")) > 0
 
     logger.info(f"Has nodes: {has_node}, Has edges: {has_edge}")
     return has_node and has_edge
@@ -53,9 +117,13 @@ def load_nodes_in_batches(csv_file_path, batch_size=500):
         citationCount: toInteger(row.citationCount),
         url: row.url,
         pageRank: toFloat(row.pageRank),
-        abstract: row.abstract
+        abstract: row.abstract,
+        // Empty (or, in older CSVs, missing) tldr leaves the property unset
+        tldr: CASE WHEN row.tldr <> '' THEN row.tldr END
     })
     """
+    from tqdm import tqdm  # only needed for the one-off bulk load
+
     with open(csv_file_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         batch = []
@@ -71,8 +139,7 @@ def create_index_on_paper_id():
     query = """
     CREATE INDEX paper_id_index IF NOT EXISTS FOR (p:Paper) ON (p.id);
     """
-    with driver.session() as session:
-        session.run(query)
+    run_write_query(query)
     print("✅ Index on Paper.id created (or already exists).")
 
 
@@ -89,8 +156,10 @@ def remove_duplicate_nodes():
     DETACH DELETE toDelete
     } IN TRANSACTIONS OF 100 ROWS
     """
-    with driver.session() as session:
-        session.run(query)
+    # CALL { ... } IN TRANSACTIONS manages its own transactions, so it has
+    # to run auto-commit (session.run) rather than through execute_write.
+    with _session() as session:
+        session.run(query).consume()
     print("✅ Removed duplicate nodes with same id")
 
 
@@ -101,6 +170,8 @@ def load_edges_in_batches(csv_file_path, batch_size=500):
     MATCH (target:Paper {id: row.target_id})
     CREATE (source)-[:CITES]->(target)
     """
+    from tqdm import tqdm
+
     with open(csv_file_path, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         batch = []
@@ -123,10 +194,14 @@ def remove_duplicate_edges():
     DELETE redundant
     } IN TRANSACTIONS OF 100 ROWS
     """
-    with driver.session() as session:
-        session.run(query)
+    # Auto-commit for the same reason as remove_duplicate_nodes.
+    with _session() as session:
+        session.run(query).consume()
     print("✅ Removed duplicate CITES edges")
 
+# Process-wide: the presence check runs once per server process rather than
+# once per browser session. A failed load raises, so it isn't cached.
+@st.cache_resource(show_spinner="Checking the citation graph...")
 def load_data_if_missing():
     if not check_data_presence():
         logger.info("No data found. Importing nodes and edges...")
@@ -146,13 +221,16 @@ def load_data_if_missing():
         logger.info("Data already exists in Neo4j.")
 
 
-def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships):
-
+@st.cache_resource(show_spinner=False)
+def ensure_fulltext_index():
+    """Creates the abstract fulltext index if it's missing and waits for it
+    to come online. Cached process-wide, so only the first subgraph build
+    after startup pays the SHOW INDEXES round trip."""
     index_check = '''
     SHOW FULLTEXT INDEXES WHERE name = "paperAbstractIndex"
     '''
 
-    check_index_results = run_query(index_check)
+    check_index_results = run_read_query(index_check)
     logger.info(f"Checking if fulltext index exists: {len(check_index_results)>0}")
 
     if len(check_index_results) == 0 :
@@ -160,7 +238,7 @@ def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships)
         create_index_query = '''
         CREATE FULLTEXT INDEX paperAbstractIndex FOR (p:Paper) ON EACH [p.label, p.abstract];
         '''
-        logger.info(pformat(run_query(create_index_query)))
+        logger.info(pformat(run_write_query(create_index_query)))
         # CREATE FULLTEXT INDEX only kicks off background population — it
         # doesn't wait for the index to finish. Querying it immediately
         # (as gds.graph.project.cypher does below, via db.index.fulltext.queryNodes)
@@ -168,7 +246,11 @@ def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships)
         # time" over a graph this size (~1.1M nodes' abstract text), so block
         # here until it's actually usable.
         logger.info("Waiting for fulltext index to come online...")
-        run_query("CALL db.awaitIndex('paperAbstractIndex', 300)")
+        run_write_query("CALL db.awaitIndex('paperAbstractIndex', 300)")
+
+
+def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships):
+    ensure_fulltext_index()
 
     graph_name = f"subgraph_{topic_name.replace(' ', '_')}"
 
@@ -179,19 +261,24 @@ def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships)
     RETURN exists
     '''
 
-    exists = run_query(exists_q)
+    # The GDS graph catalog is in-memory on whichever member ran the
+    # projection, so every GDS call below goes through the writer.
+    exists = run_write_query(exists_q)
     logger.info(f"Checking if subgraph {graph_name} exists: {exists}")
     if exists and exists[0]['exists']:
         logger.info(f"Subgraph {graph_name} already exists. Dropping it.")
         drop_subgraph = f'''
         CALL gds.graph.drop('{graph_name}');
         '''
-        logger.info(pformat(run_query(drop_subgraph)))
-        logger.info(pformat(run_query(f'''MATCH (n) REMOVE n.{topic_name}, n.pageRank_{topic_name};''')))
-
+        logger.info(pformat(run_write_query(drop_subgraph)))
+        logger.info(pformat(run_write_query(f'''MATCH (n) REMOVE n.{topic_name}, n.pageRank_{topic_name};''')))
         # logger.info(f"Subgraph '{graph_name}' already exists. Skipping re-creation.")
         # return
 
+    # Unconditionally: the GDS catalog is in-memory, so after a restart the
+    # graph is gone but the previous build's stats aren't.
+    run_write_query(DELETE_TOPIC_STATS_QUERY, {"topic": topic_name})
+
     topic = [i.strip() for i in topic.split(",")]
     topic.extend([i.lower() for i in topic])  # Add lowercase versions
     topic = '" OR "'.join(topic)
@@ -288,7 +375,8 @@ def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships)
     #     '''
 
     logger.info(f"Projecting subgraph... by running Cypher query:{proj_q}\n\n")
-    logger.info(pformat(run_query(proj_q)))
+    projection = run_write_query(proj_q)
+    logger.info(pformat(projection))
 
     # Step 4: Compute and write PageRank to topic-specific property
     pr_q = f'''
@@ -298,32 +386,166 @@ def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships)
     '''
 
     logger.info("Computing PageRank and writing to property...")
-    logger.info(pformat(run_query(pr_q)))
+    pagerank = run_write_query(pr_q)
+    logger.info(pformat(pagerank))
     time.sleep(4)  # Wait for PageRank computation to finish
 
+    # Step 5: Materialize the topic's stats (see cypher_queries.py) so the
+    # reads below don't rescan every Paper for pageRank_{topic_name}.
+    logger.info("Writing topic stats...")
+    run_write_query(TOPIC_STATS_CONSTRAINT_QUERY)
+    stats_params = {
+        "topic": topic_name, "edge_count": projection[0]["relationshipCount"],
+        "centrality": pagerank[0]["centralityDistribution"], "top_k": TOPIC_STATS_TOP_K,
+    }
+    logger.info(pformat(run_write_query(write_topic_stats_query(topic_name), stats_params)))
+    _topic_versions[topic_name] = _topic_versions.get(topic_name, 0) + 1
+
+
+# Topic reads are cached process-wide (st.cache_data), so sessions
+# re-opening a topic skip the round trip. Only the small reads (stats, top
+# papers per year, page counts) are: get_state_of_the_art_analysis returns
+# up to 5000 full abstracts, and every cache hit would unpickle another copy
+# of them — paper_datasets.py shares that fetch within a session instead.
+# Every cache key includes the topic's build version, which
+# create_topic_subgraph bumps after rewriting pageRank_{topic_name}, so a
+# rebuild invalidates exactly that topic's reads. Builds from another process
+# (e.g. the MCP server) aren't seen here; the TTL bounds that staleness.
+READ_CACHE_TTL_SECONDS = 3600
+READ_CACHE_MAX_ENTRIES = 64
+_topic_versions = {}
+
+
+def topic_version(topic_name):
+    return _topic_versions.get(topic_name, 0)
+
 
-def check_top_papers_from_last_3_years(topic_name, no_of_papers=20, from_year=2022):
+@st.cache_data(ttl=READ_CACHE_TTL_SECONDS, max_entries=READ_CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_read(name, version, arguments):
+    return _UNCACHED_READS[name](**arguments)
+
+
+_UNCACHED_READS = {}
+
+
+def _topic_cached(fn):
+    """Routes fn (a read taking a topic_name argument) through _cached_read,
+    keyed by its arguments (defaults filled in, so positional and keyword
+    calls share entries) and the topic's current version."""
+    _UNCACHED_READS[fn.__name__] = fn
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        return _cached_read(fn.__name__, topic_version(arguments["topic_name"]), arguments)
+
+    return wrapper
+
+
+@_topic_cached
+def get_topic_stats(topic_name):
+    """
+    The stats create_topic_subgraph materialized for the topic (paper and
+    edge counts, year histogram as parallel years/yearCounts lists, PageRank
+    quantiles, and topK, how many top papers per year it holds), or None
+    for a topic built before stats existed.
+    """
+    rows = run_read_query(TOPIC_STATS_QUERY, {"topic": topic_name})
+    return rows[0] if rows else None
+
+
+@_topic_cached
+def check_top_papers_from_last_3_years(topic_name, no_of_papers=20, from_year=2022, fields="abstract"):
     """
     Check if the top 20 papers from the last 3 years are already computed.
+    Returns {column: [values]}, ready for pd.DataFrame. `fields` is one of
+    cypher_queries.PAPER_FIELDS; "metadata" leaves out the Abstract column entirely.
     """
-    q = f"""
+    q = _top_papers_per_year(topic_name, no_of_papers) + f"""
+    RETURN year, p.label AS title, p.pageRank_{topic_name} AS pageRank, p.citationCount as CitationCount, p.url AS URL, p.id AS ID{abstract_projection("p", fields, alias="Abstract")}
+    ORDER BY year ASC, pageRank DESC;
+    """
+    params = {"topic": topic_name, "from_year": from_year, "year": None, "no_of_papers": no_of_papers}
+    data = run_query_columns(q, params)
+    return data
+
+# Sort keys the paginated table may request, mapped to the Cypher they sort
+# on. Anything else is rejected rather than interpolated into ORDER BY.
+TOP_PAPER_SORT_COLUMNS = {
+    "pageRank": "pageRank",
+    "CitationCount": "CitationCount",
+    "year": "year",
+    "title": "title",
+}
+
+
+def _top_papers_per_year(topic_name, no_of_papers):
+    """MATCH ... UNWIND prefix shared by the Top Papers reads: the top
+    $no_of_papers papers per year from $from_year on, optionally only
+    $year. Served from the topic's stored top ids when they go deep enough,
+    else by ranking every paper in the topic."""
+    stats = get_topic_stats(topic_name)
+    if stats is not None and no_of_papers <= stats["topK"]:
+        return STATS_TOP_PAPERS_PREFIX
+    return f"""
     MATCH (p:Paper)
-    WHERE p.pageRank_{topic_name} IS NOT NULL AND p.year >= {from_year}
+    WHERE p.pageRank_{topic_name} IS NOT NULL AND p.year >= $from_year AND ($year IS NULL OR p.year = $year)
     WITH p.year AS year, p
     ORDER BY p.pageRank_{topic_name} DESC
-    WITH year, collect(p)[0..{no_of_papers}] AS topPapers
+    WITH year, collect(p)[0..$no_of_papers] AS topPapers
     UNWIND topPapers AS p
-    RETURN year, p.label AS title, p.pageRank_{topic_name} AS pageRank, p.citationCount as CitationCount, p.url AS URL, p.abstract AS Abstract, p.id AS ID
-    ORDER BY year ASC, pageRank DESC;
     """
-    
-    data = run_query(q)
-    return data
 
+
+@_topic_cached
+def get_top_papers_page(topic_name, no_of_papers=20, from_year=2022, sort_by="pageRank", descending=True, year=None, skip=0, limit=50):
+    """
+    One page of the Top Papers table (metadata only): the same per-year top
+    papers as check_top_papers_from_last_3_years, sorted, filtered to one
+    year if given, and cut with SKIP/LIMIT in Neo4j so only the visible rows
+    cross Bolt. Returns {column: [values]}; see count_top_papers for the
+    total.
+    """
+    if sort_by not in TOP_PAPER_SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column '{sort_by}', expected one of {list(TOP_PAPER_SORT_COLUMNS)}")
+    direction = "DESC" if descending else "ASC"
+    q = _top_papers_per_year(topic_name, no_of_papers) + f"""
+    RETURN year, p.label AS title, p.pageRank_{topic_name} AS pageRank, p.citationCount AS CitationCount, p.url AS URL, p.id AS ID
+    ORDER BY {TOP_PAPER_SORT_COLUMNS[sort_by]} {direction}, ID
+    SKIP $skip LIMIT $limit
+    """
+    params = {"topic": topic_name, "from_year": from_year, "year": year, "no_of_papers": no_of_papers, "skip": skip, "limit": limit}
+    return run_query_columns(q, params)
+
+
+@_topic_cached
+def count_top_papers(topic_name, no_of_papers=20, from_year=2022, year=None):
+    """Row count behind get_top_papers_page's pages. Each year contributes
+    min(no_of_papers, its paper count), so with stats this is answered from
+    the year histogram without a query."""
+    stats = get_topic_stats(topic_name)
+    if stats is not None:
+        return sum(
+            min(no_of_papers, count) for y, count in zip(stats["years"], stats["yearCounts"])
+            if y >= from_year and (year is None or y == year)
+        )
+    q = _top_papers_per_year(topic_name, no_of_papers) + "RETURN count(*) AS total"
+    params = {"from_year": from_year, "year": year, "no_of_papers": no_of_papers}
+    return run_read_query(q, params)[0]["total"]
+
+
+@_topic_cached
 def get_year_wise_distribution(topic_name):
     """
     Get year-wise distribution of papers for a given topic.
+    Returns {column: [values]}, ready for pd.DataFrame.
     """
+    stats = get_topic_stats(topic_name)
+    if stats is not None:
+        return {"year": stats["years"], "paperCount": stats["yearCounts"]}
     q = f"""
     MATCH (p:Paper)
     WHERE p.pageRank_{topic_name} IS NOT NULL
@@ -331,21 +553,24 @@ def get_year_wise_distribution(topic_name):
     ORDER BY year ASC;
     """
     
-    data = run_query(q)
+    data = run_query_columns(q)
     return data
 
 
-def get_state_of_the_art_analysis(year_cutoff, topic_name, top_papers_each_year=500):
+def get_state_of_the_art_analysis(year_cutoff, topic_name, top_papers_each_year=500, fields="abstract"):
     """
     Get state of the art analysis for papers after a specific year.
+    Returns {column: [values]}, ready for pd.DataFrame. `fields` is one of
+    cypher_queries.PAPER_FIELDS. TLDR (null when Semantic Scholar had none) is always
+    included — it's short, and compact mode sends it in place of the abstract.
     """
     q = f"""
     MATCH (p:Paper)
     WHERE p.year > {year_cutoff} AND p.pageRank_{topic_name} IS NOT NULL
-    RETURN p.label AS title, p.year AS year, p.citationCount as CitationCount, p.pageRank_{topic_name} AS subgraphPageRank, p.url AS URL, p.abstract AS Abstract, p.id as ID
+    RETURN p.label AS title, p.year AS year, p.citationCount as CitationCount, p.pageRank_{topic_name} AS subgraphPageRank, p.url AS URL, p.id as ID, p.tldr AS TLDR{abstract_projection("p", fields, alias="Abstract")}
     ORDER BY subgraphPageRank DESC
     LIMIT {top_papers_each_year};
     """
     
-    data = run_query(q)
-    return data
\ No newline at end of file
+    data = run_query_columns(q)
+    return data
@@ -0,0 +1,370 @@
+"""
+Neo4j operations for the MCP server (no Streamlit dependency), on the
+AsyncGraphDatabase driver. The MCP tool handlers run on one event loop, so a
+slow subgraph build or run_cypher call awaits here instead of blocking every
+other in-flight tool call.
+"""
+
+from custom_logging import logger
+from pprint import pformat
+import asyncio
+import csv
+import os
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+import cypher_queries as cq
+
+load_dotenv(Path(__file__).parent / ".env")
+
+uri = os.getenv("NEO4J_URI")
+user = os.getenv("NEO4J_USER")
+password = os.getenv("NEO4J_PASSWORD")
+
+# Records are pulled off the wire in batches of this many as a result is
+# iterated — see neo4j_operations.py's FETCH_SIZE.
+FETCH_SIZE = 1000
+
+# Created on first use rather than at import: an async driver's connection
+# pool belongs to the event loop it first runs on, which for the MCP server
+# is the one asyncio.run(main()) starts. The neo4j package itself (~0.7s) is
+# imported there too, so the server answers the MCP handshake and tool
+# listing without it. See neo4j_operations.py for the retry window and the
+# shared bookmark manager (read-your-writes when reads are routed to
+# replicas).
+_driver = None
+_bookmark_manager = None
+
+
+def get_driver():
+    global _driver, _bookmark_manager
+    if _driver is None:
+        from neo4j import AsyncGraphDatabase
+
+        logger.info(f"Connecting to Neo4j at {uri}")
+        _driver = AsyncGraphDatabase.driver(
+            uri, auth=(user, password), connection_timeout=300, max_transaction_retry_time=30
+        )
+        _bookmark_manager = AsyncGraphDatabase.bookmark_manager()
+    return _driver
+
+
+async def close_driver():
+    global _driver, _bookmark_manager
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+        _bookmark_manager = None
+
+
+def _session(**config):
+    driver = get_driver()
+    return driver.session(bookmark_manager=_bookmark_manager, **config)
+
+
+def _collect_data(query, params):
+    async def work(tx):
+        result = await tx.run(query, params or {})
+        return [record.data() async for record in result]
+    return work
+
+
+async def run_read_query(query, params=None):
+    """Managed read transaction: routable to a read replica, retried on
+    transient failures."""
+    async with _session() as session:
+        return await session.execute_read(_collect_data(query, params))
+
+
+async def run_write_query(query, params=None):
+    """Managed write transaction, retried on transient failures."""
+    async with _session() as session:
+        return await session.execute_write(_collect_data(query, params))
+
+
+async def stream_query(query, params=None, fetch_size=FETCH_SIZE):
+    """Yields records one at a time as the driver fetches them, instead of
+    materializing them all like run_read_query does. Read access mode, but
+    auto-commit: records already handed to the caller can't be replayed, so
+    unlike run_read_query this isn't retried."""
+    from neo4j import READ_ACCESS
+
+    async with _session(default_access_mode=READ_ACCESS, fetch_size=fetch_size) as session:
+        result = await session.run(query, params or {})
+        async for record in result:
+            yield record
+
+
+async def run_batch_query(query, rows):
+    async def work(tx):
+        result = await tx.run(query, rows=rows)
+        await result.consume()
+
+    async with _session() as session:
+        await session.execute_write(work)
+
+
+async def _run_auto_commit(query):
+    """CALL { ... } IN TRANSACTIONS manages its own transactions, so it can't
+    run inside execute_write."""
+    async with _session() as session:
+        result = await session.run(query)
+        await result.consume()
+
+
+async def check_data_presence():
+    has_node = len(await run_read_query(cq.HAS_NODE_QUERY)) > 0
+    has_edge = len(await run_read_query(cq.HAS_EDGE_QUERY)) > 0
+    logger.info(f"Has nodes: {has_node}, Has edges: {has_edge}")
+    return has_node and has_edge
+
+
+async def _load_csv_in_batches(query, csv_file_path, batch_size, desc):
+    with open(csv_file_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        batch = []
+        loaded = 0
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                await run_batch_query(query, batch)
+                loaded += len(batch)
+                batch = []
+        if batch:
+            await run_batch_query(query, batch)
+            loaded += len(batch)
+    logger.info(f"{desc}: {loaded} rows loaded from {csv_file_path}")
+
+
+async def load_nodes_in_batches(csv_file_path, batch_size=500):
+    await _load_csv_in_batches(cq.LOAD_NODES_QUERY, csv_file_path, batch_size, "Loading nodes")
+
+
+async def create_index_on_paper_id():
+    await run_write_query(cq.CREATE_PAPER_ID_INDEX_QUERY)
+
+
+async def remove_duplicate_nodes():
+    await _run_auto_commit(cq.REMOVE_DUPLICATE_NODES_QUERY)
+
+
+async def load_edges_in_batches(csv_file_path, batch_size=500):
+    await _load_csv_in_batches(cq.LOAD_EDGES_QUERY, csv_file_path, batch_size, "Loading edges")
+
+
+async def remove_duplicate_edges():
+    await _run_auto_commit(cq.REMOVE_DUPLICATE_EDGES_QUERY)
+
+
+async def load_data_if_missing():
+    if not await check_data_presence():
+        logger.info("No data found. Importing nodes and edges...")
+        await load_nodes_in_batches("data/citation_nodes_full.csv", batch_size=500)
+        await asyncio.sleep(5)
+        await create_index_on_paper_id()
+        await asyncio.sleep(5)
+        await remove_duplicate_nodes()
+        await asyncio.sleep(5)
+        await load_edges_in_batches("data/citation_edges_full.csv", batch_size=500)
+        await asyncio.sleep(5)
+        await remove_duplicate_edges()
+        await asyncio.sleep(5)
+        logger.info("Data load complete.")
+    else:
+        logger.info("Data already exists in Neo4j.")
+
+
+async def create_topic_subgraph(topic, topic_name, graph_name, validate_relationships):
+    check_index_results = await run_read_query(cq.FULLTEXT_INDEX_CHECK_QUERY)
+
+    if len(check_index_results) == 0:
+        logger.info("Creating fulltext index for paper abstracts.")
+        await run_write_query(cq.CREATE_FULLTEXT_INDEX_QUERY)
+        logger.info("Waiting for fulltext index to come online...")
+        await run_write_query(cq.AWAIT_FULLTEXT_INDEX_QUERY)
+
+    graph_name = f"subgraph_{topic_name.replace(' ', '_')}"
+
+    # The GDS graph catalog is in-memory on whichever member ran the
+    # projection, so every GDS call below goes through the writer.
+    exists = await run_write_query(cq.graph_exists_query(graph_name))
+    if exists and exists[0]['exists']:
+        logger.info(f"Subgraph {graph_name} already exists. Dropping it.")
+        await run_write_query(cq.graph_drop_query(graph_name))
+        await run_write_query(cq.remove_topic_properties_query(topic_name))
+
+    # Unconditionally: the GDS catalog is in-memory, so after a restart the
+    # graph is gone but the previous build's stats aren't.
+    await run_write_query(cq.DELETE_TOPIC_STATS_QUERY, {"topic": topic_name})
+
+    proj_q = cq.project_subgraph_query(graph_name, topic, validate_relationships)
+    projection = await run_write_query(proj_q)
+    logger.info(pformat(projection))
+
+    pagerank = await run_write_query(cq.pagerank_write_query(graph_name, topic_name))
+    logger.info(pformat(pagerank))
+
+    await run_write_query(cq.TOPIC_STATS_CONSTRAINT_QUERY)
+    stats_params = {
+        "topic": topic_name, "edge_count": projection[0]["relationshipCount"],
+        "centrality": pagerank[0]["centralityDistribution"], "top_k": cq.TOPIC_STATS_TOP_K,
+    }
+    logger.info(pformat(await run_write_query(cq.write_topic_stats_query(topic_name), stats_params)))
+
+
+async def get_topic_stats(topic_name):
+    """The topic's TopicStats row (see cypher_queries.py), or None for a
+    topic built before stats existed. The reads below fall back to scanning
+    Paper only in that case."""
+    rows = await run_read_query(cq.TOPIC_STATS_QUERY, {"topic": topic_name})
+    return rows[0] if rows else None
+
+
+async def get_topic_paper_count(topic_name):
+    stats = await get_topic_stats(topic_name)
+    if stats is not None:
+        return stats["paperCount"]
+    return (await run_read_query(cq.topic_paper_count_query(topic_name)))[0]["count"]
+
+
+async def get_top_papers_per_year(topic_name, from_year=2022, papers_per_year=20, fields="abstract"):
+    stats = await get_topic_stats(topic_name)
+    if stats is not None and papers_per_year <= stats["topK"]:
+        params = {"topic": topic_name, "from_year": from_year, "year": None, "no_of_papers": papers_per_year}
+        return await run_read_query(cq.stats_top_papers_per_year_query(topic_name, fields), params)
+    return await run_read_query(cq.top_papers_per_year_query(topic_name, from_year, papers_per_year, fields))
+
+
+async def get_year_wise_distribution(topic_name):
+    stats = await get_topic_stats(topic_name)
+    if stats is not None:
+        return cq.year_distribution_rows(stats)
+    return await run_read_query(cq.year_distribution_query(topic_name))
+
+
+async def get_top_papers_overall(topic_name, year_cutoff=2022, limit=100, offset=0, fields="abstract"):
+    return await run_read_query(cq.top_papers_overall_query(topic_name, year_cutoff, limit, offset, fields))
+
+
+async def search_papers(query, limit=50, offset=0, fields="abstract"):
+    """Full-text search across all papers in the graph."""
+    return await run_read_query(cq.search_papers_query(fields), {"query": query, "offset": offset, "limit": limit})
+
+
+async def search_papers_in_topic(topic_name, keyword, limit=50, offset=0, fields="abstract"):
+    """Full-text keyword search restricted to papers within an existing topic subgraph."""
+    q = cq.search_papers_in_topic_query(topic_name, fields)
+    return await run_read_query(q, {"keyword": keyword, "offset": offset, "limit": limit})
+
+
+async def get_cited_by(paper_id, limit=50, sort_by="pagerank", topic_name=None, fields="abstract"):
+    """
+    Get papers that cite the given paper.
+    sort_by: 'pagerank' (most influential successors) or 'year' (most recent successors)
+    topic_name: if provided, restricts results to papers within that topic subgraph
+    """
+    return await run_read_query(cq.cited_by_query(limit, sort_by, topic_name, fields), {"paper_id": paper_id})
+
+
+async def get_cites(paper_id, fields="abstract"):
+    """Get all papers cited by the given paper (its references). Naturally bounded."""
+    return await run_read_query(cq.cites_query(fields), {"paper_id": paper_id})
+
+
+async def get_abstracts(paper_ids, batch_size=1000):
+    """
+    Fetch full abstracts for the given paper ids, batched into UNWIND lookups
+    against paper_id_index. Returns {id: abstract}; unknown ids are omitted.
+    """
+    abstracts = {}
+    for batch in cq.id_batches(paper_ids, batch_size):
+        async for record in stream_query(cq.ABSTRACTS_QUERY, {"ids": batch}):
+            abstracts[record["id"]] = record["abstract"]
+    return abstracts
+
+
+async def get_all_topic_names() -> list[str]:
+    """Return all topic names that have a computed PageRank property."""
+    return [r["topic_name"] for r in await run_read_query(cq.TOPIC_NAMES_QUERY)]
+
+
+async def get_schema() -> dict:
+    """
+    Introspect the Neo4j graph and return schema: node properties, relationship types,
+    indexes, and all active topic PageRank properties. The four introspection
+    queries are independent, so they run concurrently.
+    """
+    node_props, rel_props, indexes, topic_props = await asyncio.gather(
+        run_read_query(cq.SCHEMA_NODE_PROPERTIES_QUERY),
+        run_read_query(cq.SCHEMA_REL_PROPERTIES_QUERY),
+        run_read_query(cq.SCHEMA_INDEXES_QUERY),
+        run_read_query(cq.TOPIC_PROPERTIES_QUERY),
+    )
+    return {
+        "node_properties": node_props,
+        "relationship_properties": rel_props,
+        "indexes": indexes,
+        "topic_pagerank_properties": [r["property"] for r in topic_props],
+    }
+
+
+async def run_cypher(
+    query: str,
+    params: dict | None = None,
+    max_rows: int | None = None,
+    timeout: float = cq.CYPHER_TIMEOUT_SECONDS,
+    max_estimated_rows: float = cq.CYPHER_MAX_ESTIMATED_ROWS,
+    profile: bool = False,
+) -> dict:
+    """
+    Execute an agent-written read-only Cypher query, guarded against runaway
+    plans. EXPLAINs first and rejects (ValueError) plans estimated above
+    max_estimated_rows, then runs it in a read transaction with a
+    server-side timeout and a server-side LIMIT of max_rows + 1 (see
+    cypher_queries.row_capped_query), PROFILEd only if asked.
+
+    Returns {"rows", "truncated", "elapsed_ms", "db_hits" (None unless
+    profiled), "estimated_rows", "warnings"}.
+    """
+    from neo4j import unit_of_work
+    from neo4j.exceptions import ClientError
+
+    guard = cq.CypherGuard(query, params, max_rows, timeout, max_estimated_rows, profile)
+
+    async def explain(tx):
+        result = await tx.run(guard.explain_statement, guard.params)
+        return result.keys(), (await result.consume()).plan
+
+    async with _session() as session:
+        guard.check_plan(*await session.execute_read(explain))
+
+    @unit_of_work(timeout=timeout)
+    async def work(tx, statement, statement_params):
+        result = await tx.run(statement, statement_params)
+        rows = []
+        async for record in result:
+            if guard.full(rows):
+                break
+            rows.append(guard.row(record.data()))
+        return rows, (await result.consume()).profile
+
+    start = time.perf_counter()
+    for attempt, (statement, statement_params) in enumerate(guard.attempts()):
+        try:
+            async with _session() as session:
+                rows, plan_profile = await session.execute_read(work, statement, statement_params)
+            break
+        except ClientError as e:
+            if not guard.retry_after(e, attempt):
+                raise
+    return guard.result(rows, plan_profile, time.perf_counter() - start)
+
+
+async def find_similar_topic(candidate_name: str, search_terms: list[str]) -> str | None:
+    """
+    Check if any existing topic is semantically similar to the candidate.
+    Matches on word overlap between existing topic names and the candidate + search terms.
+    Returns the matching topic_name or None.
+    """
+    return cq.match_similar_topic(await get_all_topic_names(), candidate_name, search_terms)
@@ -0,0 +1,68 @@
+"""
+Paginated result table for the Streamlit UI. Only the visible page is
+fetched and sent to the browser: the page source does the sorting, year
+filtering and slicing — in Cypher (SKIP/LIMIT) for query-backed tables, in
+pandas for frames already in memory (dataframe_pages).
+"""
+
+import math
+from typing import Callable
+
+import pandas as pd
+import streamlit as st
+
+# fetch_page(sort_by, descending, year, skip, limit) -> (page, total rows)
+PageSource = Callable[[str, bool, int | None, int, int], tuple[pd.DataFrame, int]]
+
+PAGE_SIZES = (25, 50, 100)
+
+
+def dataframe_pages(df: pd.DataFrame) -> PageSource:
+    """Page source over an in-memory frame."""
+    def fetch_page(sort_by, descending, year, skip, limit):
+        view = df if year is None else df[df["year"] == year]
+        view = view.sort_values(sort_by, ascending=not descending, kind="stable")
+        return view.iloc[skip:skip + limit], len(view)
+    return fetch_page
+
+
+def paged_table(
+    key: str,
+    fetch_page: PageSource,
+    sort_columns: list[str],
+    years: list[int] | None = None,
+    hide_columns: tuple[str, ...] = (),
+) -> None:
+    """Sort / year / page-size controls, the current page, and a page
+    selector. Changing any control returns to page 1. sort_columns[0] is the
+    default sort; years (if given) populate the year filter."""
+    page_key = f"{key}_page"
+
+    def first_page():
+        st.session_state[page_key] = 1
+
+    sort_col, order_col, year_col, size_col = st.columns([2, 1, 1, 1])
+    sort_by = sort_col.selectbox("Sort by", sort_columns, key=f"{key}_sort", on_change=first_page)
+    descending = order_col.selectbox(
+        "Order", [True, False], format_func=lambda d: "Descending" if d else "Ascending",
+        key=f"{key}_descending", on_change=first_page,
+    )
+    year = year_col.selectbox(
+        "Year", [None, *(years or [])], format_func=lambda y: "All years" if y is None else str(y),
+        key=f"{key}_year", on_change=first_page, disabled=not years,
+    )
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size", on_change=first_page)
+
+    page = st.session_state.setdefault(page_key, 1)
+    rows, total = fetch_page(sort_by, descending, year, (page - 1) * page_size, page_size)
+    n_pages = max(1, math.ceil(total / page_size))
+    if page > n_pages:
+        # The result shrank under a stale page number (e.g. after a rebuild).
+        page = st.session_state[page_key] = n_pages
+        rows, total = fetch_page(sort_by, descending, year, (page - 1) * page_size, page_size)
+
+    st.dataframe(rows.drop(columns=[c for c in hide_columns if c in rows]), use_container_width=True, hide_index=True)
+    page_col, info_col = st.columns([1, 4])
+    page_col.number_input("Page", min_value=1, max_value=n_pages, step=1, key=page_key, label_visibility="collapsed")
+    first = (page - 1) * page_size + 1 if total else 0
+    info_col.caption(f"Rows {first}–{min(page * page_size, total)} of {total} · page {page} of {n_pages}")
@@ -0,0 +1,99 @@
+"""
+Session-level handles on the papers an analysis runs over. State of the Art
+and Custom Question both start from get_state_of_the_art_analysis(cutoff,
+topic, size) — up to 5000 papers with abstracts — and then collapse near
+duplicates; a DatasetRegistry does that once per (topic, cutoff, size) and
+hands every flow and preview the same PaperDataset.
+
+The fetch is ordered by PageRank and cut with LIMIT, so a smaller size is
+served as the head of a larger fetch already held for the same topic and
+cutoff instead of another query. Handles remember the topic's build version
+and are refetched once the topic is rebuilt.
+
+This is the only cache in front of that fetch: get_state_of_the_art_analysis
+itself is deliberately left out of neo4j_operations' process-wide read
+cache, so each frame is held once per session rather than in both layers.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import pandas as pd
+
+from custom_logging import logger
+from dedup import collapse_near_duplicates
+
+
+class PaperDataset:
+    def __init__(self, topic_name: str, year_cutoff: int, size: int, papers: pd.DataFrame, version: int):
+        self.topic_name = topic_name
+        self.year_cutoff = year_cutoff
+        self.size = size
+        self.papers = papers
+        self.version = version
+        self._deduped = None
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        """True when the fetch returned fewer rows than its LIMIT, i.e. every
+        paper after the cutoff."""
+        return len(self.papers) < self.size
+
+    def head(self, size: int) -> "PaperDataset":
+        return PaperDataset(self.topic_name, self.year_cutoff, size, self.papers.iloc[:size], self.version)
+
+    def deduped(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """(kept, dropped) from collapse_near_duplicates, computed once."""
+        with self._lock:
+            if self._deduped is None:
+                self._deduped = collapse_near_duplicates(self.papers)
+            return self._deduped
+
+
+class DatasetRegistry:
+    """Per-session cache of PaperDatasets. fetch(year_cutoff, topic_name,
+    size) returns {column: [values]} ordered by PageRank (as
+    get_state_of_the_art_analysis does); version(topic_name) is the topic's
+    build version. Safe to use from background job threads."""
+
+    def __init__(self, fetch: Callable, version: Callable[[str], int], max_datasets: int = 4):
+        self._fetch = fetch
+        self._version = version
+        self.max_datasets = max_datasets
+        self._datasets: OrderedDict[tuple, PaperDataset] = OrderedDict()
+        # Held across fetches, so two flows asking for the same papers at
+        # once share one query rather than racing.
+        self._lock = threading.Lock()
+
+    def get(self, topic_name: str, year_cutoff: int, size: int) -> PaperDataset:
+        key = (topic_name, year_cutoff, size)
+        version = self._version(topic_name)
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is None or dataset.version != version:
+                dataset = self._covering(topic_name, year_cutoff, size, version)
+                if dataset is not None:
+                    logger.info(f"Serving {size} papers for {topic_name} after {year_cutoff} from a larger fetch.")
+                else:
+                    papers = pd.DataFrame(self._fetch(year_cutoff, topic_name, top_papers_each_year=size))
+                    dataset = PaperDataset(topic_name, year_cutoff, size, papers, version)
+                self._datasets[key] = dataset
+            self._datasets.move_to_end(key)
+            while len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+            return dataset
+
+    def _covering(self, topic_name: str, year_cutoff: int, size: int, version: int) -> PaperDataset | None:
+        for (topic, cutoff, held_size), dataset in self._datasets.items():
+            if topic == topic_name and cutoff == year_cutoff and dataset.version == version and (
+                held_size > size or dataset.complete
+            ):
+                return dataset.head(size)
+        return None
+
+    def invalidate(self, topic_name: str) -> None:
+        with self._lock:
+            for key in [key for key in self._datasets if key[0] == topic_name]:
+                del self._datasets[key]
@@ -0,0 +1,124 @@
+"""
+Per-paper structured extractions (key claims, techniques, benchmarks,
+limitations), stored by paper id and extraction model. A paper's record
+doesn't depend on the topic or year cutoff it was fetched under, so
+high-PageRank papers that show up across overlapping topics are extracted
+once and reused, and the State of the Art map step only calls the LLM for
+papers it hasn't seen before.
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+
+RECORD_FIELDS = ("key_claims", "techniques", "benchmarks", "limitations")
+
+
+class PaperExtractionStore:
+    """SQLite-backed; each public call opens its own connection, so one
+    instance can be shared across the extraction threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS paper_extractions (
+                    paper_id TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    record TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (paper_id, model_version)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection per operation, committed on success."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, paper_ids, model_version: str) -> dict[str, dict]:
+        """Returns {paper_id: record} for the ids that have been extracted."""
+        paper_ids = [str(pid) for pid in paper_ids]
+        records = {}
+        with self._connect() as conn:
+            # Batched to stay under SQLite's bound-parameter limit.
+            for i in range(0, len(paper_ids), 500):
+                batch = paper_ids[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT paper_id, record FROM paper_extractions "
+                    f"WHERE model_version = ? AND paper_id IN ({','.join('?' * len(batch))})",
+                    [model_version, *batch],
+                ).fetchall()
+                records.update((pid, json.loads(record)) for pid, record in rows)
+        return records
+
+    def put_many(self, records: dict[str, dict], model_version: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO paper_extractions VALUES (?, ?, ?, ?)",
+                [(str(pid), model_version, json.dumps(record), now) for pid, record in records.items()],
+            )
+
+
+def _complete_items(text: str) -> list:
+    """The complete top-level items of a JSON array that was cut off part
+    way (e.g. at the model's output limit)."""
+    decoder = json.JSONDecoder()
+    items, pos = [], text.index("[") + 1
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            return items
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return items
+        items.append(item)
+
+
+def parse_records(text: str, expected_ids) -> dict[str, dict]:
+    """Parses the model's JSON array of per-paper records, keeping only ids
+    that were actually asked about and normalizing every field to a list of
+    strings. A truncated array still yields the records that came through
+    whole. Raises ValueError if the response isn't a JSON array, or is one
+    cut off before its first complete item."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0].strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        data = _complete_items(text) if text.startswith("[") else []
+        if not data:
+            raise ValueError(f"Extraction response is not valid JSON: {e}") from e
+    if not isinstance(data, list):
+        raise ValueError("Extraction response is not a JSON array")
+
+    expected = {str(pid) for pid in expected_ids}
+    records = {}
+    for item in data:
+        if not isinstance(item, dict) or str(item.get("id")) not in expected:
+            continue
+        records[str(item["id"])] = {
+            field: [str(v) for v in (item.get(field) or []) if v] for field in RECORD_FIELDS
+        }
+    return records
+
+
+def format_record(title: str, year, record: dict) -> str:
+    """Renders one stored record as the text the synthesis prompts read."""
+    lines = [f"{title} ({year})"]
+    for field in RECORD_FIELDS:
+        if record.get(field):
+            lines.append(f"- {field.replace('_', ' ').capitalize()}: {'; '.join(record[field])}")
+    return "\n".join(lines)
@@ -0,0 +1,57 @@
+"""
+Client-side rate limiting for LLM calls. A RateLimiter holds one token bucket
+for requests per minute and one for tokens per minute; callers acquire()
+before each call and block only as long as the quota actually requires, so
+concurrent chunk extraction runs as fast as the API allows instead of
+sleeping a fixed interval between calls.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilling continuously at `per_minute` and
+    holding at most one minute's worth, so an idle client can burst up to its
+    full per-minute quota before being throttled."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` from the bucket (going negative if need be) and
+        returns how long the caller must wait before that amount has refilled.
+        Reserving up front keeps waiters first-come-first-served. Amounts over
+        capacity are clamped, or a single huge request would wait forever."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            self._available -= amount
+            if self._available >= 0:
+                return 0.0
+            return -self._available / self.refill_per_second
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits, acquired together."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int) -> float:
+        """Blocks until one request carrying ~`tokens` fits in both quotas.
+        Returns the seconds spent waiting."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,106 @@
+"""
+Lexical relevance pre-filter for the Custom Question flow. The papers fetched
+for a question are the topic's top N by PageRank, most of which have nothing
+to do with a narrow question — so before any LLM call they're scored against
+the question with BM25 over title + abstract, and only the top-k (blended
+with PageRank, so influential papers still win ties) go on to extraction.
+
+Everything runs in-process on the already-fetched DataFrame: there are only
+a handful of query terms, so BM25 needs just their per-paper counts, which
+pandas' vectorized str.count gives directly — no vocabulary or sparse matrix
+over the whole corpus.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from custom_logging import logger
+
+# BM25 defaults from the literature; fine for abstract-length documents.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Share of the blended score that comes from PageRank rather than BM25.
+PAGERANK_WEIGHT = 0.3
+
+DEFAULT_TOP_K = 300
+
+STOPWORDS = frozenset("""
+    a about above after again all also am an and any are as at be because been before being below between both
+    but by can could did do does doing down during each few for from further had has have having how i if in
+    into is it its itself just more most no nor not now of off on once only or other our out over own same
+    should so some such than that the their them then there these they this those through to too under until
+    up very was we were what when where which while who whom why will with would you your
+    paper papers research recent work works approach approaches method methods use used using study studies
+""".split())
+
+
+def question_terms(question: str) -> list[str]:
+    """Lowercased, de-duplicated content words of the question."""
+    terms = []
+    for word in re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", question.lower()):
+        if len(word) > 1 and word not in STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def bm25_scores(texts: pd.Series, terms: list[str]) -> np.ndarray:
+    """BM25 score of each text against terms. A term matches as a word
+    prefix, so "transformer" also counts "transformers" — a cheap stand-in
+    for stemming."""
+    texts = texts.fillna("").str.lower()
+    doc_len = texts.str.count(r"\S+").to_numpy(dtype=float)
+    avg_len = doc_len.mean() if len(doc_len) and doc_len.mean() > 0 else 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len)
+
+    scores = np.zeros(len(texts))
+    n = len(texts)
+    for term in terms:
+        tf = texts.str.count(rf"\b{re.escape(term)}").to_numpy(dtype=float)
+        df = np.count_nonzero(tf)
+        if df == 0:
+            continue
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        scores += idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return scores
+
+
+def filter_relevant(
+    df: pd.DataFrame,
+    question: str,
+    top_k: int = DEFAULT_TOP_K,
+    pagerank_weight: float = PAGERANK_WEIGHT,
+    pagerank_col: str = "subgraphPageRank",
+) -> pd.DataFrame:
+    """
+    Keeps at most top_k rows of df that are lexically relevant to question,
+    ranked by a blend of normalized BM25 and PageRank percentile. Papers that
+    match no question term are dropped outright. The result keeps df's
+    original (PageRank) order, so downstream chunking behaves as before.
+
+    If no paper matches any term (or the question is all stopwords), falls
+    back to the top_k rows by PageRank rather than sending nothing.
+    """
+    terms = question_terms(question)
+    scores = bm25_scores(df["title"].fillna("") + " " + df["Abstract"].fillna(""), terms)
+
+    matched = scores > 0
+    if not matched.any():
+        logger.warning(
+            f"No paper matched the question's terms {terms}; falling back to the top {top_k} by PageRank."
+        )
+        return df.head(top_k)
+
+    pagerank_pct = df[pagerank_col].rank(pct=True).to_numpy()
+    blended = (1 - pagerank_weight) * scores / scores.max() + pagerank_weight * pagerank_pct
+    blended[~matched] = -np.inf
+
+    keep = np.argsort(-blended, kind="stable")[:min(top_k, int(matched.sum()))]
+    filtered = df.iloc[np.sort(keep)]
+    logger.info(
+        f"Relevance filter kept {len(filtered)} of {len(df)} papers for terms {terms} "
+        f"({int(matched.sum())} matched at least one term)."
+    )
+    return filtered
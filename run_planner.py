@@ -0,0 +1,195 @@
+"""
+Plans how many papers a State of the Art or Custom Question run can cover in
+a wall-clock budget, and the ETA for a given size. The estimate models the
+run's three phases from measured telemetry (telemetry.py) rather than fixed
+guesses:
+
+- map: ceil(papers * tokens_per_paper / chunk budget) extraction calls (or
+  more, when chunks are also capped at max_papers_per_chunk), bound
+  by whichever is slower — the rate limiter's request/token quota, or the
+  calls' observed latency spread over the concurrency window;
+- reduce: tree_reduce levels, each one wave of merge calls;
+- the final synthesis call.
+
+Until a flow has telemetry, DEFAULT_PROFILE stands in. Per-paper response
+reuse (cache hits, stored State of the Art records) isn't predicted, so the
+ETA is for an uncached run.
+"""
+
+import math
+import time
+from dataclasses import dataclass, replace
+
+from telemetry import percentile
+
+# Observed values are taken from the last HISTORY_DAYS of calls, per topic
+# once that topic has MIN_SAMPLES uncached extraction calls, else across
+# topics.
+HISTORY_DAYS = 14
+MIN_SAMPLES = 5
+
+
+@dataclass
+class Profile:
+    """Per-call costs of one flow (e.g. "state_of_the_art")."""
+    tokens_per_paper: float
+    extract_seconds: float
+    extract_output_tokens: float
+    merge_seconds: float
+    merge_output_tokens: float
+    synthesis_seconds: float
+    samples: int = 0  # uncached extraction calls measured; 0 means all defaults
+
+
+# Rough Gemini 2.5 Pro figures for a full ~150k-token chunk.
+DEFAULT_PROFILE = Profile(
+    tokens_per_paper=300,
+    extract_seconds=45.0,
+    extract_output_tokens=4000,
+    merge_seconds=30.0,
+    merge_output_tokens=3000,
+    synthesis_seconds=40.0,
+)
+
+
+def profile_from_rows(rows: list[dict], flow: str, topic: str | None = None, default: Profile = DEFAULT_PROFILE) -> Profile:
+    """Builds flow's Profile from telemetry rows (TelemetryStore.rows):
+    tokens per paper from extraction calls that recorded their paper count,
+    p50 latency and output tokens per call phase. Anything unmeasured keeps
+    default's value."""
+    def calls(phase, rows):
+        return [
+            r for r in rows
+            if r["flow"] == f"{flow}.{phase}" and not r["cache_hit"] and r["error"] is None and r["latency_ms"] is not None
+        ]
+
+    if topic is not None and len(calls("extract", [r for r in rows if r["topic"] == topic])) >= MIN_SAMPLES:
+        rows = [r for r in rows if r["topic"] == topic]
+
+    extract, merge, synthesize = calls("extract", rows), calls("merge", rows), calls("synthesize", rows)
+    profile = replace(default, samples=len(extract))
+
+    sized = [r for r in extract if r.get("papers") and r["prompt_tokens"]]
+    if sized:
+        profile.tokens_per_paper = sum(r["prompt_tokens"] for r in sized) / sum(r["papers"] for r in sized)
+    for phase_calls, seconds, output in (
+        (extract, "extract_seconds", "extract_output_tokens"),
+        (merge, "merge_seconds", "merge_output_tokens"),
+        (synthesize, "synthesis_seconds", None),
+    ):
+        if phase_calls:
+            setattr(profile, seconds, percentile([r["latency_ms"] for r in phase_calls], 50) / 1000)
+            outputs = [r["output_tokens"] for r in phase_calls if r["output_tokens"]]
+            if output and outputs:
+                setattr(profile, output, percentile(outputs, 50))
+    return profile
+
+
+def load_profile(store, flow: str, topic: str | None = None) -> Profile:
+    """flow's Profile from a TelemetryStore (None when telemetry is off)."""
+    if store is None:
+        return DEFAULT_PROFILE
+    return profile_from_rows(store.rows(since=time.time() - HISTORY_DAYS * 86400), flow, topic)
+
+
+@dataclass
+class Estimate:
+    papers: int
+    calls: int
+    map_seconds: float
+    reduce_seconds: float
+    synthesis_seconds: float
+    quota_bound: bool  # map phase limited by rate-limit quota rather than latency
+
+    @property
+    def total_seconds(self) -> float:
+        return self.map_seconds + self.reduce_seconds + self.synthesis_seconds
+
+
+class RunPlanner:
+    def __init__(
+        self,
+        profile: Profile,
+        chunk_token_budget: int,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        reduce_token_budget: int,
+        reduce_fan_in: int,
+        max_papers_per_chunk: int | None = None,
+    ):
+        self.profile = profile
+        self.chunk_token_budget = chunk_token_budget
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.reduce_token_budget = reduce_token_budget
+        self.reduce_fan_in = reduce_fan_in
+        self.max_papers_per_chunk = max_papers_per_chunk
+
+    def _waves_seconds(self, calls: int, seconds_per_call: float) -> float:
+        return math.ceil(calls / self.max_concurrency) * seconds_per_call
+
+    def _quota_seconds(self, requests: int, tokens: float) -> float:
+        """Time the rate limiter holds back `requests` calls totalling
+        `tokens` — it starts with a full minute's burst, so only demand
+        beyond that waits."""
+        minutes = max(
+            (requests - self.requests_per_minute) / self.requests_per_minute,
+            (tokens - self.tokens_per_minute) / self.tokens_per_minute,
+        )
+        return max(0.0, minutes * 60)
+
+    def estimate(self, papers: int) -> Estimate:
+        p = self.profile
+        tokens = papers * p.tokens_per_paper
+        calls = math.ceil(tokens / self.chunk_token_budget) if papers else 0
+        if self.max_papers_per_chunk:
+            calls = max(calls, math.ceil(papers / self.max_papers_per_chunk))
+
+        # tree_reduce: the first level packs by token budget only, later
+        # ones also cap each merge at fan_in partials.
+        reduce_seconds, merge_calls = 0.0, 0
+        texts, text_tokens, level = calls, calls * p.extract_output_tokens, 0
+        while texts > 1 and text_tokens > self.reduce_token_budget:
+            groups = math.ceil(text_tokens / self.reduce_token_budget)
+            if level:
+                groups = max(groups, math.ceil(texts / self.reduce_fan_in))
+            groups = min(groups, math.ceil(texts / 2))
+            reduce_seconds += self._waves_seconds(groups, p.merge_seconds)
+            merge_calls += groups
+            texts, text_tokens, level = groups, groups * p.merge_output_tokens, level + 1
+
+        latency_seconds = self._waves_seconds(calls, p.extract_seconds)
+        quota_seconds = self._quota_seconds(calls + merge_calls + 1, tokens)
+        return Estimate(
+            papers=papers,
+            calls=calls,
+            map_seconds=max(latency_seconds, quota_seconds),
+            reduce_seconds=reduce_seconds,
+            synthesis_seconds=p.synthesis_seconds,
+            quota_bound=quota_seconds > latency_seconds,
+        )
+
+    def recommend(self, target_seconds: float, min_papers: int = 100, max_papers: int = 5000, step: int = 100) -> int:
+        """Largest multiple of step in [min_papers, max_papers] whose ETA
+        fits target_seconds; min_papers if none does. ETA only grows with
+        papers, so this is a binary search."""
+        lo, hi = min_papers // step, max_papers // step
+        if self.estimate(lo * step).total_seconds > target_seconds:
+            return min_papers
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.estimate(mid * step).total_seconds <= target_seconds:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo * step
+
+
+def format_duration(seconds: float) -> str:
+    seconds = round(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes}m {seconds:02d}s" if minutes < 60 else f"{minutes // 60}h {minutes % 60:02d}m"
@@ -0,0 +1,180 @@
+"""
+Structured telemetry for every LLM call: flow, topic, chunk index, papers in
+the prompt, prompt and output tokens, latency (and time to first token when streamed), cache hit,
+retries and error. Rows go to a local SQLite table, so cost, latency and
+throughput can be aggregated per flow or topic without regex-parsing
+data/llm_usage.log.
+
+    python telemetry.py report [--since-hours 24] [--by flow|topic|flow,topic]
+"""
+
+import argparse
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TELEMETRY_PATH = "data/llm_telemetry.sqlite"
+
+# Set by the map/reduce helpers around each chunk or merge group. Set inside
+# the worker thread itself, since pool threads don't inherit the submitter's
+# context.
+_chunk_index = ContextVar("chunk_index", default=None)
+
+
+@contextmanager
+def chunk(index: int):
+    token = _chunk_index.set(index)
+    try:
+        yield
+    finally:
+        _chunk_index.reset(token)
+
+
+class TelemetryStore:
+    """SQLite-backed; each public call opens its own connection, so one
+    instance can be shared across the extraction threads."""
+
+    def __init__(self, path: str = TELEMETRY_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_calls (
+                    ts REAL NOT NULL,
+                    flow TEXT NOT NULL,
+                    topic TEXT,
+                    chunk_index INTEGER,
+                    model TEXT NOT NULL,
+                    prompt_tokens INTEGER,
+                    output_tokens INTEGER,
+                    latency_ms REAL,
+                    ttft_ms REAL,
+                    cache_hit INTEGER NOT NULL,
+                    retries INTEGER NOT NULL,
+                    error TEXT,
+                    papers INTEGER
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_calls_ts ON llm_calls (ts)")
+
+    @contextmanager
+    def _connect(self):
+        """One short-lived connection per operation, committed on success."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(
+        self,
+        flow: str,
+        topic: str | None,
+        model: str,
+        prompt_tokens: int | None,
+        output_tokens: int | None,
+        latency_s: float | None,
+        cache_hit: bool,
+        retries: int = 0,
+        ttft_s: float | None = None,
+        error: str | None = None,
+        papers: int | None = None,
+    ) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO llm_calls (ts, flow, topic, chunk_index, model, prompt_tokens, output_tokens, "
+                "latency_ms, ttft_ms, cache_hit, retries, error, papers) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(), flow, topic, _chunk_index.get(), model, prompt_tokens, output_tokens,
+                    latency_s * 1000 if latency_s is not None else None,
+                    ttft_s * 1000 if ttft_s is not None else None,
+                    int(cache_hit), retries, error, papers,
+                ),
+            )
+
+    def rows(self, since: float = 0.0) -> list[dict]:
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(r) for r in conn.execute("SELECT * FROM llm_calls WHERE ts >= ? ORDER BY ts", (since,))]
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile; None for no values."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(rows: list[dict], by: tuple[str, ...] = ("flow",)) -> list[dict]:
+    """Per-group call counts, cache hit rate, retries, errors, p50/p95
+    latency of model calls (cache hits excluded), p50 time to first token,
+    and token totals/throughput."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row[k] for k in by), []).append(row)
+
+    summary = []
+    for key, group in sorted(groups.items(), key=lambda kv: tuple(str(k) for k in kv[0])):
+        calls = [r for r in group if not r["cache_hit"] and r["error"] is None]
+        latencies = [r["latency_ms"] for r in calls if r["latency_ms"] is not None]
+        ttfts = [r["ttft_ms"] for r in calls if r["ttft_ms"] is not None]
+        tokens_in = sum(r["prompt_tokens"] or 0 for r in calls)
+        tokens_out = sum(r["output_tokens"] or 0 for r in calls)
+        busy_s = sum(latencies) / 1000
+        summary.append({
+            **dict(zip(by, key)),
+            "calls": len(group),
+            "cache_hits": sum(r["cache_hit"] for r in group),
+            "retries": sum(r["retries"] for r in group),
+            "errors": sum(r["error"] is not None for r in group),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p50_ttft_ms": percentile(ttfts, 50),
+            "tokens_in": tokens_in,
+            "tokens_out": tokens_out,
+            "out_tok_per_s": tokens_out / busy_s if busy_s else None,
+        })
+    return summary
+
+
+def _format_table(summary: list[dict]) -> str:
+    if not summary:
+        return "No LLM calls recorded in this window."
+    columns = list(summary[0])
+
+    def cell(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:,.0f}"
+        return f"{value:,}" if isinstance(value, int) else str(value)
+
+    cells = [[cell(row[c]) for c in columns] for row in summary]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM call telemetry.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="p50/p95 latency and tokens per flow")
+    report.add_argument("--since-hours", type=float, help="only calls from the last N hours")
+    report.add_argument("--by", default="flow", help="comma-separated grouping columns: flow, topic, model")
+    report.add_argument("--path", default=TELEMETRY_PATH)
+    args = parser.parse_args()
+
+    since = time.time() - args.since_hours * 3600 if args.since_hours else 0.0
+    by = tuple(c.strip() for c in args.by.split(",") if c.strip())
+    if not by or not set(by) <= {"flow", "topic", "model"}:
+        parser.error("--by takes flow, topic and/or model")
+    print(_format_table(summarize(TelemetryStore(args.path).rows(since), by)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repo root rather than in a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def genai(tmp_path_factory):
+    """genai on the fake backend. Its usage log and SQLite stores go under
+    data/ in the working directory, so the import happens from a scratch
+    directory."""
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("LLM_FAKE_LATENCY_SECONDS", "0")
+    cwd = os.getcwd()
+    scratch = tmp_path_factory.mktemp("app")
+    (scratch / "data").mkdir()
+    os.chdir(scratch)
+    try:
+        import genai
+    finally:
+        os.chdir(cwd)
+    return genai
@@ -0,0 +1,137 @@
+import pytest
+
+from cypher_queries import (
+    CYPHER_DEFAULT_MAX_ROWS,
+    CYPHER_MAX_ESTIMATED_ROWS,
+    CYPHER_ROW_LIMIT,
+    CYPHER_WARN_ESTIMATED_ROWS,
+    ROW_CAP_PARAM,
+    CypherGuard,
+    clamp_max_rows,
+    plan_warnings,
+    row_capped_query,
+)
+
+
+def test_clamp_max_rows_defaults_and_bounds():
+    assert clamp_max_rows(None) == CYPHER_DEFAULT_MAX_ROWS
+    assert clamp_max_rows(0) == 1
+    assert clamp_max_rows(-5) == 1
+    assert clamp_max_rows(42) == 42
+    assert clamp_max_rows(CYPHER_ROW_LIMIT * 10) == CYPHER_ROW_LIMIT
+
+
+def test_plan_warnings_below_warn_threshold_is_quiet():
+    assert plan_warnings(CYPHER_WARN_ESTIMATED_ROWS) == []
+
+
+def test_plan_warnings_warns_on_wide_plans():
+    warnings = plan_warnings(CYPHER_WARN_ESTIMATED_ROWS + 1)
+    assert len(warnings) == 1
+    assert "may be slow" in warnings[0]
+
+
+def test_plan_warnings_rejects_plans_over_the_limit():
+    with pytest.raises(ValueError, match="cartesian product"):
+        plan_warnings(CYPHER_MAX_ESTIMATED_ROWS + 1)
+    with pytest.raises(ValueError):
+        plan_warnings(11, max_estimated=10)
+
+
+def test_row_capped_query_wraps_in_limited_subquery():
+    wrapped = row_capped_query("MATCH (p:Paper) RETURN p.id AS id;  ")
+    assert wrapped == f"CALL {{\nMATCH (p:Paper) RETURN p.id AS id\n}}\nRETURN * LIMIT ${ROW_CAP_PARAM}"
+
+
+def test_row_capped_query_leaves_show_commands_alone():
+    assert row_capped_query("SHOW INDEXES") is None
+    assert row_capped_query("  show constraints;") is None
+
+
+class FakeError(Exception):
+    def __init__(self, code):
+        self.code = code
+
+
+SYNTAX_ERROR = FakeError("Neo.ClientError.Statement.SyntaxError")
+TIMEOUT_ERROR = FakeError("Neo.ClientError.Transaction.TransactionTimedOut")
+QUERY = "MATCH (p:Paper) RETURN p.year AS year, p.id AS id"
+
+
+def plan(estimated_rows):
+    return {"args": {"EstimatedRows": estimated_rows}, "children": []}
+
+
+def test_guard_rejects_writes_and_explain_prefix():
+    with pytest.raises(ValueError, match="Write operations"):
+        CypherGuard("MATCH (p) DETACH DELETE p")
+    with pytest.raises(ValueError, match="PROFILE"):
+        CypherGuard("PROFILE " + QUERY)
+
+
+def test_guard_rejects_wide_plans_and_warns_on_large_ones():
+    guard = CypherGuard(QUERY, max_estimated_rows=1000)
+    with pytest.raises(ValueError):
+        guard.check_plan(["year", "id"], plan(1001))
+
+    guard = CypherGuard(QUERY)
+    guard.check_plan(["year", "id"], plan(CYPHER_WARN_ESTIMATED_ROWS + 1))
+    assert guard.estimated_rows == CYPHER_WARN_ESTIMATED_ROWS + 1
+    assert len(guard.warnings) == 1
+
+
+def test_guard_tries_capped_then_uncapped():
+    guard = CypherGuard(QUERY, params={"year": 2020}, max_rows=10)
+    (capped, capped_params), (plain, plain_params) = guard.attempts()
+    assert capped == row_capped_query(QUERY)
+    assert capped_params == {"year": 2020, ROW_CAP_PARAM: 11}
+    assert (plain, plain_params) == (QUERY, {"year": 2020})
+
+
+def test_guard_profiles_every_attempt_when_asked():
+    statements = [statement for statement, _ in CypherGuard(QUERY, profile=True).attempts()]
+    assert all(statement.startswith("PROFILE ") for statement in statements)
+    assert [statement for statement, _ in CypherGuard("SHOW INDEXES", profile=True).attempts()] == [
+        "PROFILE SHOW INDEXES"
+    ]
+
+
+def test_guard_falls_back_only_on_syntax_errors_with_attempts_left():
+    guard = CypherGuard(QUERY)
+    assert guard.retry_after(SYNTAX_ERROR, 0)
+    assert not guard.retry_after(SYNTAX_ERROR, 1)
+    assert not guard.retry_after(FakeError("Neo.ClientError.Statement.ParameterMissing"), 0)
+    assert not CypherGuard("SHOW INDEXES").retry_after(SYNTAX_ERROR, 0)
+
+
+def test_guard_maps_timeouts_to_value_error():
+    with pytest.raises(ValueError, match="12s timeout") as excinfo:
+        CypherGuard(QUERY, timeout=12).retry_after(TIMEOUT_ERROR, 0)
+    assert excinfo.value.__cause__ is TIMEOUT_ERROR
+
+
+def test_guard_rows_follow_query_column_order_and_truncate():
+    guard = CypherGuard(QUERY, max_rows=2)
+    guard.check_plan(["year", "id"], plan(10))
+    rows = []
+    for i in range(5):
+        if guard.full(rows):
+            break
+        rows.append(guard.row({"id": i, "year": 2000 + i}))
+    assert len(rows) == 3
+    assert list(rows[0]) == ["year", "id"]
+
+    result = guard.result(rows, None, 0.0123)
+    assert result["rows"] == rows[:2]
+    assert result["truncated"]
+    assert result["elapsed_ms"] == 12
+    assert result["db_hits"] is None
+    assert result["estimated_rows"] == 10
+
+
+def test_guard_counts_db_hits_only_when_profiled():
+    profile = {"dbHits": 3, "children": [{"dbHits": 4, "children": []}]}
+    guard = CypherGuard(QUERY, profile=True)
+    guard.check_plan(["year", "id"], plan(1))
+    assert guard.result([], profile, 0)["db_hits"] == 7
+    assert not guard.result([], profile, 0)["truncated"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from dedup import collapse_near_duplicates, minhash_signatures, near_duplicate_pairs, shingles
+
+ABSTRACT = (
+    "We propose a retrieval augmented generation method that indexes a corpus of scientific papers, "
+    "retrieves the passages most relevant to a question and conditions a language model on them, "
+    "improving factual accuracy on three question answering benchmarks."
+)
+
+
+def papers(rows):
+    return pd.DataFrame(rows, columns=["title", "Abstract", "subgraphPageRank"])
+
+
+def test_shingles_are_stable_and_case_insensitive():
+    assert set(shingles("Graph Neural Networks!")) == set(shingles("graph neural networks"))
+    assert len(shingles("one two three four")) == 2
+
+
+def test_identical_texts_pair_and_different_texts_dont():
+    signatures = minhash_signatures([ABSTRACT, ABSTRACT, "diffusion models for image synthesis at scale"])
+    assert near_duplicate_pairs(signatures) == [(0, 1)]
+    assert np.array_equal(signatures[0], signatures[1])
+
+
+def test_keeps_highest_pagerank_of_each_cluster():
+    df = papers([
+        ("RAG for papers", ABSTRACT, 0.2),
+        ("Diffusion", "diffusion models for image synthesis at scale", 0.1),
+        ("RAG for papers", ABSTRACT + " Code is available.", 0.7),
+        ("RAG for papers", ABSTRACT, 0.5),
+    ])
+    kept, dropped = collapse_near_duplicates(df)
+    assert list(kept.index) == [1, 2]
+    assert sorted(dropped.index) == [0, 3]
+
+
+def test_pagerank_ties_keep_the_first_paper():
+    df = papers([("RAG", ABSTRACT, 0.5), ("RAG", ABSTRACT, 0.5)])
+    kept, _ = collapse_near_duplicates(df)
+    assert list(kept.index) == [0]
+
+
+def test_papers_without_text_are_never_merged():
+    df = papers([("", "", 0.1), (None, None, 0.2), ("", "  --  ", 0.3), ("RAG", ABSTRACT, 0.4), ("RAG", ABSTRACT, 0.5)])
+    kept, dropped = collapse_near_duplicates(df)
+    assert list(kept.index) == [0, 1, 2, 4]
+    assert list(dropped.index) == [3]
+
+
+def test_small_frames_pass_through():
+    df = papers([("RAG", ABSTRACT, 0.5)])
+    kept, dropped = collapse_near_duplicates(df)
+    assert kept is df
+    assert dropped.empty
@@ -0,0 +1,49 @@
+def text_of(genai, tokens):
+    """A text that estimate_tokens counts as `tokens`."""
+    return "x" * ((tokens - 1) * genai.CHARS_PER_TOKEN)
+
+
+def test_groups_pack_by_token_budget(genai):
+    texts = [text_of(genai, 40) for _ in range(5)]
+    groups = genai.group_by_token_budget(texts, token_budget=100)
+    assert [len(g) for g in groups] == [2, 2, 1]
+    assert sum(groups, []) == texts
+
+
+def test_groups_respect_fan_in(genai):
+    texts = [text_of(genai, 1) for _ in range(7)]
+    assert [len(g) for g in genai.group_by_token_budget(texts, 10_000, fan_in=3)] == [3, 3, 1]
+
+
+def test_oversized_texts_still_pair_up(genai):
+    texts = [text_of(genai, 500) for _ in range(5)]
+    assert [len(g) for g in genai.group_by_token_budget(texts, token_budget=100)] == [2, 2, 1]
+
+
+def test_empty_input_has_no_groups(genai):
+    assert genai.group_by_token_budget([], 100) == []
+
+
+def test_tree_reduce_returns_texts_that_already_fit(genai):
+    texts = ["a", "b", "c"]
+    assert genai.tree_reduce(texts, lambda group: "merged", token_budget=10_000) == texts
+
+
+def test_tree_reduce_merges_until_one_group_fits(genai):
+    texts = [text_of(genai, 40) for _ in range(8)]
+    calls = []
+
+    def merge(group):
+        calls.append(len(group))
+        return text_of(genai, 40)
+
+    result = genai.tree_reduce(texts, merge, token_budget=100, fan_in=2, max_workers=2)
+    # 8 -> 4 -> 2, and two 40-token texts fit the budget.
+    assert calls == [2, 2, 2, 2, 2, 2]
+    assert len(result) == 2
+
+
+def test_tree_reduce_keeps_group_order(genai):
+    texts = [f"{i}" + text_of(genai, 60) for i in range(4)]
+    result = genai.tree_reduce(texts, lambda group: "+".join(t[0] for t in group), token_budget=100, max_workers=4)
+    assert result == ["0+1", "2+3"]
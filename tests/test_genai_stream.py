@@ -0,0 +1,66 @@
+import gc
+
+import pytest
+
+from llm_backends import FakeBackend
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def record(self, flow, topic, model, **fields):
+        self.calls.append({"flow": flow, **fields})
+
+
+@pytest.fixture
+def streaming(genai, monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(genai, "backend", FakeBackend(latency_seconds=0, output_tokens=100, tokens_per_second=1e9))
+    monkeypatch.setattr(genai, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(genai, "LLM_TELEMETRY_ENABLED", True)
+    monkeypatch.setattr(genai, "_telemetry_store", lambda: recorder)
+    return genai, recorder
+
+
+def in_flight(genai):
+    return genai.llm_client.concurrency._in_flight
+
+
+def test_slot_is_held_until_the_stream_is_read(streaming):
+    genai, recorder = streaming
+    stream = genai._generate_stream("prompt", "for a test", flow="test")
+    next(stream)
+    assert in_flight(genai) == 1
+    text = "".join(stream)
+    assert text
+    assert in_flight(genai) == 0
+    [call] = recorder.calls
+    assert call["error"] is None
+    assert call["output_tokens"] > 0
+
+
+def test_abandoned_stream_releases_slot_and_records_telemetry(streaming):
+    genai, recorder = streaming
+    stream = genai._generate_stream("prompt", "for a test", flow="test")
+    next(stream)
+    del stream
+    gc.collect()
+    assert in_flight(genai) == 0
+    [call] = recorder.calls
+    assert call["error"] == "GeneratorExit"
+    assert call["ttft_s"] is not None
+    assert call["latency_s"] is not None
+
+
+def test_failed_request_records_its_error(streaming, monkeypatch):
+    genai, recorder = streaming
+
+    def fail(prompt):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(genai.backend, "stream", fail)
+    with pytest.raises(RuntimeError):
+        "".join(genai._generate_stream("prompt", "for a test", flow="test"))
+    assert in_flight(genai) == 0
+    assert recorder.calls[0]["error"] == "RuntimeError"
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from paged_table import dataframe_pages
+
+DF = pd.DataFrame({
+    "title": ["a", "b", "c", "d", "e"],
+    "year": [2020, 2021, 2020, None, 2020],
+    "citations": [5, 3, 5, 1, 9],
+})
+
+
+def test_pages_slice_sorted_frame():
+    fetch = dataframe_pages(DF)
+    page, total = fetch("citations", True, None, 0, 2)
+    assert list(page["title"]) == ["e", "a"]
+    assert total == 5
+    page, total = fetch("citations", True, None, 4, 2)
+    assert list(page["title"]) == ["d"]
+
+
+def test_sort_is_stable_for_ties():
+    page, _ = dataframe_pages(DF)("citations", False, None, 0, 5)
+    assert list(page["title"]) == ["d", "b", "a", "c", "e"]
+
+
+def test_year_filter_counts_only_that_year():
+    page, total = dataframe_pages(DF)("citations", False, 2020, 0, 2)
+    assert list(page["title"]) == ["a", "c"]
+    assert total == 3
+
+
+def test_page_past_the_end_is_empty():
+    page, total = dataframe_pages(DF)("title", False, None, 10, 5)
+    assert page.empty
+    assert total == 5
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from paper_extractions import RECORD_FIELDS, parse_records
+
+
+def record(pid, **fields):
+    return {"id": pid, **{field: fields.get(field, [f"{field} of {pid}"]) for field in RECORD_FIELDS}}
+
+
+def test_parses_array_and_keeps_only_expected_ids():
+    text = json.dumps([record("1"), record("2"), record("99")])
+    records = parse_records(text, ["1", "2"])
+    assert set(records) == {"1", "2"}
+    assert records["1"]["key_claims"] == ["key_claims of 1"]
+
+
+def test_ids_are_compared_as_strings():
+    records = parse_records(json.dumps([record(7)]), [7])
+    assert set(records) == {"7"}
+
+
+def test_fields_are_normalized_to_lists_of_strings():
+    item = {"id": "1", "key_claims": ["a", None, "", 3], "techniques": None}
+    records = parse_records(json.dumps([item]), ["1"])
+    assert records["1"]["key_claims"] == ["a", "3"]
+    assert records["1"]["techniques"] == []
+    assert set(records["1"]) == set(RECORD_FIELDS)
+
+
+def test_strips_markdown_fence():
+    text = "```json\n" + json.dumps([record("1")]) + "\n```\n"
+    assert set(parse_records(text, ["1"])) == {"1"}
+
+
+def test_skips_non_dict_items():
+    text = json.dumps(["junk", 3, record("1")])
+    assert set(parse_records(text, ["1"])) == {"1"}
+
+
+def test_truncated_array_keeps_complete_items():
+    full = json.dumps([record("1"), record("2"), record("3")])
+    cut = full[:full.index('"3"') + 5]
+    assert set(parse_records(cut, ["1", "2", "3"])) == {"1", "2"}
+
+
+def test_truncated_fenced_array_keeps_complete_items():
+    full = json.dumps([record("1"), record("2")], indent=2)
+    cut = "```json\n" + full[:full.rindex('"id"')]
+    assert set(parse_records(cut, ["1", "2"])) == {"1"}
+
+
+def test_array_cut_before_first_item_is_an_error():
+    with pytest.raises(ValueError, match="not valid JSON"):
+        parse_records('[{"id": "1", "key_cla', ["1"])
+
+
+def test_invalid_json_is_an_error():
+    with pytest.raises(ValueError, match="not valid JSON"):
+        parse_records("Sorry, I can't help with that.", ["1"])
+
+
+def test_non_array_is_an_error():
+    with pytest.raises(ValueError, match="not a JSON array"):
+        parse_records(json.dumps(record("1")), ["1"])
@@ -0,0 +1,64 @@
+import pytest
+
+import rate_limiting
+from rate_limiting import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiting.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiting.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_bucket_allows_a_full_minute_burst(clock):
+    bucket = TokenBucket(per_minute=60)
+    assert all(bucket.reserve(1) == 0 for _ in range(60))
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_bucket_waits_queue_up_in_order(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+
+
+def test_bucket_refills_over_time_up_to_capacity(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+    clock.now += 30
+    assert bucket.reserve(30) == 0
+    clock.now += 3600
+    assert bucket.reserve(60) == 0
+    assert bucket.reserve(1) > 0
+
+
+def test_bucket_clamps_requests_over_capacity(clock):
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(1000) == 0
+    assert bucket.reserve(1000) == pytest.approx(60.0)
+
+
+def test_limiter_waits_for_the_tighter_quota(clock):
+    limiter = RateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+    assert limiter.acquire(1000) == 0
+    assert clock.slept == []
+    # Nine requests are left, but the token bucket is empty: 500 tokens
+    # refill in 30s.
+    assert limiter.acquire(500) == pytest.approx(30.0)
+    assert clock.slept == [pytest.approx(30.0)]
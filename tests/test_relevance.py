@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from relevance import bm25_scores, filter_relevant, question_terms
+
+
+def papers(rows):
+    return pd.DataFrame(rows, columns=["title", "Abstract", "subgraphPageRank"])
+
+
+def test_question_terms_drop_stopwords_and_duplicates():
+    assert question_terms("What are recent approaches to graph-based RAG for RAG?") == ["graph-based", "rag"]
+
+
+def test_bm25_prefers_matching_and_rarer_terms():
+    texts = pd.Series([
+        "sparse attention for long transformers",
+        "transformers for vision",
+        "convolutional networks",
+        None,
+    ])
+    scores = bm25_scores(texts, ["sparse", "transformer"])
+    assert scores[2] == 0 and scores[3] == 0
+    assert scores[0] > scores[1] > 0
+
+
+def test_bm25_term_matches_word_prefix_only():
+    scores = bm25_scores(pd.Series(["transformers", "retransformer"]), ["transformer"])
+    assert scores[0] > 0
+    assert scores[1] == 0
+
+
+def test_bm25_with_no_terms_scores_zero():
+    assert not bm25_scores(pd.Series(["a b c"]), []).any()
+
+
+def test_filter_drops_unmatched_and_keeps_original_order():
+    df = papers([
+        ("Graph neural networks", "message passing", 0.9),
+        ("Diffusion models", "image generation", 0.8),
+        ("Graph transformers", "attention over graph nodes", 0.1),
+    ])
+    kept = filter_relevant(df, "graph learning", top_k=10)
+    assert list(kept.index) == [0, 2]
+
+
+def test_filter_blends_pagerank_into_the_top_k():
+    df = papers([
+        ("Graph pruning", "graph", 0.1),
+        ("Graph pruning", "graph", 0.9),
+        ("Graph pruning", "graph", 0.5),
+    ])
+    kept = filter_relevant(df, "graph pruning", top_k=2)
+    assert list(kept.index) == [1, 2]
+
+
+def test_filter_falls_back_to_pagerank_order_when_nothing_matches():
+    df = papers([("A", "x", 0.9), ("B", "y", 0.5), ("C", "z", 0.1)])
+    kept = filter_relevant(df, "quantum chemistry", top_k=2)
+    assert list(kept.index) == [0, 1]
+    assert np.array_equal(kept["title"], ["A", "B"])
@@ -0,0 +1,81 @@
+import math
+from dataclasses import replace
+
+from run_planner import DEFAULT_PROFILE, RunPlanner, format_duration
+
+PROFILE = replace(
+    DEFAULT_PROFILE,
+    tokens_per_paper=100,
+    extract_seconds=10.0,
+    extract_output_tokens=1000,
+    merge_seconds=5.0,
+    merge_output_tokens=1000,
+    synthesis_seconds=20.0,
+)
+
+
+def planner(**overrides):
+    kwargs = dict(
+        profile=PROFILE,
+        chunk_token_budget=10_000,
+        requests_per_minute=1000,
+        tokens_per_minute=10_000_000,
+        max_concurrency=4,
+        reduce_token_budget=100_000,
+        reduce_fan_in=8,
+    )
+    return RunPlanner(**(kwargs | overrides))
+
+
+def test_estimate_counts_calls_by_token_budget():
+    estimate = planner().estimate(1000)
+    assert estimate.calls == 10
+    # 10 calls in waves of 4, no reduce (10k extract tokens fit), one synthesis.
+    assert estimate.map_seconds == 3 * 10.0
+    assert estimate.reduce_seconds == 0
+    assert estimate.total_seconds == 30.0 + 20.0
+    assert not estimate.quota_bound
+
+
+def test_estimate_honours_papers_per_chunk_cap():
+    assert planner(max_papers_per_chunk=50).estimate(1000).calls == 20
+    assert planner(max_papers_per_chunk=500).estimate(1000).calls == 10
+
+
+def test_estimate_adds_reduce_levels_over_budget():
+    estimate = planner(reduce_token_budget=3000).estimate(1000)
+    # 10 extracts (10k tokens) -> 4 merges -> 2 merges (each level at most
+    # half the texts).
+    assert estimate.reduce_seconds == 2 * 5.0
+    assert estimate.calls == 10
+
+
+def test_estimate_is_quota_bound_when_requests_run_out():
+    estimate = planner(requests_per_minute=5).estimate(1000)
+    assert estimate.quota_bound
+    assert math.isclose(estimate.map_seconds, (11 - 5) / 5 * 60)
+
+
+def test_no_papers_no_calls():
+    assert planner().estimate(0).calls == 0
+
+
+def test_recommend_finds_largest_size_within_target():
+    p = planner()
+    target = p.estimate(2000).total_seconds
+    best = p.recommend(target)
+    assert p.estimate(best).total_seconds <= target
+    assert p.estimate(best + 100).total_seconds > target or best == 5000
+
+
+def test_recommend_bounds():
+    p = planner()
+    assert p.recommend(0) == 100
+    assert p.recommend(10 ** 9) == 5000
+    assert p.recommend(10 ** 9, max_papers=800) == 800
+
+
+def test_format_duration():
+    assert format_duration(42.4) == "42s"
+    assert format_duration(125) == "2m 05s"
+    assert format_duration(3 * 3600 + 7 * 60) == "3h 07m"
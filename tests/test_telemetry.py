@@ -0,0 +1,31 @@
+from telemetry import percentile, summarize
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([2, 1], 50) == 1
+    assert percentile([1, 2, 3, 4, 5, 6], 50) == 3
+    assert percentile([5, 1, 3], 50) == 3
+    assert percentile(list(range(1, 21)), 95) == 19
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile([1, 2, 3], 100) == 3
+    assert percentile([1, 2, 3], 0) == 1
+
+
+def test_percentile_of_nothing_is_none():
+    assert percentile([], 50) is None
+
+
+def test_summarize_excludes_cache_hits_and_errors_from_latency():
+    def row(latency_ms, cache_hit=False, error=None):
+        return {
+            "flow": "sota", "latency_ms": latency_ms, "ttft_ms": None, "cache_hit": cache_hit,
+            "retries": 0, "error": error, "prompt_tokens": 10, "output_tokens": 5,
+        }
+
+    [summary] = summarize([row(100), row(300), row(1, cache_hit=True), row(9000, error="boom")])
+    assert summary["calls"] == 4
+    assert summary["cache_hits"] == 1
+    assert summary["errors"] == 1
+    assert summary["p50_ms"] == 100
+    assert summary["p95_ms"] == 300
+    assert summary["tokens_in"] == 20